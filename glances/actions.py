@@ -19,9 +19,13 @@
 
 """Manage on alert actions."""
 
+import threading
+from time import time
+
 from glances.logger import logger
 from glances.timer import Timer
 from glances.secure import secure_popen
+from glances.workers import GlancesJob, GlancesWorkerPool
 
 try:
     import chevron
@@ -83,22 +87,120 @@ class GlancesActions(object):
             )
         )
 
+        # Replace {{arg}} by the dict one (Thk to {Mustache})
+        # The commands are rendered now (the stats can change before the run)
+        if chevron_tag:
+            commands = [chevron.render(cmd, mustache_dict) for cmd in commands]
+
         # Run all actions in background
-        for cmd in commands:
-            # Replace {{arg}} by the dict one (Thk to {Mustache})
-            if chevron_tag:
-                cmd_full = chevron.render(cmd, mustache_dict)
+        glances_actions_executor.submit(stat_name, criticality, commands)
+
+        self.set(stat_name, criticality)
+
+        return True
+
+
+class GlancesActionsExecutor(object):
+
+    """This class runs the actions commands in a pool of worker threads.
+
+    The commands of a stat are ran one after the other, with a timeout.
+    If the stat is triggered again while its commands are running, only
+    the last trigger is kept (and ran when the running commands end).
+    """
+
+    def __init__(self, max_workers=2, timeout=30):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        # The pool is started with the first action
+        self._pool = None
+        self._lock = threading.Lock()
+        # Running jobs (key: stat_name)
+        self._running = {}
+        # Triggers waiting for the end of the running job of the stat
+        # key: stat_name
+        # value: (criticality, commands, trigger time)
+        self._pending = {}
+        # Statistics
+        self._stats = {'runs': 0, 'coalesced': 0, 'latency': None, 'latency_max': None, 'wait': None}
+
+    def set(self, max_workers=None, timeout=None):
+        """Set the number of workers (before the first action) and the commands timeout."""
+        if max_workers is not None:
+            self.max_workers = max_workers
+        if timeout is not None:
+            self.timeout = timeout
+
+    def submit(self, stat_name, criticality, commands):
+        """Queue the (rendered) commands of the stat."""
+        with self._lock:
+            if stat_name in self._running:
+                if stat_name in self._pending:
+                    self._stats['coalesced'] += 1
+                self._pending[stat_name] = (criticality, commands, time())
             else:
-                cmd_full = cmd
+                self._start(stat_name, criticality, commands, time())
+
+    def _start(self, stat_name, criticality, commands, triggered):
+        """Submit the commands to the pool (should be called with the lock)."""
+        if self._pool is None:
+            self._pool = GlancesWorkerPool(max_workers=self.max_workers, name='glances-actions')
+        job = GlancesJob(self._run, args=(stat_name, criticality, commands, triggered), callback=self._done)
+        self._running[stat_name] = job
+        self._pool.submit_job(job)
+
+    def _run(self, stat_name, criticality, commands, triggered):
+        """Run the commands (called by a worker thread)."""
+        with self._lock:
+            self._stats['wait'] = time() - triggered
+        for cmd in commands:
             # Execute the action
-            logger.info("Action triggered for {} ({}): {}".format(stat_name, criticality, cmd_full))
+            logger.info("Action triggered for {} ({}): {}".format(stat_name, criticality, cmd))
             try:
-                ret = secure_popen(cmd_full)
+                ret = secure_popen(cmd, timeout=self.timeout)
             except OSError as e:
                 logger.error("Action error for {} ({}): {}".format(stat_name, criticality, e))
             else:
                 logger.debug("Action result for {} ({}): {}".format(stat_name, criticality, ret))
 
-        self.set(stat_name, criticality)
-
-        return True
+    def _done(self, job):
+        """Update the statistics and run the pending trigger of the stat (called by a worker thread)."""
+        stat_name = job.args[0]
+        with self._lock:
+            if self._running.get(stat_name) is not job:
+                # Executor stopped
+                return
+            del self._running[stat_name]
+            self._stats['runs'] += 1
+            self._stats['latency'] = job.duration
+            self._stats['latency_max'] = max(job.duration, self._stats['latency_max'] or 0)
+            if stat_name in self._pending:
+                self._start(stat_name, *self._pending.pop(stat_name))
+
+    def get_stats(self):
+        """Return the executor statistics (dict).
+
+        queue: number of triggers waiting for a worker or for the end of the previous run
+        running: number of running commands lists
+        runs: number of ended commands lists
+        coalesced: number of triggers replaced by a newer one before their run
+        latency, latency_max: last and maximum run duration (in seconds)
+        wait: time between the trigger and the start of the last run (in seconds)
+        """
+        with self._lock:
+            ret = dict(self._stats)
+            ret['queue'] = len(self._pending) + (self._pool.qsize() if self._pool is not None else 0)
+            ret['running'] = len(self._running) - (self._pool.qsize() if self._pool is not None else 0)
+        return ret
+
+    def stop(self):
+        """Stop the worker threads (the running commands are abandoned)."""
+        if self._pool is not None:
+            self._pool.stop(timeout=0)
+            self._pool = None
+        with self._lock:
+            self._running = {}
+            self._pending = {}
+
+
+glances_actions_executor = GlancesActionsExecutor()
@@ -21,12 +21,12 @@
 
 import os
 import re
-import threading
 
 from glances.compat import listkeys, iteritems
 from glances.logger import logger
 from glances.globals import amps_path
-from glances.processes import glances_processes
+from glances.processes import glances_processes, pid_key
+from glances.workers import GlancesWorkerPool
 
 
 class AmpsList(object):
@@ -48,6 +48,20 @@ class AmpsList(object):
         self.args = args
         self.config = config
 
+        # The AMPs update methods are ran in a pool of worker threads
+        self.pool = GlancesWorkerPool(
+            max_workers=config.get_int_value('amps', 'workers', default=4) if config is not None else 4,
+            name='glances-amps',
+        )
+        # Running jobs (key: AMP name)
+        self._jobs = {}
+        # Compiled regular expressions (key: AMP name, value: (regex, compiled regex or None if invalid))
+        self._regexes = {}
+        # Process to AMPs match index
+        # key: (pid, create_time)
+        # value: (process name, tuple of the matching AMP names)
+        self._index = {}
+
         # Load the AMP configurations / scripts
         self.load_configs()
 
@@ -105,10 +119,18 @@ class AmpsList(object):
         return len(self.__amps_dict)
 
     def update(self):
-        """Update the command result attributed."""
+        """Update the command result attributed.
+
+        The AMP update method is only called (in a worker thread) when its
+        refresh time is expired and its last update is finished. Otherwise,
+        the last result is kept.
+        """
         # Get the current processes list (once)
         processlist = glances_processes.getlist()
 
+        # Processes matching each AMP
+        amps_processes = self._build_amps_lists(processlist)
+
         # Iter upon the AMPs dict
         for k, v in iteritems(self.get()):
             if not v.enable():
@@ -119,18 +141,17 @@ class AmpsList(object):
                 # If there is no regex, execute anyway (see issue #1690)
                 v.set_count(0)
                 # Call the AMP update method
-                thread = threading.Thread(target=v.update_wrapper, args=[[]])
-                thread.start()
+                self._submit(k, v, [])
                 continue
 
-            amps_list = self._build_amps_list(v, processlist)
+            amps_list = amps_processes.get(k, [])
 
             if len(amps_list) > 0:
                 # At least one process is matching the regex
                 logger.debug("AMPS: {} processes {} detected ({})".format(len(amps_list), k, amps_list))
+                v.set_count(len(amps_list))
                 # Call the AMP update method
-                thread = threading.Thread(target=v.update_wrapper, args=[amps_list])
-                thread.start()
+                self._submit(k, v, amps_list)
             else:
                 # Set the process number to 0
                 v.set_count(0)
@@ -140,36 +161,91 @@ class AmpsList(object):
 
         return self.__amps_dict
 
-    def _build_amps_list(self, amp_value, processlist):
-        """Return the AMPS process list according to the amp_value
-
-        Search application monitored processes by a regular expression
+    def _submit(self, name, amp, amps_list):
+        """Submit the AMP update method to the workers if its refresh time is expired."""
+        job = self._jobs.get(name)
+        if job is not None and not job.done():
+            # The last update is still running
+            return
+        if not amp.timer.finished():
+            # Keep the last result
+            return
+        self._jobs[name] = self.pool.submit(amp.update_wrapper, amps_list)
+
+    def _compile(self):
+        """Compile the regular expressions of the AMPs.
+
+        Return True if one of them has changed since the last call.
         """
+        changed = False
+        for k, v in iteritems(self.get()):
+            regex = v.regex() if v.enable() else None
+            if k in self._regexes and self._regexes[k][0] == regex:
+                continue
+            changed = True
+            compiled = None
+            if regex is not None:
+                try:
+                    compiled = re.compile(regex)
+                except (re.error, TypeError) as e:
+                    logger.error("AMP {}: invalid regular expression {} ({})".format(k, regex, e))
+            self._regexes[k] = (regex, compiled)
+        for k in listkeys(self._regexes):
+            if k not in self.get():
+                changed = True
+                del self._regexes[k]
+        return changed
+
+    def _match(self, process):
+        """Return the names of the AMPs matching the process."""
         ret = []
-        try:
+        for k, (_, compiled) in iteritems(self._regexes):
+            if compiled is None:
+                continue
             # Search in both cmdline and name (for kernel thread, see #1261)
-            for p in processlist:
-                add_it = False
-                if re.search(amp_value.regex(), p['name']) is not None:
-                    add_it = True
-                else:
-                    if p['cmdline'] is None:
-                        # See issue #1689 (thanks to @darylkell)
-                        continue
-                    for c in p['cmdline']:
-                        if re.search(amp_value.regex(), c) is not None:
-                            add_it = True
-                            break
-                if add_it:
-                    ret.append(
+            if compiled.search(process['name']) is not None:
+                ret.append(k)
+            elif process['cmdline'] is not None:
+                # See issue #1689 (thanks to @darylkell) for the None cmdline
+                for c in process['cmdline']:
+                    if compiled.search(c) is not None:
+                        ret.append(k)
+                        break
+        return tuple(ret)
+
+    def _build_amps_lists(self, processlist):
+        """Return the AMPS process lists (dict, key: AMP name).
+
+        Search application monitored processes by a regular expression.
+        Only the new processes (or the renamed ones) are matched against
+        the regular expressions, the others are read from the match index.
+        """
+        if self._compile():
+            # An AMP regular expression has changed: rebuild the index
+            self._index = {}
+        ret = {}
+        index = {}
+        for p in processlist:
+            try:
+                key = pid_key(p)
+                cached = self._index.get(key)
+                if cached is None or cached[0] != p['name']:
+                    cached = (p['name'], self._match(p))
+                index[key] = cached
+                for k in cached[1]:
+                    ret.setdefault(k, []).append(
                         {'pid': p['pid'], 'cpu_percent': p['cpu_percent'], 'memory_percent': p['memory_percent']}
                     )
-
-        except (TypeError, KeyError) as e:
-            logger.debug("Can not build AMPS list ({})".format(e))
-
+            except (TypeError, KeyError) as e:
+                logger.debug("Can not build AMPS list ({})".format(e))
+        # Forget the processes that are gone
+        self._index = index
         return ret
 
+    def stop(self):
+        """Stop the worker threads (the running AMP updates are abandoned)."""
+        self.pool.stop(timeout=0)
+
     def getList(self):
         """Return the AMPs list."""
         return listkeys(self.__amps_dict)
@@ -19,7 +19,159 @@
 
 """Attribute class."""
 
+import threading
+from array import array
 from datetime import datetime
+from time import mktime, time
+
+from glances.compat import long, range
+
+# Typecode used to store integer values (64 bits signed)
+try:
+    array('q')
+    INT_TYPECODE = 'q'
+except ValueError:
+    INT_TYPECODE = 'l'
+
+
+def to_timestamp(d):
+    """Convert a (local) datetime to a timestamp (seconds since epoch)."""
+    return mktime(d.timetuple()) + d.microsecond / 1e6
+
+
+class GlancesHistoryRing(object):
+
+    """Fixed capacity ring buffer of (timestamp, value) points.
+
+    Timestamps are stored in an array of float64 (seconds since epoch).
+    Values are stored in a typed array (int64 or float64) as long as they
+    are numbers, otherwise (None, list, dict...) in a Python list.
+    Arrays grow up to the capacity then the oldest point is overwritten,
+    so adding a point is O(1).
+    The ring can be read while a thread appends points (stats snapshots):
+    the points are added and read (copied) with a lock.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._times = array('d')
+        self._values = None
+        # Position of the oldest point
+        self._start = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._times)
+
+    def __iter__(self):
+        return self.items()
+
+    def __getitem__(self, pos):
+        """Return the point (datetime, value) in position pos (negative position allowed)."""
+        if isinstance(pos, slice):
+            with self._lock:
+                return [self._point(i) for i in range(*pos.indices(len(self)))]
+        with self._lock:
+            if pos < 0:
+                pos += len(self)
+            if not 0 <= pos < len(self):
+                raise IndexError('history index out of range')
+            return self._point(pos)
+
+    def _index(self, pos):
+        """Return the index in the arrays of the point in position pos."""
+        return (self._start + pos) % len(self._times)
+
+    def _point(self, pos):
+        i = self._index(pos)
+        return datetime.fromtimestamp(self._times[i]), self._values[i]
+
+    def _init_values(self, value):
+        """Init the values storage regarding the type of the first value."""
+        if isinstance(value, bool):
+            self._values = []
+        elif isinstance(value, (int, long)):
+            self._values = array(INT_TYPECODE)
+        elif isinstance(value, float):
+            self._values = array('d')
+        else:
+            self._values = []
+
+    def _set_value(self, i, value):
+        """Set the value in the arrays index i (append if i is None).
+
+        If the value does not fit in the typed array, the storage is
+        converted to a more generic one (int64 > float64 > list).
+        """
+        try:
+            if isinstance(self._values, array) and isinstance(value, bool):
+                raise TypeError
+            if isinstance(self._values, array) and self._values.typecode != 'd' and isinstance(value, float):
+                raise TypeError
+            if i is None:
+                self._values.append(value)
+            else:
+                self._values[i] = value
+        except (TypeError, OverflowError):
+            if isinstance(self._values, array) and self._values.typecode != 'd' and isinstance(value, float):
+                self._values = array('d', self._values)
+            else:
+                self._values = list(self._values)
+            self._set_value(i, value)
+
+    def append(self, value, timestamp=None):
+        """Add a point to the ring (overwrite the oldest one if the ring is full)."""
+        if timestamp is None:
+            timestamp = time()
+        with self._lock:
+            if self._values is None:
+                self._init_values(value)
+            if len(self._times) < self.capacity:
+                self._times.append(timestamp)
+                self._set_value(None, value)
+            else:
+                self._times[self._start] = timestamp
+                self._set_value(self._start, value)
+                self._start = (self._start + 1) % len(self._times)
+
+    def reset(self):
+        with self._lock:
+            self._times = array('d')
+            self._values = None
+            self._start = 0
+
+    def _copy(self, nb=0):
+        """Return the last nb timestamps and values (all if nb=0), oldest first.
+
+        Only these points are copied (with the lock).
+        """
+        with self._lock:
+            length = len(self)
+            first = max(0, length - nb) if nb > 0 else 0
+            if length == 0 or first >= length:
+                return [], []
+            start = self._index(first)
+            end = self._index(length - 1) + 1
+            if start < end:
+                return self._times[start:end].tolist(), list(self._values[start:end])
+            return (
+                self._times[start:].tolist() + self._times[:end].tolist(),
+                list(self._values[start:]) + list(self._values[:end]),
+            )
+
+    def items(self, nb=0):
+        """Iterate over the last nb points (all if nb=0)."""
+        times, values = self._copy(nb)
+        for t, v in zip(times, values):
+            yield datetime.fromtimestamp(t), v
+
+    def timestamps(self, nb=0):
+        """Iterate over the last nb timestamps (all if nb=0)."""
+        return iter(self._copy(nb)[0])
+
+    def values(self, nb=0):
+        """Iterate over the last nb values (all if nb=0)."""
+        return iter(self._copy(nb)[1])
 
 
 class GlancesAttribute(object):
@@ -28,15 +180,15 @@ class GlancesAttribute(object):
 
         :param name: Attribute name (string)
         :param description: Attribute human reading description (string)
-        :param history_max_size: Maximum size of the history list (default is no limit)
+        :param history_max_size: Maximum size of the history list (default is no history)
 
-        History is stored as a list for tuple: [(date, value), ...]
+        History is stored in a GlancesHistoryRing: [(date, value), ...]
         """
         self._name = name
         self._description = description
         self._value = None
         self._history_max_size = history_max_size
-        self._history = []
+        self._history = GlancesHistoryRing(history_max_size or 0)
 
     def __repr__(self):
         return self.value
@@ -98,21 +250,22 @@ class GlancesAttribute(object):
 
     @history.setter
     def history(self, new_history):
-        self._history = new_history
+        """Set the history from a list of (date, value)."""
+        self.history_reset()
+        for d, v in new_history:
+            self._history.append(v, timestamp=to_timestamp(d))
 
     @history.deleter
     def history(self):
         del self._history
 
     def history_reset(self):
-        self._history = []
+        self._history.reset()
 
     def history_add(self, value):
         """Add a value in the history"""
         if self._history_max_size:
-            if self.history_len() >= self._history_max_size:
-                self._history.pop(0)
-            self._history.append(value)
+            self._history.append(value[1], timestamp=to_timestamp(value[0]))
 
     def history_size(self):
         """Return the history size (maximum number of value in the history)"""
@@ -131,13 +284,13 @@ class GlancesAttribute(object):
 
     def history_raw(self, nb=0):
         """Return the history in ISO JSON format"""
-        return self._history[-nb:]
+        return list(self._history.items(nb=nb))
 
     def history_json(self, nb=0):
         """Return the history in ISO JSON format"""
-        return [(i[0].isoformat(), i[1]) for i in self._history[-nb:]]
+        return [(i[0].isoformat(), i[1]) for i in self._history.items(nb=nb)]
 
     def history_mean(self, nb=5):
         """Return the mean on the <nb> values in the history."""
-        _, v = zip(*self._history)
-        return sum(v[-nb:]) / float(v[-1] - v[-nb])
+        v = list(self._history.values(nb=nb))
+        return sum(v) / float(v[-1] - v[0])
@@ -27,6 +27,7 @@ import time
 from glances import __version__
 from glances.compat import Fault, ProtocolError, ServerProxy, Transport
 from glances.logger import logger
+from glances.snapshot import apply_stats_delta
 from glances.stats_client import GlancesStatsClient
 from glances.outputs.glances_curses import GlancesCursesClient
 from glances.timer import Counter
@@ -58,6 +59,12 @@ class GlancesClient(object):
         # Return to browser or exit
         self.return_to_browser = return_to_browser
 
+        # Only get the stats changes from the server (see get_server_stats)
+        self._delta = True
+        self._generation = 0
+        self._epoch = None
+        self._server_stats = {}
+
         # Build the URI
         if args.password != "":
             self.uri = 'http://{}:{}@{}:{}'.format(args.username, args.password, args.client, args.port)
@@ -199,6 +206,33 @@ class GlancesClient(object):
             logger.critical("Unknown server mode: {}".format(self.client_mode))
             sys.exit(2)
 
+    def get_server_stats(self):
+        """Return the server stats changed since the last call (all the stats the first time)."""
+        if self._delta:
+            try:
+                if self._epoch is None:
+                    # First call (None can not be sent with XML-RPC)
+                    delta = json.loads(self.client.getAllDelta(self._generation))
+                else:
+                    delta = json.loads(self.client.getAllDelta(self._generation, self._epoch))
+                if not delta['full'] and delta.get('epoch') != self._epoch:
+                    # The server restarted: the delta is not based on our stats
+                    delta = json.loads(self.client.getAllDelta(0))
+            except Fault as e:
+                # Old Glances server without the getAllDelta method
+                logger.debug("Server can not send the stats delta ({}), get all the stats".format(e))
+                self._delta = False
+            else:
+                if delta['full']:
+                    self._server_stats = {}
+                ret = {}
+                for p, d in delta['plugins'].items():
+                    ret[p] = self._server_stats[p] = apply_stats_delta(self._server_stats.get(p), d)
+                self._generation = delta['generation']
+                self._epoch = delta.get('epoch')
+                return ret
+        return json.loads(self.client.getAll())
+
     def update_glances(self):
         """Get stats from Glances server.
 
@@ -208,7 +242,7 @@ class GlancesClient(object):
         """
         # Update the stats
         try:
-            server_stats = json.loads(self.client.getAll())
+            server_stats = self.get_server_stats()
         except socket.error:
             # Client cannot get server stats
             return "Disconnected"
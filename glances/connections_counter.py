@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Glances.
+#
+# Copyright (C) 2022 Nicolargo <nicolas@nicolargo.com>
+#
+# Glances is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Glances is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""TCP sockets states counter (Linux only)."""
+
+import os
+import socket
+import struct
+
+from glances.logger import logger
+
+import psutil
+
+# Kernel TCP states (see include/net/tcp_states.h) to psutil states
+TCP_STATES = {
+    1: psutil.CONN_ESTABLISHED,
+    2: psutil.CONN_SYN_SENT,
+    3: psutil.CONN_SYN_RECV,
+    4: psutil.CONN_FIN_WAIT1,
+    5: psutil.CONN_FIN_WAIT2,
+    6: psutil.CONN_TIME_WAIT,
+    7: psutil.CONN_CLOSE,
+    8: psutil.CONN_CLOSE_WAIT,
+    9: psutil.CONN_LAST_ACK,
+    10: psutil.CONN_LISTEN,
+    11: psutil.CONN_CLOSING,
+    # TCP_NEW_SYN_RECV (request sockets)
+    12: psutil.CONN_SYN_RECV,
+}
+
+# Netlink constants (see linux/netlink.h, linux/sock_diag.h and linux/inet_diag.h)
+NETLINK_SOCK_DIAG = 4
+SOCK_DIAG_BY_FAMILY = 20
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+NLMSG_ERROR = 0x2
+NLMSG_DONE = 0x3
+# nlmsghdr: len, type, flags, seq, pid
+NLMSGHDR = struct.Struct('=IHHII')
+# inet_diag_req_v2: family, protocol, ext, pad, states and inet_diag_sockid (48 bytes)
+INET_DIAG_REQ_V2 = struct.Struct('=BBBxI48x')
+# Offset of idiag_state in a message (nlmsghdr + idiag_family)
+IDIAG_STATE_OFFSET = NLMSGHDR.size + 1
+
+
+class GlancesTcpStatesCounter(object):
+
+    """Count the TCP sockets per state in a single pass.
+
+    The counts are asked to the kernel with NETLINK_SOCK_DIAG (only the
+    state of each socket is read in the answer), or if not available,
+    read line by line from /proc/net/tcp and /proc/net/tcp6.
+    No Python object is created per socket.
+    """
+
+    def __init__(self, procfs_path='/proc'):
+        self.procfs_path = procfs_path
+        self.netlink = True
+        self._seq = 0
+
+    def count(self):
+        """Return the number of TCP sockets per state (dict, key is the psutil state)."""
+        counts = [0] * (max(TCP_STATES) + 1)
+        if self.netlink:
+            try:
+                for family in (socket.AF_INET, socket.AF_INET6):
+                    self._count_netlink(family, counts)
+            except (AttributeError, socket.error, struct.error, ValueError) as e:
+                # AttributeError: AF_NETLINK not available
+                logger.debug('Can not count the TCP sockets with netlink, use /proc/net/tcp ({})'.format(e))
+                self.netlink = False
+                counts = [0] * len(counts)
+        if not self.netlink:
+            for name in ('tcp', 'tcp6'):
+                self._count_procfs(os.path.join(self.procfs_path, 'net', name), counts)
+        ret = dict.fromkeys(set(TCP_STATES.values()), 0)
+        for state, status in TCP_STATES.items():
+            ret[status] += counts[state]
+        return ret
+
+    def _count_netlink(self, family, counts):
+        """Add the number of sockets per state of the family to counts (list, index is the kernel state)."""
+        self._seq += 1
+        request = INET_DIAG_REQ_V2.pack(family, socket.IPPROTO_TCP, 0, 0xFFFFFFFF)
+        header = NLMSGHDR.pack(
+            NLMSGHDR.size + len(request), SOCK_DIAG_BY_FAMILY, NLM_F_REQUEST | NLM_F_DUMP, self._seq, 0
+        )
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_SOCK_DIAG)
+        try:
+            sock.sendall(header + request)
+            while True:
+                data = sock.recv(65536)
+                offset = 0
+                size = len(data)
+                while offset < size:
+                    length, msg_type = NLMSGHDR.unpack_from(data, offset)[:2]
+                    if msg_type == NLMSG_DONE:
+                        return
+                    if msg_type == NLMSG_ERROR:
+                        raise socket.error('netlink error {}'.format(-struct.unpack_from('=i', data, offset + 16)[0]))
+                    if length < NLMSGHDR.size:
+                        raise ValueError('netlink message too short')
+                    if msg_type == SOCK_DIAG_BY_FAMILY:
+                        state = data[offset + IDIAG_STATE_OFFSET]
+                        if not isinstance(state, int):
+                            # Python 2
+                            state = ord(state)
+                        if state < len(counts):
+                            counts[state] += 1
+                    # Messages are aligned on 4 bytes
+                    offset += (length + 3) & ~3
+        finally:
+            sock.close()
+
+    def _count_procfs(self, path, counts):
+        """Add the number of sockets per state of the /proc/net/tcp[6] file to counts."""
+        try:
+            with open(path, 'r') as f:
+                # Header
+                f.readline()
+                # Lines are: sl: local_address rem_address st ...
+                # with fixed size addresses (8 or 32 hexa digits for the IP, 4 for the port)
+                offset = None
+                for line in f:
+                    start = line.index(':') + 2
+                    if offset is None:
+                        offset = 2 * (line.index(' ', start) - start + 1)
+                    counts[int(line[start + offset : start + offset + 2], 16)] += 1
+        except (IOError, OSError) as e:
+            logger.debug('Can not read {} ({})'.format(path, e))
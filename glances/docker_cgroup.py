@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Glances.
+#
+# Copyright (C) 2022 Nicolargo <nicolas@nicolargo.com>
+#
+# Glances is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Glances is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Containers stats collector reading the cgroup (v1 or v2) hierarchy (Linux only)."""
+
+import os
+
+from glances.logger import logger
+
+import psutil
+
+
+class GlancesCgroupCollector(object):
+
+    """Grab the CPU, memory, block IO and network stats of the containers.
+
+    All the running containers are read in one pass (see update) from:
+    - the cgroup hierarchy of the container (cgroup v1 or v2)
+    - the /proc/<pid>/net/dev file of the container main process
+
+    The stats of a container have the same format than the Docker API
+    stats (only the fields used by the Glances Docker plugin).
+    """
+
+    def __init__(self, cgroup_path='/sys/fs/cgroup', procfs_path='/proc'):
+        self.cgroup_path = cgroup_path
+        self.procfs_path = procfs_path
+        # cgroup v2 (unified hierarchy) or v1
+        self.version = 2 if os.path.exists(os.path.join(cgroup_path, 'cgroup.controllers')) else 1
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.nb_core = psutil.cpu_count() or 1
+        # Dict of containers (key is the container id)
+        # value: dict with pid, cgroup paths and previous cpu_stats
+        self.containers = {}
+        # Last stats (key is the container id)
+        self._stats = {}
+
+    def _read(self, path):
+        with open(path, 'r') as f:
+            return f.read()
+
+    def _read_int(self, path):
+        """Return the integer value of the file (None if the value is max)."""
+        value = self._read(path).strip()
+        return None if value == 'max' else int(value)
+
+    def _read_keys(self, path):
+        """Return the dict of a flat keyed file (example: memory.stat)."""
+        ret = {}
+        for line in self._read(path).splitlines():
+            k, v = line.split()[:2]
+            ret[k] = int(v)
+        return ret
+
+    def get_cgroup_paths(self, pid):
+        """Return the cgroup paths (dict, key is the controller) of the given process."""
+        ret = {}
+        for line in self._read(os.path.join(self.procfs_path, str(pid), 'cgroup')).splitlines():
+            _, controllers, path = line.split(':', 2)
+            path = path.lstrip('/')
+            if self.version == 2:
+                if controllers == '':
+                    ret['unified'] = os.path.join(self.cgroup_path, path)
+            else:
+                for controller in controllers.split(','):
+                    if controller:
+                        ret[controller] = os.path.join(self.cgroup_path, controller, path)
+        return ret
+
+    def get_system_cpu_usage(self):
+        """Return the host CPU usage in nanoseconds (same as the Docker API system_cpu_usage).
+
+        Sum of the user, nice, system, idle, iowait, irq, softirq and steal times.
+        """
+        with open(os.path.join(self.procfs_path, 'stat'), 'r') as f:
+            fields = f.readline().split()
+        return sum(int(i) for i in fields[1:9]) * 1000000000 // self.clock_ticks
+
+    def update(self, containers):
+        """Grab and return the stats of the given containers.
+
+        containers is a list of (container id, main process pid) couples.
+        Return a dict (key is the container id).
+        """
+        system_cpu_usage = self.get_system_cpu_usage()
+        known = {}
+        stats = {}
+        for container_id, pid in containers:
+            container = self.containers.get(container_id)
+            try:
+                if container is None or container['pid'] != pid:
+                    container = {'pid': pid, 'paths': self.get_cgroup_paths(pid), 'cpu_stats': {}}
+                stats[container_id] = self.get_container_stats(container, system_cpu_usage)
+            except (IOError, OSError, ValueError) as e:
+                logger.debug("Cannot grab the cgroup stats of container {} ({})".format(container_id[:12], e))
+                continue
+            known[container_id] = container
+        # Forget the containers that are gone
+        self.containers = known
+        self._stats = stats
+        return stats
+
+    def get_stats(self, container_id):
+        """Return the last stats of the given container (empty dict if not available)."""
+        return self._stats.get(container_id, {})
+
+    def get_container_stats(self, container, system_cpu_usage):
+        """Return the stats of the container (Docker API stats format)."""
+        ret = {}
+        paths = container['paths']
+        if self.version == 2:
+            path = paths['unified']
+            getters = [
+                ('cpu_stats', self._cpu_v2, path),
+                ('memory_stats', self._memory_v2, path),
+                ('blkio_stats', self._blkio_v2, path),
+            ]
+        else:
+            getters = [
+                ('cpu_stats', self._cpu_v1, paths.get('cpuacct')),
+                ('memory_stats', self._memory_v1, paths.get('memory')),
+                ('blkio_stats', self._blkio_v1, paths.get('blkio')),
+            ]
+        for key, fct, path in getters:
+            if path is None:
+                continue
+            try:
+                ret[key] = fct(path)
+            except (IOError, OSError, ValueError, KeyError) as e:
+                logger.debug("Cannot grab the cgroup {} of {} ({})".format(key, path, e))
+
+        # CPU usage in percent is computed from the previous stats
+        if 'cpu_stats' in ret:
+            ret['cpu_stats']['system_cpu_usage'] = system_cpu_usage
+            ret['cpu_stats']['online_cpus'] = self.nb_core
+            ret['precpu_stats'] = container['cpu_stats']
+            container['cpu_stats'] = ret['cpu_stats']
+
+        # The network stats are not in the cgroup but in the container network namespace
+        try:
+            ret['networks'] = self._networks(container['pid'])
+        except (IOError, OSError, ValueError) as e:
+            logger.debug("Cannot grab the network stats of process {} ({})".format(container['pid'], e))
+
+        return ret
+
+    def _cpu_v1(self, path):
+        return {'cpu_usage': {'total_usage': self._read_int(os.path.join(path, 'cpuacct.usage'))}}
+
+    def _cpu_v2(self, path):
+        usage = self._read_keys(os.path.join(path, 'cpu.stat'))['usage_usec'] * 1000
+        return {'cpu_usage': {'total_usage': usage}}
+
+    def _memory_v1(self, path):
+        stat = self._read_keys(os.path.join(path, 'memory.stat'))
+        return {
+            'usage': self._read_int(os.path.join(path, 'memory.usage_in_bytes')),
+            'limit': self._read_int(os.path.join(path, 'memory.limit_in_bytes')),
+            'max_usage': self._read_int(os.path.join(path, 'memory.max_usage_in_bytes')),
+            'stats': {
+                'rss': stat.get('total_rss', stat.get('rss')),
+                'cache': stat.get('total_cache', stat.get('cache')),
+            },
+        }
+
+    def _memory_v2(self, path):
+        stat = self._read_keys(os.path.join(path, 'memory.stat'))
+        limit = self._read_int(os.path.join(path, 'memory.max'))
+        try:
+            max_usage = self._read_int(os.path.join(path, 'memory.peak'))
+        except (IOError, OSError):
+            # Only available with kernel 5.19 or higher
+            max_usage = None
+        return {
+            'usage': self._read_int(os.path.join(path, 'memory.current')),
+            # No limit: same as the Docker API (host memory)
+            'limit': limit if limit is not None else psutil.virtual_memory().total,
+            'max_usage': max_usage,
+            'stats': {'rss': stat.get('anon'), 'cache': stat.get('file')},
+        }
+
+    def _blkio_v1(self, path):
+        read_bytes = write_bytes = 0
+        for name in ('blkio.throttle.io_service_bytes_recursive', 'blkio.io_service_bytes_recursive'):
+            try:
+                lines = self._read(os.path.join(path, name)).splitlines()
+            except (IOError, OSError):
+                continue
+            # Lines are: <major>:<minor> <op> <value> (and a last Total <value> line)
+            for line in lines:
+                fields = line.split()
+                if len(fields) != 3:
+                    continue
+                if fields[1] == 'Read':
+                    read_bytes += int(fields[2])
+                elif fields[1] == 'Write':
+                    write_bytes += int(fields[2])
+            break
+        return {
+            'io_service_bytes_recursive': [{'op': 'Read', 'value': read_bytes}, {'op': 'Write', 'value': write_bytes}]
+        }
+
+    def _blkio_v2(self, path):
+        read_bytes = write_bytes = 0
+        # Lines are: <major>:<minor> rbytes=<value> wbytes=<value> rios=<value> ...
+        for line in self._read(os.path.join(path, 'io.stat')).splitlines():
+            for field in line.split()[1:]:
+                k, v = field.split('=')
+                if k == 'rbytes':
+                    read_bytes += int(v)
+                elif k == 'wbytes':
+                    write_bytes += int(v)
+        return {
+            'io_service_bytes_recursive': [{'op': 'read', 'value': read_bytes}, {'op': 'write', 'value': write_bytes}]
+        }
+
+    def _networks(self, pid):
+        ret = {}
+        # The two first lines are the header
+        for line in self._read(os.path.join(self.procfs_path, str(pid), 'net', 'dev')).splitlines()[2:]:
+            interface, data = line.split(':', 1)
+            interface = interface.strip()
+            if interface == 'lo':
+                continue
+            data = data.split()
+            ret[interface] = {'rx_bytes': int(data[0]), 'tx_bytes': int(data[8])}
+        return ret
@@ -117,6 +117,11 @@ class GlancesEvents(object):
             # Event exist, update it
             self._update_event(event_index, event_state, event_type, event_value, proc_list, proc_desc, peak_time)
 
+        # The TOP 3 processes of the ongoing events are sorted by these keys
+        glances_processes.events_sort_keys = set(
+            self.get_event_sort_key(event[3]) for event in self.events_list if event[1] < 0
+        )
+
         return self.len()
 
     def _create_event(self, event_state, event_type, event_value, proc_list, proc_desc, peak_time):
@@ -190,8 +195,8 @@ class GlancesEvents(object):
             # TOP PROCESS LIST (only for CRITICAL ALERT)
             if event_state == "CRITICAL":
                 events_sort_key = self.get_event_sort_key(event_type)
-                # Sort the current process list to retrieve the TOP 3 processes
-                self.events_list[event_index][9] = sort_stats(proc_list, events_sort_key)[0:3]
+                # Select (partial sort) the TOP 3 processes in the current process list
+                self.events_list[event_index][9] = sort_stats(proc_list, events_sort_key, top=3)
                 self.events_list[event_index][11] = events_sort_key
 
             # MONITORED PROCESSES DESC
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Glances.
+#
+# Copyright (C) 2022 Nicolargo <nicolas@nicolargo.com>
+#
+# Glances is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Glances is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""On-disk spool of the stats which can not be exported (backend outage)."""
+
+import json
+import os
+from time import time
+
+from glances.globals import safe_makedirs
+from glances.logger import logger
+
+# Segment file names: <sequence number>.seg
+SEGMENT_SUFFIX = '.seg'
+# Replay position (sequence number and offset in the segment)
+CURSOR_FILE = 'cursor'
+
+
+class GlancesExportSpool(object):
+
+    """Write-ahead spool of export batches.
+
+    A batch (timestamp, plugin name, columns and points) is appended as a
+    JSON line to the current segment file. A new segment is started when
+    the current one reaches segment_size bytes. The oldest segments are
+    deleted when the spool is bigger than max_size bytes, or when they are
+    older than max_age seconds.
+
+    The batches are replayed oldest first and in bulk, with at most replay_rate
+    batches per second (so the replay does not overload the recovered backend).
+    The replay position is saved in the spool directory; after a crash,
+    the batches replayed since the last saved position are replayed again.
+    """
+
+    def __init__(self, path, max_size=100 * 1024 * 1024, max_age=86400, segment_size=1024 * 1024, replay_rate=100):
+        self.path = path
+        self.max_size = max_size
+        self.max_age = max_age
+        # At least 4 segments in the spool (only whole segments are dropped)
+        self.segment_size = max(1, min(segment_size, max_size // 4))
+        self.replay_rate = replay_rate
+        safe_makedirs(path)
+        # Sequence numbers of the segments (oldest first) and their sizes
+        self._segments = []
+        self._sizes = {}
+        for f in os.listdir(path):
+            if f.endswith(SEGMENT_SUFFIX):
+                try:
+                    seq = int(f[: -len(SEGMENT_SUFFIX)])
+                    self._sizes[seq] = os.path.getsize(self._segment(seq))
+                except (ValueError, OSError):
+                    continue
+                self._segments.append(seq)
+        self._segments.sort()
+        # Segment opened for writing
+        self._file = None
+        self._write_seq = None
+        # Replay position (segment and offset)
+        self._read_seq, self._read_offset = self._load_cursor()
+        # Replay rate limiter (token bucket)
+        self._allowance = 0
+        self._last_replay = None
+        # Statistics
+        self._stats = {'spooled': 0, 'replayed': 0, 'dropped': 0}
+        if self._segments:
+            logger.info("Export spool {}: {} bytes to replay".format(path, self.size()))
+
+    def _segment(self, seq):
+        return os.path.join(self.path, '{:016d}{}'.format(seq, SEGMENT_SUFFIX))
+
+    def _load_cursor(self):
+        try:
+            with open(os.path.join(self.path, CURSOR_FILE), 'r') as f:
+                seq, offset = [int(i) for i in f.read().split()]
+        except (IOError, OSError, ValueError):
+            return None, 0
+        return seq, offset
+
+    def _save_cursor(self):
+        try:
+            with open(os.path.join(self.path, CURSOR_FILE), 'w') as f:
+                f.write('{} {}\n'.format(self._read_seq, self._read_offset))
+        except (IOError, OSError) as e:
+            logger.debug("Can not save the export spool position ({})".format(e))
+
+    def size(self):
+        """Return the size of the spool (in bytes, including the replayed part of the oldest segment)."""
+        return sum(self._sizes.values())
+
+    def empty(self):
+        """Return True if there is nothing to replay."""
+        return not self._segments
+
+    def append(self, timestamp, name, columns, points):
+        """Append the batch to the spool."""
+        line = (json.dumps([timestamp, name, columns, points], default=str) + '\n').encode('utf-8')
+        if self._file is not None and self._sizes[self._write_seq] + len(line) > self.segment_size:
+            self._close_segment()
+        if self._file is None:
+            self._write_seq = self._segments[-1] + 1 if self._segments else 0
+            self._file = open(self._segment(self._write_seq), 'ab')
+            self._segments.append(self._write_seq)
+            self._sizes[self._write_seq] = 0
+        self._file.write(line)
+        self._file.flush()
+        self._sizes[self._write_seq] += len(line)
+        self._stats['spooled'] += 1
+        self._expire()
+
+    def _close_segment(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._write_seq = None
+
+    def _expire(self):
+        """Drop the oldest segments (size and age caps)."""
+        now = time()
+        while len(self._segments) > 1:
+            seq = self._segments[0]
+            if self.size() <= self.max_size:
+                try:
+                    if now - os.path.getmtime(self._segment(seq)) <= self.max_age:
+                        break
+                except OSError:
+                    pass
+            logger.warning("Export spool {} is full or too old, drop the oldest stats".format(self.path))
+            self._stats['dropped'] += 1
+            self._remove_segment(seq)
+
+    def _remove_segment(self, seq):
+        if seq == self._write_seq:
+            self._close_segment()
+        self._segments.remove(seq)
+        del self._sizes[seq]
+        try:
+            os.remove(self._segment(seq))
+        except OSError as e:
+            logger.debug("Can not remove the export spool segment {} ({})".format(seq, e))
+
+    def replay(self, fct, now=None):
+        """Replay the spooled batches (oldest first).
+
+        fct is called with a list of batches (timestamp, name, columns, points),
+        up to a whole segment. If they can not be exported, fct should raise an
+        exception, with the batches which are not exported left in the list
+        (they are replayed again the next time).
+        The replay stops if the replay rate is reached. Return the number of replayed batches.
+        """
+        if now is None:
+            now = time()
+        if self._last_replay is None:
+            self._allowance = self.replay_rate
+        else:
+            self._allowance = min(self.replay_rate, self._allowance + (now - self._last_replay) * self.replay_rate)
+        self._last_replay = now
+
+        ret = 0
+        try:
+            while self._segments and self._allowance >= 1:
+                seq = self._segments[0]
+                if seq == self._write_seq:
+                    # The segment to replay should not grow anymore
+                    self._close_segment()
+                if self._read_seq != seq:
+                    self._read_seq, self._read_offset = seq, 0
+                # Read the batches (and their end offset)
+                batches = []
+                offsets = []
+                try:
+                    with open(self._segment(seq), 'rb') as f:
+                        f.seek(self._read_offset)
+                        while len(batches) < int(self._allowance):
+                            line = f.readline()
+                            if not line:
+                                break
+                            try:
+                                batches.append(json.loads(line.decode('utf-8')))
+                                offsets.append(f.tell())
+                            except ValueError:
+                                # Truncated line (crash while writing)
+                                if offsets:
+                                    offsets[-1] = f.tell()
+                                else:
+                                    self._read_offset = f.tell()
+                        end = f.tell() >= os.fstat(f.fileno()).st_size
+                except (IOError, OSError) as e:
+                    logger.debug("Can not read the export spool segment {} ({})".format(seq, e))
+                    self._remove_segment(seq)
+                    continue
+                if batches:
+                    count = len(batches)
+                    try:
+                        fct(batches)
+                    except Exception:
+                        # The backend is still not available
+                        count -= len(batches)
+                        if count > 0:
+                            self._read_offset = offsets[count - 1]
+                        raise
+                    finally:
+                        self._allowance -= count
+                        self._stats['replayed'] += count
+                        ret += count
+                    self._read_offset = offsets[-1]
+                if not end:
+                    # Replay rate reached
+                    break
+                self._remove_segment(seq)
+        finally:
+            self._save_cursor()
+        return ret
+
+    def get_stats(self):
+        """Return the spool statistics (dict).
+
+        size: size of the spool (in bytes)
+        spooled, replayed: number of spooled and replayed batches
+        dropped: number of segments dropped by the size and age caps
+        """
+        ret = dict(self._stats)
+        ret['size'] = self.size()
+        return ret
+
+    def close(self):
+        self._close_segment()
+        if self._segments:
+            self._save_cursor()
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Glances.
+#
+# Copyright (C) 2022 Nicolargo <nicolas@nicolargo.com>
+#
+# Glances is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Glances is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Long-lived export workers fed by bounded queues of stats snapshots."""
+
+import threading
+from collections import deque
+from time import time
+
+from glances.logger import logger
+from glances.timer import Counter
+
+# Overflow policies (when the queue is full)
+# - drop-oldest: the oldest queued snapshot is dropped
+# - drop-newest: the new snapshot is dropped
+# - coalesce: all the queued snapshots are replaced by the new one
+OVERFLOW_POLICIES = ['drop-oldest', 'drop-newest', 'coalesce']
+
+
+class GlancesExportWorker(threading.Thread):
+
+    """Export the stats snapshots with an export module, in a dedicated thread.
+
+    The snapshots are queued (up to queue_size) by the put method, so a slow
+    or unavailable backend does not block Glances (and does not pile up threads).
+    """
+
+    def __init__(self, export, queue_size=3, policy='drop-oldest'):
+        """Init the class."""
+        super(GlancesExportWorker, self).__init__(name='glances-export-{}'.format(export.export_name))
+        self.daemon = True
+        self.export = export
+        self.queue_size = max(1, queue_size)
+        if policy not in OVERFLOW_POLICIES:
+            logger.error(
+                "Unknown queue policy {} for the {} export (use {})".format(
+                    policy, export.export_name, OVERFLOW_POLICIES[0]
+                )
+            )
+            policy = OVERFLOW_POLICIES[0]
+        self.policy = policy
+        # Event needed to stop properly the thread
+        self._stopper = threading.Event()
+        self._queue = deque()
+        self._condition = threading.Condition()
+        # Statistics
+        self._stats = {
+            'exported': 0,
+            'errors': 0,
+            'drops': 0,
+            'lag': None,
+            'latency': None,
+            'latency_max': None,
+        }
+
+    def put(self, snapshot):
+        """Queue the snapshot (apply the overflow policy if the queue is full).
+
+        Return False if the snapshot is dropped.
+        """
+        with self._condition:
+            if len(self._queue) >= self.queue_size:
+                if self.policy == 'drop-newest':
+                    self._stats['drops'] += 1
+                    return False
+                elif self.policy == 'coalesce':
+                    self._stats['drops'] += len(self._queue)
+                    self._queue.clear()
+                else:
+                    self._stats['drops'] += 1
+                    self._queue.popleft()
+            self._queue.append(snapshot)
+            self._condition.notify()
+        return True
+
+    def run(self):
+        """Export the queued snapshots.
+
+        Infinite loop, should be stopped by calling the stop() method.
+        """
+        while True:
+            with self._condition:
+                while not self._queue and not self.stopped():
+                    self._condition.wait()
+                if not self._queue:
+                    # Stopped
+                    break
+                snapshot = self._queue.popleft()
+            counter = Counter()
+            try:
+                self.export.update(snapshot)
+            except Exception as e:
+                logger.error(
+                    "Error while exporting the stats with the {} module ({})".format(self.export.export_name, e)
+                )
+                self._stats['errors'] += 1
+            else:
+                self._stats['exported'] += 1
+            latency = counter.get()
+            self._stats['latency'] = latency
+            self._stats['latency_max'] = max(latency, self._stats['latency_max'] or 0)
+            # Age of the exported stats
+            self._stats['lag'] = time() - snapshot.timestamp
+        # Export the stats waiting in the export module (batches)
+        if hasattr(self.export, 'flush'):
+            try:
+                self.export.flush()
+            except Exception as e:
+                logger.error("Error while flushing the stats of the {} module ({})".format(self.export.export_name, e))
+
+    def get_stats(self):
+        """Return the worker statistics (dict).
+
+        queue: number of snapshots waiting to be exported
+        exported, errors: number of exported snapshots (with or without error)
+        drops: number of snapshots dropped by the overflow policy
+        lag: age of the last exported snapshot at the end of its export (in seconds)
+        latency, latency_max: last and maximum export duration (in seconds)
+        spool_size, spooled, replayed: spool size (in bytes) and number of spooled/replayed batches (None without spool)
+        """
+        with self._condition:
+            ret = dict(self._stats)
+            ret['queue'] = len(self._queue)
+        spool = getattr(self.export, 'spool', None)
+        spool_stats = spool.get_stats() if spool is not None else {}
+        ret['spool_size'] = spool_stats.get('size')
+        ret['spooled'] = spool_stats.get('spooled')
+        ret['replayed'] = spool_stats.get('replayed')
+        ret['name'] = self.export.export_name
+        ret['policy'] = self.policy
+        return ret
+
+    def stop(self, timeout=None):
+        """Stop the thread (the queued snapshots are exported before, in the limit of timeout seconds)."""
+        with self._condition:
+            self._stopper.set()
+            self._condition.notify()
+        if self.is_alive():
+            self.join(timeout)
+            if self.is_alive():
+                logger.warning("The {} export did not end in {} seconds".format(self.export.export_name, timeout))
+
+    def stopped(self):
+        """Return True is the thread is stopped."""
+        return self._stopper.is_set()
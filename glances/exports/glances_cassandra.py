@@ -20,7 +20,7 @@
 """Cassandra/Scylla interface class."""
 
 import sys
-from datetime import datetime
+import uuid
 from numbers import Number
 
 from glances.logger import logger
@@ -29,6 +29,7 @@ from glances.compat import iteritems
 
 from cassandra.auth import PlainTextAuthProvider
 from cassandra.cluster import Cluster
+from cassandra.concurrent import execute_concurrent_with_args
 from cassandra.util import uuid_from_time
 from cassandra import InvalidRequest
 
@@ -62,6 +63,11 @@ class Export(GlancesExport):
 
         # Init the Cassandra client
         self.cluster, self.session = self.init()
+        # Prepared insert statement
+        self.insert = None
+        # The time UUID of the stats only depends on the host and the timestamp
+        # (a replayed insert overwrites the previous one)
+        self.node = uuid.getnode()
 
     def init(self):
         """Init the connection to the Cassandra server."""
@@ -115,19 +121,28 @@ class Export(GlancesExport):
 
     def export(self, name, columns, points):
         """Write the points to the Cassandra cluster."""
-        logger.debug("Export {} stats to Cassandra".format(name))
+        self.export_bulk([(self.timestamp, name, columns, points)])
 
-        # Remove non number stats and convert all to float (for Boolean)
-        data = {k: float(v) for (k, v) in dict(zip(columns, points)).iteritems() if isinstance(v, Number)}
+    def export_bulk(self, batches):
+        """Write the points of all the batches to the Cassandra cluster (concurrent inserts)."""
+        logger.debug("Export {} stats to Cassandra".format(len(batches)))
+
+        parameters = []
+        for timestamp, name, columns, points in batches:
+            # Remove non number stats and convert all to float (for Boolean)
+            data = {k: float(v) for (k, v) in iteritems(dict(zip(columns, points))) if isinstance(v, Number)}
+            parameters.append((name, uuid_from_time(timestamp, node=self.node, clock_seq=0), data))
 
         # Write input to the Cassandra table
         try:
-
-            stmt = "INSERT INTO {} (plugin, time, stat) VALUES (?, ?, ?)".format(self.table)
-            query = self.session.prepare(stmt)
-            self.session.execute(query, (name, uuid_from_time(datetime.now()), data))
+            if self.insert is None:
+                self.insert = self.session.prepare(
+                    "INSERT INTO {} (plugin, time, stat) VALUES (?, ?, ?)".format(self.table)
+                )
+            execute_concurrent_with_args(self.session, self.insert, parameters)
         except Exception as e:
-            logger.error("Cannot export {} stats to Cassandra ({})".format(name, e))
+            logger.error("Cannot export {} stats to Cassandra ({})".format(len(parameters), e))
+            raise
 
     def exit(self):
         """Close the Cassandra export module."""
@@ -87,18 +87,28 @@ class Export(GlancesExport):
 
     def export(self, name, columns, points):
         """Write the points to the CouchDB server."""
-        logger.debug("Export {} stats to CouchDB".format(name))
+        self.export_bulk([(self.timestamp, name, columns, points)])
 
-        # Create DB input
-        data = dict(zip(columns, points))
+    def export_bulk(self, batches):
+        """Write the points of all the batches to the CouchDB server (one bulk request)."""
+        logger.debug("Export {} stats to CouchDB".format(len(batches)))
 
-        # Set the type to the current stat name
-        data['type'] = name
-        data['time'] = couchdb.mapping.DateTimeField()._to_json(datetime.now())
+        # Create DB input
+        documents = []
+        for timestamp, name, columns, points in batches:
+            data = dict(zip(columns, points))
+            # Set the type to the current stat name
+            data['type'] = name
+            data['time'] = couchdb.mapping.DateTimeField()._to_json(datetime.fromtimestamp(timestamp))
+            documents.append(data)
 
         # Write data to the CouchDB database
         # Result can be seen at: http://127.0.0.1:5984/_utils
         try:
-            self.client[self.db].save(data)
+            result = self.client[self.db].update(documents)
         except Exception as e:
-            logger.error("Cannot export {} stats to CouchDB ({})".format(name, e))
+            logger.error("Cannot export {} stats to CouchDB ({})".format(len(documents), e))
+            raise
+        for success, _, error in result:
+            if not success:
+                logger.error("Cannot export stats to CouchDB ({})".format(error))
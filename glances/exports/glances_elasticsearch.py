@@ -65,28 +65,32 @@ class Export(GlancesExport):
 
     def export(self, name, columns, points):
         """Write the points to the ES server."""
-        logger.debug("Export {} stats to ElasticSearch".format(name))
-
-        # Generate index name with the index field + current day
-        index = '{}-{}'.format(self.index, datetime.utcnow().strftime("%Y.%m.%d"))
+        self.export_bulk([(self.timestamp, name, columns, points)])
 
+    def export_bulk(self, batches):
+        """Write the points of all the batches to the ES server (one bulk request)."""
         # Create DB input
         # https://elasticsearch-py.readthedocs.io/en/master/helpers.html
         actions = []
-        dt_now = datetime.utcnow().isoformat('T')
-        action = {
-            "_index": index,
-            "_id": '{}.{}'.format(name, dt_now),
-            "_type": 'glances-{}'.format(name),
-            "_source": {"plugin": name, "timestamp": dt_now},
-        }
-        action['_source'].update(zip(columns, [str(p) for p in points]))
-        actions.append(action)
-
-        logger.debug("Exporting the following object to elasticsearch: {}".format(action))
+        for timestamp, name, columns, points in batches:
+            # Generate index name with the index field + day of the stats
+            dt = datetime.utcfromtimestamp(timestamp)
+            index = '{}-{}'.format(self.index, dt.strftime("%Y.%m.%d"))
+            dt_now = dt.isoformat('T')
+            action = {
+                "_index": index,
+                "_id": '{}.{}'.format(name, dt_now),
+                "_type": 'glances-{}'.format(name),
+                "_source": {"plugin": name, "timestamp": dt_now},
+            }
+            action['_source'].update(zip(columns, [str(p) for p in points]))
+            actions.append(action)
+
+        logger.debug("Export {} stats to ElasticSearch".format(len(actions)))
 
         # Write input to the ES index
         try:
             helpers.bulk(self.client, actions)
         except Exception as e:
-            logger.error("Cannot export {} stats to ElasticSearch ({})".format(name, e))
+            logger.error("Cannot export {} stats to ElasticSearch ({})".format(len(actions), e))
+            raise
@@ -23,11 +23,20 @@ I am your father...
 ...for all Glances exports IF.
 """
 
-import json
+import os
+from time import time
 
-from glances.compat import NoOptionError, NoSectionError, iteritems, iterkeys
+from glances.compat import NoOptionError, NoSectionError
+from glances.config import user_cache_dir
+from glances.export_spool import GlancesExportSpool
 from glances.logger import logger
 
+# Maximum number of cached flattening plans (the stats keys change with
+# the containers, interfaces... so the cache is cleared when it is full)
+MAX_PLANS = 4096
+# Values exported as is
+SCALAR_TYPES = frozenset([int, float, str, type(None)])
+
 
 class GlancesExport(object):
 
@@ -75,9 +84,56 @@ class GlancesExport(object):
         # Build the export list on startup to avoid change during execution
         self.export_list = self._plugins_to_export()
 
+        # Time of the stats being exported (can be used by the export method)
+        self.timestamp = None
+
+        # Spool of the stats which can not be exported
+        self.spool = self._init_spool()
+
+        # Flattening plans of the stats (see the __build_export method)
+        self._plans = {}
+
+        # Stats waiting to be exported (list of batches: timestamp, name, columns, points)
+        # They are flushed when batch_size batches are waiting and/or, if batch_interval is set,
+        # at the end of each batch_interval seconds period (if none is set, at the end of each update)
+        self._batches = []
+        self.batch_size = 0
+        self.batch_interval = 0
+        if hasattr(self.config, 'has_section') and self.config.has_section(self.export_name):
+            self.batch_size = self.config.get_int_value(self.export_name, 'batch_size', default=0)
+            self.batch_interval = self.config.get_float_value(self.export_name, 'batch_interval', default=0)
+
+    def _init_spool(self):
+        """Init the spool if the spool key of the export section is true.
+
+        The export method should raise an exception if the stats can not be exported.
+        """
+        if not hasattr(self.config, 'has_section') or not self.config.has_section(self.export_name):
+            return None
+        if not self.config.get_bool_value(self.export_name, 'spool', default=False):
+            return None
+        path = self.config.get_value(
+            self.export_name, 'spool_path', default=os.path.join(user_cache_dir(), 'spool', self.export_name)
+        )
+        try:
+            return GlancesExportSpool(
+                path,
+                max_size=self.config.get_int_value(self.export_name, 'spool_max_size', default=100) * 1024 * 1024,
+                max_age=self.config.get_int_value(self.export_name, 'spool_max_age', default=86400),
+                replay_rate=self.config.get_int_value(self.export_name, 'spool_replay_rate', default=100),
+            )
+        except (IOError, OSError) as e:
+            logger.error("Can not init the {} export spool in {} ({})".format(self.export_name, path, e))
+            return None
+
     def exit(self):
-        """Close the export module."""
+        """Close the export module.
+
+        Note: the waiting stats should be flushed before (see the flush method).
+        """
         logger.debug("Finalise export interface %s" % self.export_name)
+        if self.spool is not None:
+            self.spool.close()
 
     def _plugins_to_export(self):
         """Return the list of plugins to export."""
@@ -168,60 +224,151 @@ class GlancesExport(object):
         # Get all the stats & limits
         all_stats = stats.getAllExportsAsDict(plugin_list=self.plugins_to_export())
         all_limits = stats.getAllLimitsAsDict(plugin_list=self.plugins_to_export())
+        timestamp = getattr(stats, 'timestamp', None) or time()
+
+        # Time-aligned flush: the batches of the previous period are exported
+        if (
+            self._batches
+            and self.batch_interval > 0
+            and timestamp // self.batch_interval != self._batches[0][0] // self.batch_interval
+        ):
+            self.flush()
 
         # Loop over plugins to export
         for plugin in self.plugins_to_export():
-            if isinstance(all_stats[plugin], dict):
-                all_stats[plugin].update(all_limits[plugin])
-            elif isinstance(all_stats[plugin], list):
-                # TypeError: string indices must be integers (Network plugin) #1054
-                for i in all_stats[plugin]:
-                    i.update(all_limits[plugin])
-            else:
+            if not isinstance(all_stats[plugin], (dict, list)):
                 continue
-            export_names, export_values = self.__build_export(all_stats[plugin])
-            self.export(plugin, export_names, export_values)
+            export_names, export_values = self.__build_export(all_stats[plugin], all_limits.get(plugin))
+            self._batches.append((timestamp, plugin, export_names, export_values))
+
+        if self.batch_size > 0:
+            if len(self._batches) >= self.batch_size:
+                self.flush()
+        elif self.batch_interval <= 0:
+            self.flush()
 
         return True
 
-    def __build_export(self, stats):
-        """Build the export lists."""
+    def flush(self):
+        """Export the waiting stats.
+
+        If the backend is not available, the stats are spooled (if the spool is enabled).
+        Else, the spooled stats are replayed.
+        """
+        batches = self._batches
+        self._batches = []
+        if not batches:
+            return True
+        try:
+            self.export_bulk(batches)
+        except Exception:
+            # The error is logged by the export method
+            # and the batches which are not exported are left in the list
+            if self.spool is not None:
+                for batch in batches:
+                    self.spool.append(*batch)
+            return False
+
+        # The backend is available, replay the spooled stats (if any)
+        if self.spool is not None and not self.spool.empty():
+            try:
+                self.spool.replay(self.export_bulk)
+            except Exception as e:
+                logger.debug("Can not replay the {} export spool ({})".format(self.export_name, e))
+
+        return True
+
+    def export_bulk(self, batches):
+        """Export the batches (list of timestamp, name, columns, points).
+
+        By default, the export method is called for each batch. It should be
+        overwritten by the export modules able to write all the batches at once.
+        If the batches can not be exported, an exception should be raised, with
+        the batches which are not exported left in the list.
+        """
+        while batches:
+            try:
+                self.export_batch(*batches[0])
+            except Exception as e:
+                if self.spool is not None:
+                    # The next batches are spooled (no need to wait for more timeouts)
+                    raise
+                logger.error(
+                    "Cannot export the {} stats with the {} module, they are lost ({})".format(
+                        batches[0][1], self.export_name, e
+                    )
+                )
+            del batches[0]
+
+    def export_batch(self, timestamp, name, columns, points):
+        """Export the stats grabbed at timestamp (see the export method)."""
+        self.timestamp = timestamp
+        self.export(name, columns, points)
+
+    def __build_export(self, stats, limits=None):
+        """Build the export lists.
+
+        The limits (dict) are exported with each stats dict (the stats are not modified).
+        """
         export_names = []
         export_values = []
-
-        if isinstance(stats, dict):
-            # Stats is a dict
-            # Is there a key ?
-            if 'key' in iterkeys(stats) and stats['key'] in iterkeys(stats):
-                pre_key = '{}.'.format(stats[stats['key']])
-            else:
-                pre_key = ''
-            # Walk through the dict
-            for key, value in iteritems(stats):
-                if isinstance(value, bool):
-                    value = json.dumps(value)
-                if isinstance(value, list):
-                    try:
-                        value = value[0]
-                    except IndexError:
-                        value = ''
-                if isinstance(value, dict):
-                    item_names, item_values = self.__build_export(value)
-                    item_names = [pre_key + key.lower() + str(i) for i in item_names]
-                    export_names += item_names
-                    export_values += item_values
-                else:
-                    export_names.append(pre_key + key.lower())
-                    export_values.append(value)
-        elif isinstance(stats, list):
+        limits_keys = tuple(limits) if limits else ()
+        if isinstance(stats, list):
             # Stats is a list (of dict)
-            # Recursive loop through the list
             for item in stats:
-                item_names, item_values = self.__build_export(item)
-                export_names += item_names
-                export_values += item_values
+                self.__flatten(item, limits, limits_keys, '', export_names, export_values)
+        else:
+            self.__flatten(stats, limits, limits_keys, '', export_names, export_values)
         return export_names, export_values
 
+    def __flatten(self, stats, limits, limits_keys, prefix, export_names, export_values):
+        """Add the names and values of the stats (and limits) to the export lists."""
+        if isinstance(stats, list):
+            # Recursive loop through the list
+            for item in stats:
+                self.__flatten(item, None, (), prefix, export_names, export_values)
+            return
+        if not isinstance(stats, dict):
+            return
+        # Is there a key ?
+        if 'key' in stats and stats['key'] in stats:
+            prefix = '{}{}.'.format(prefix, stats[stats['key']])
+        plan_key = (prefix, tuple(stats), limits_keys)
+        plan = self._plans.get(plan_key)
+        if plan is None:
+            plan = self.__plan(prefix, stats, limits)
+            if len(self._plans) >= MAX_PLANS:
+                self._plans = {}
+            self._plans[plan_key] = plan
+        # Walk through the plan
+        names_append = export_names.append
+        values_append = export_values.append
+        for name, key, in_limits in plan:
+            value = limits[key] if in_limits else stats[key]
+            if value.__class__ in SCALAR_TYPES:
+                names_append(name)
+                values_append(value)
+                continue
+            if isinstance(value, bool):
+                value = 'true' if value else 'false'
+            elif isinstance(value, list):
+                value = value[0] if value else ''
+            if isinstance(value, dict):
+                self.__flatten(value, None, (), name, export_names, export_values)
+            else:
+                names_append(name)
+                values_append(value)
+
+    def __plan(self, prefix, stats, limits):
+        """Return the flattening plan of the stats: list of (export name, key, True if the value is in limits).
+
+        The limits are exported after the stats (and overwrite the stats with the same key).
+        """
+        limits = limits or {}
+        plan = [(prefix + key.lower(), key, key in limits) for key in stats]
+        plan += [(prefix + key.lower(), key, True) for key in limits if key not in stats]
+        return plan
+
     def export(self, name, columns, points):
         # This method should be implemented by each exporter
         pass
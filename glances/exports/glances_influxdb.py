@@ -146,22 +146,33 @@ class Export(GlancesExport):
             # Add the hostname as a tag
             tags['hostname'] = self.hostname
             # Add the measurement to the list
-            ret.append({'measurement': name, 'tags': tags, 'fields': fields})
+            ret.append({'measurement': name, 'tags': tags, 'fields': fields, 'time': int(self.timestamp)})
         return ret
 
     def export(self, name, columns, points):
         """Write the points to the InfluxDB server."""
-        # Manage prefix
-        if self.prefix is not None:
-            name = self.prefix + '.' + name
+        self.export_bulk([(self.timestamp, name, columns, points)])
+
+    def export_bulk(self, batches):
+        """Write the points of all the batches to the InfluxDB server (one request)."""
+        measurements = []
+        for timestamp, name, columns, points in batches:
+            # Manage prefix
+            if self.prefix is not None:
+                name = self.prefix + '.' + name
+            if len(points) == 0:
+                logger.debug("Cannot export empty {} stats to InfluxDB".format(name))
+                continue
+            self.timestamp = timestamp
+            measurements += self._normalize(name, columns, points)
+        if not measurements:
+            return
         # Write input to the InfluxDB database
-        if len(points) == 0:
-            logger.debug("Cannot export empty {} stats to InfluxDB".format(name))
+        try:
+            self.client.write_points(measurements, time_precision="s")
+        except Exception as e:
+            # Log level set to debug instead of error (see: issue #1561)
+            logger.debug("Cannot export {} measurements to InfluxDB ({})".format(len(measurements), e))
+            raise
         else:
-            try:
-                self.client.write_points(self._normalize(name, columns, points), time_precision="s")
-            except Exception as e:
-                # Log level set to debug instead of error (see: issue #1561)
-                logger.debug("Cannot export {} stats to InfluxDB ({})".format(name, e))
-            else:
-                logger.debug("Export {} stats to InfluxDB".format(name))
+            logger.debug("Export {} measurements to InfluxDB".format(len(measurements)))
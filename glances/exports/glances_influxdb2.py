@@ -20,6 +20,7 @@
 """InfluxDB (from to InfluxDB 1.8+) interface class."""
 
 import sys
+from datetime import datetime
 from platform import node
 
 from glances.logger import logger
@@ -144,7 +145,14 @@ class Export(GlancesExport):
             # Add the hostname as a tag
             tags['hostname'] = self.hostname
             # Add the measurement to the list
-            ret.append({'measurement': name, 'tags': tags, 'fields': fields})
+            ret.append(
+                {
+                    'measurement': name,
+                    'tags': tags,
+                    'fields': fields,
+                    'time': datetime.utcfromtimestamp(int(self.timestamp)),
+                }
+            )
         return ret
 
     def export(self, name, columns, points):
@@ -161,5 +169,6 @@ class Export(GlancesExport):
             except Exception as e:
                 # Log level set to debug instead of error (see: issue #1561)
                 logger.debug("Cannot export {} stats to InfluxDB ({})".format(name, e))
+                raise
             else:
                 logger.debug("Export {} stats to InfluxDB".format(name))
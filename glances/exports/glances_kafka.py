@@ -95,9 +95,11 @@ class Export(GlancesExport):
                 # Kafka key name needs to be bytes #1593
                 key=name.encode('utf-8'),
                 value=data,
+                timestamp_ms=int(self.timestamp * 1000),
             )
         except Exception as e:
             logger.error("Cannot export {} stats to Kafka ({})".format(name, e))
+            raise
 
     def exit(self):
         """Close the Kafka export module."""
@@ -70,18 +70,27 @@ class Export(GlancesExport):
         return db
 
     def export(self, name, columns, points):
-        """Export the stats to the Statsd server."""
-        for i in range(len(columns)):
-            if not isinstance(points[i], Number):
-                continue
-            stat_name = '{}.{}.{}'.format(self.prefix, name, columns[i])
-            stat_value = points[i]
-            tags = self.parse_tags(self.tags)
-            try:
-                self.client.send(stat_name, stat_value, **tags)
-            except Exception as e:
-                logger.error("Can not export stats %s to OpenTSDB (%s)" % (name, e))
-        logger.debug("Export {} stats to OpenTSDB".format(name))
+        """Export the stats to the OpenTSDB server."""
+        self.export_bulk([(self.timestamp, name, columns, points)])
+
+    def export_bulk(self, batches):
+        """Export the stats of all the batches to the OpenTSDB server.
+
+        The points are queued to the client thread, which writes them
+        on a single connection (with the timestamp of the stats).
+        """
+        tags = self.parse_tags(self.tags)
+        for timestamp, name, columns, points in batches:
+            for i in range(len(columns)):
+                if not isinstance(points[i], Number):
+                    continue
+                stat_name = '{}.{}.{}'.format(self.prefix, name, columns[i])
+                stat_value = points[i]
+                try:
+                    self.client.send(stat_name, stat_value, timestamp=int(timestamp), **tags)
+                except Exception as e:
+                    logger.error("Can not export stats %s to OpenTSDB (%s)" % (name, e))
+        logger.debug("Export {} stats to OpenTSDB".format(len(batches)))
 
     def exit(self):
         """Close the OpenTSDB export module."""
@@ -20,24 +20,16 @@
 """Manage the folder list."""
 from __future__ import unicode_literals
 
-import os
-
 from glances.timer import Timer
 from glances.compat import range, nativestr
+from glances.folder_size import GlancesFolderSize
+from glances.folder_size import scandir as folder_size_scandir
 from glances.logger import logger
+from glances.workers import GlancesWorkerPool
 
-# Use the built-in version of scandir/walk if possible, otherwise
-# use the scandir module version
-scandir_tag = True
-try:
-    # For Python 3.5 or higher
-    from os import scandir
-except ImportError:
-    # For others...
-    try:
-        from scandir import scandir
-    except ImportError:
-        scandir_tag = False
+# The folders size is computed with the built-in version of scandir if possible,
+# otherwise with the scandir module version (see glances.folder_size)
+scandir_tag = folder_size_scandir is not None
 
 
 class FolderList(object):
@@ -71,6 +63,12 @@ class FolderList(object):
         self.timer_folders = []
         self.first_grab = True
 
+        # The folders size are computed in background
+        # (key: folder path, value: GlancesFolderSize and last GlancesJob)
+        self.folder_sizes = {}
+        self.jobs = {}
+        self.pool = GlancesWorkerPool(max_workers=2, name='glances-folders')
+
         if self.config is not None and self.config.has_section('folders'):
             if scandir_tag:
                 # Process monitoring list
@@ -114,6 +112,10 @@ class FolderList(object):
                     value[i + '_action'] = action
                     logger.debug("{} action for folder {} is {}".format(i, value["path"], value[i + '_action']))
 
+            # Size is unknown until the first scan
+            value['size'] = None
+            self.folder_sizes[value['path']] = GlancesFolderSize(value['path'])
+
             # Add the item to the list
             self.__folder_list.append(value)
 
@@ -142,44 +144,43 @@ class FolderList(object):
         else:
             return None
 
-    def __folder_size(self, path):
-        """Return the size of the directory given by path
-
-        path: <string>"""
-
-        ret = 0
-        for f in scandir(path):
-            if f.is_dir() and (f.name != '.' or f.name != '..'):
-                ret += self.__folder_size(os.path.join(path, f.name))
-            else:
-                try:
-                    ret += f.stat().st_size
-                except OSError:
-                    pass
-
-        return ret
+    def __folder_size(self, job):
+        """Return the size of the folder computed by the job (or an error code)."""
+        if job.exception is None:
+            return job.result
+        logger.debug('Cannot get folder size ({}). Error: {}'.format(job.args[0] if job.args else '', job.exception))
+        if getattr(job.exception, 'errno', None) == 13:
+            # Permission denied
+            return '!'
+        return '?'
 
     def update(self):
-        """Update the command result attributed."""
+        """Update the command result attributed.
+
+        The folders size are computed by background jobs (every refresh
+        seconds per folder): the last known size is returned.
+        """
         # Only continue if monitor list is not empty
         if len(self.__folder_list) == 0:
             return self.__folder_list
 
         # Iter upon the folder list
         for i in range(len(self.get())):
+            path = self.path(i)
+            job = self.jobs.get(path)
+            if job is not None:
+                if not job.done():
+                    # The last scan is still running
+                    continue
+                # Get folder size
+                self.__folder_list[i]['size'] = self.__folder_size(job)
+                self.jobs[path] = None
             # Update folder size
             if not self.first_grab and not self.timer_folders[i].finished():
                 continue
-            # Get folder size
-            try:
-                self.__folder_list[i]['size'] = self.__folder_size(self.path(i))
-            except OSError as e:
-                logger.debug('Cannot get folder size ({}). Error: {}'.format(self.path(i), e))
-                if e.errno == 13:
-                    # Permission denied
-                    self.__folder_list[i]['size'] = '!'
-                else:
-                    self.__folder_list[i]['size'] = '?'
+            if path not in self.folder_sizes:
+                self.folder_sizes[path] = GlancesFolderSize(path)
+            self.jobs[path] = self.pool.submit(self.__scan, path)
             # Reset the timer
             self.timer_folders[i].reset()
 
@@ -188,6 +189,16 @@ class FolderList(object):
 
         return self.__folder_list
 
+    def __scan(self, path):
+        """Return the size of the folder (called by a worker thread)."""
+        return self.folder_sizes[path].get()
+
+    def stop(self):
+        """Stop the background jobs."""
+        self.pool.stop(timeout=0)
+        for folder_size in self.folder_sizes.values():
+            folder_size.close()
+
     def get(self):
         """Return the monitored list (list of dict)."""
         return self.__folder_list
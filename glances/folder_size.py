@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Glances.
+#
+# Copyright (C) 2022 Nicolargo <nicolas@nicolargo.com>
+#
+# Glances is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Glances is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Incremental folder size computation (directory mtime cache and inotify deltas)."""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+
+from glances.globals import LINUX
+from glances.logger import logger
+
+# Use the built-in version of scandir if possible, otherwise
+# use the scandir module version
+try:
+    # For Python 3.5 or higher
+    from os import scandir
+except ImportError:
+    # For others...
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+# Inotify constants (see linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+# Events watched on each directory of the tree
+IN_WATCH_MASK = (
+    IN_MODIFY
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+    | IN_DONT_FOLLOW
+    | IN_EXCL_UNLINK
+)
+# struct inotify_event: wd, mask, cookie, len (followed by the name)
+INOTIFY_EVENT = struct.Struct('=iIII')
+
+
+class GlancesInotify(object):
+
+    """Minimal inotify binding (Linux only)."""
+
+    def __init__(self):
+        if not LINUX:
+            raise OSError(errno.ENOSYS, 'inotify is only available on Linux')
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            self._raise()
+
+    def _raise(self, path=None):
+        e = ctypes.get_errno()
+        raise OSError(e, os.strerror(e), path)
+
+    def add_watch(self, path, mask=IN_WATCH_MASK):
+        """Watch the path and return the watch descriptor."""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path) if hasattr(os, 'fsencode') else path, mask)
+        if wd < 0:
+            self._raise(path)
+        return wd
+
+    def rm_watch(self, wd):
+        """Stop watching the watch descriptor (already removed watches are ignored)."""
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self):
+        """Return the list of the pending events (wd, mask, name)."""
+        ret = []
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return ret
+                raise
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = data[offset : offset + length].rstrip(b'\0')
+                offset += length
+                ret.append((wd, mask, name.decode('utf-8', 'surrogateescape') if str is not bytes else name))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class GlancesFolderSize(object):
+
+    """Compute the size of a folder (sum of the size of its files).
+
+    The size of the files of each directory (subtotal) is cached:
+
+    - with inotify (Linux), the creation/deletion/modification events of
+      the files are applied to the subtotals, without any scan (the tree
+      is only walked the first time or if the events queue overflows);
+    - else, only the directories whose mtime changed are scanned again
+      (a file modification does not change the mtime of its directory, so
+      a full scan is done every full_scan scans).
+    """
+
+    def __init__(self, path, use_inotify=True, full_scan=10):
+        self.path = path
+        self.full_scan = full_scan
+        # Directories cache
+        # key: directory path
+        # value: [size of the files, set of subdirectories names, mtime, dict of files size (inotify only)]
+        self._dirs = {}
+        # Watch descriptors (key: wd, value: directory path) and reverse dict
+        self._wds = {}
+        self._watched = {}
+        self._scans = 0
+        # The tree should be walked (first scan, events lost...)
+        self._rescan = True
+        self.inotify = None
+        if use_inotify and LINUX:
+            try:
+                self.inotify = GlancesInotify()
+            except (OSError, AttributeError) as e:
+                logger.debug("Can not use inotify to watch the folder {} ({})".format(path, e))
+
+    def get(self):
+        """Update and return the size of the folder (raise OSError if it can not be read)."""
+        if self.inotify is not None and not self._rescan:
+            self._apply_events()
+        if self.inotify is None or self._rescan:
+            if self.inotify is not None:
+                # The walk gives the current state, drop the pending events
+                self.inotify.read_events()
+            self._scans += 1
+            self._walk(self.path, full=self._rescan or self._scans % self.full_scan == 0)
+            self._rescan = False
+        return sum(d[0] for d in self._dirs.values())
+
+    def _walk(self, path, full=False):
+        """Walk the tree from path and scan the new (or changed if not full, else all) directories."""
+        seen = set()
+        stack = [path]
+        while stack:
+            d = stack.pop()
+            try:
+                mtime = os.stat(d).st_mtime
+                cached = self._dirs.get(d)
+                if full or cached is None or cached[2] != mtime:
+                    subdirs = self._scan_dir(d, mtime)
+                else:
+                    subdirs = cached[1]
+            except OSError as e:
+                if d != self.path and e.errno == errno.ENOENT:
+                    # Removed in the meantime
+                    continue
+                raise
+            seen.add(d)
+            stack.extend(os.path.join(d, s) for s in subdirs)
+        # Forget the removed directories
+        prefix = os.path.join(path, '')
+        for d in [d for d in self._dirs if d not in seen and (d == path or d.startswith(prefix))]:
+            self._forget(d)
+
+    def _scan_dir(self, path, mtime):
+        """Scan the entries of the directory and return its subdirectories names."""
+        if self.inotify is not None and path not in self._watched:
+            # Watch before the scan (no event lost)
+            try:
+                wd = self.inotify.add_watch(path)
+                self._wds[wd] = path
+                self._watched[path] = wd
+            except OSError as e:
+                if e.errno != errno.ENOSPC:
+                    raise
+                logger.warning(
+                    "Inotify watches limit reached (see fs.inotify.max_user_watches), "
+                    "the folder {} will be scanned".format(self.path)
+                )
+                self._stop_inotify()
+        total = 0
+        subdirs = set()
+        files = {} if self.inotify is not None else None
+        for f in scandir(path):
+            if f.is_dir(follow_symlinks=False):
+                subdirs.add(f.name)
+                continue
+            try:
+                size = f.stat().st_size
+            except OSError:
+                continue
+            total += size
+            if files is not None:
+                files[f.name] = size
+        self._dirs[path] = [total, subdirs, mtime, files]
+        return subdirs
+
+    def _forget(self, path):
+        """Forget the directory (and its subdirectories)."""
+        prefix = os.path.join(path, '')
+        for d in [d for d in self._dirs if d == path or d.startswith(prefix)]:
+            del self._dirs[d]
+            wd = self._watched.pop(d, None)
+            if wd is not None:
+                del self._wds[wd]
+                self.inotify.rm_watch(wd)
+
+    def _apply_events(self):
+        """Apply the inotify events to the directories cache."""
+        updated = set()
+        for wd, mask, name in self.inotify.read_events():
+            if mask & IN_Q_OVERFLOW:
+                logger.debug("Inotify events lost for the folder {}, walk the tree".format(self.path))
+                self._rescan = True
+                return
+            d = self._wds.get(wd)
+            if d is None or d not in self._dirs:
+                continue
+            if mask & IN_IGNORED:
+                # Watch removed by the kernel (directory deleted)
+                del self._wds[wd]
+                del self._watched[d]
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                if d == self.path:
+                    # The folder itself is gone
+                    self._forget(self.path)
+                    self._rescan = True
+                    return
+                # Else managed with the event of the parent directory
+                continue
+            cached = self._dirs[d]
+            path = os.path.join(d, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    cached[1].add(name)
+                    self._walk(path, full=True)
+                    if self.inotify is None:
+                        # Watches limit reached
+                        self._rescan = True
+                        return
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    cached[1].discard(name)
+                    self._forget(path)
+            elif mask & (IN_CREATE | IN_MOVED_TO | IN_MODIFY):
+                if path in updated:
+                    continue
+                updated.add(path)
+                size = cached[3].pop(name, 0)
+                try:
+                    cached[3][name] = os.stat(path).st_size
+                except OSError:
+                    # Removed in the meantime
+                    pass
+                cached[0] += cached[3].get(name, 0) - size
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                updated.discard(path)
+                cached[0] -= cached[3].pop(name, 0)
+
+    def _stop_inotify(self):
+        """Stop watching the tree (the directories mtime are used)."""
+        if self.inotify is None:
+            return
+        self.inotify.close()
+        self.inotify = None
+        self._wds = {}
+        self._watched = {}
+        for cached in self._dirs.values():
+            cached[3] = None
+
+    def close(self):
+        self._stop_inotify()
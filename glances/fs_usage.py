@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Glances.
+#
+# Copyright (C) 2022 Nicolargo <nicolas@nicolargo.com>
+#
+# Glances is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Glances is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""File systems usage probes (with timeout) and mount table changes detection."""
+
+from time import time
+
+from glances.logger import logger
+from glances.workers import GlancesWorkerPool
+
+import psutil
+
+try:
+    import select
+
+    poll = select.poll
+except (ImportError, AttributeError):
+    # Not available on Windows
+    poll = None
+
+
+class GlancesMountTable(object):
+
+    """Detect the changes of the mount table.
+
+    On Linux, the kernel notifies the changes of /proc/self/mountinfo
+    with POLLPRI/POLLERR. On other systems, the mount table is always
+    considered as changed.
+    """
+
+    def __init__(self, path='/proc/self/mountinfo'):
+        self._file = None
+        self._poll = None
+        self._first = True
+        if poll is None:
+            return
+        try:
+            self._file = open(path, 'r')
+            self._poll = poll()
+            self._poll.register(self._file.fileno(), select.POLLPRI | select.POLLERR)
+        except (IOError, OSError) as e:
+            logger.debug("Can not watch the mount table {} ({})".format(path, e))
+            self.close()
+
+    def changed(self):
+        """Return True if the mount table changed since the last call (always True the first time)."""
+        if self._first or self._poll is None:
+            self._first = False
+            return True
+        return len(self._poll.poll(0)) > 0
+
+    def invalidate(self):
+        """Force the next changed call to return True."""
+        self._first = True
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._poll = None
+
+
+class GlancesFsUsage(object):
+
+    """Grab the file systems usage in a pool of worker threads.
+
+    A probe (psutil.disk_usage) which does not answer in timeout seconds
+    (example: stale NFS mount) does not block the caller: the last known
+    usage is returned (marked as stale) and the mount point is quarantined
+    (not probed again) with an exponential backoff, up to backoff_max seconds.
+    The quarantine ends when a probe answers in time.
+    Only one probe per mount point can run at a time, and the worker of a hung
+    probe is replaced (so the other mount points are still probed).
+    """
+
+    def __init__(self, timeout=1, max_workers=4, backoff_max=300):
+        self.timeout = timeout
+        self.backoff_max = backoff_max
+        self.pool = GlancesWorkerPool(max_workers=max_workers, name='glances-fs')
+        # Probes state
+        # key: mount point
+        # value: dict with job (last probe), hung (True if the probe timed out),
+        # usage (last known), failures and retry (time)
+        self.mounts = {}
+
+    def get(self, mountpoints):
+        """Return the usage of the given mount points.
+
+        Return a dict (key: mount point, value: (psutil usage, stale)).
+        Mount points without known usage (or with a probe error) are not returned.
+        """
+        now = time()
+        mounts = {}
+        jobs = []
+        for mountpoint in mountpoints:
+            mount = self.mounts.get(
+                mountpoint, {'job': None, 'hung': False, 'usage': None, 'failures': 0, 'retry': 0}
+            )
+            mounts[mountpoint] = mount
+            if mount['job'] is not None and not mount['job'].done():
+                # The last probe is still running (hung)
+                continue
+            if mount['job'] is not None:
+                self._collect(mount)
+            if mount['retry'] <= now:
+                mount['job'] = self.pool.submit(psutil.disk_usage, mountpoint)
+                jobs.append(mount['job'])
+        # Forget the unmounted file systems
+        self.mounts = mounts
+
+        # Wait for the probes (they run in parallel)
+        deadline = now + self.timeout
+        for job in jobs:
+            job.wait(max(0, deadline - time()))
+        # A probe which started late (waiting for a worker) gets its whole timeout.
+        # The hung probes are abandoned: their worker is replaced and the waiting
+        # probes can start (they are read during the next call if not finished)
+        hung = set()
+        for job in jobs:
+            if not job.done() and job.start_time is not None:
+                if not job.wait(max(0, job.start_time + self.timeout - time())):
+                    self.pool.abandon(job)
+                    hung.add(job)
+
+        ret = {}
+        for mountpoint, mount in mounts.items():
+            if mount['job'] is not None:
+                if mount['job'].done():
+                    self._collect(mount)
+                elif mount['job'] in hung:
+                    # Timeout: quarantine the mount point
+                    mount['hung'] = True
+                    mount['failures'] += 1
+                    mount['retry'] = time() + min(self.backoff_max, self.timeout * 2 ** mount['failures'])
+                    logger.warning(
+                        "File system {} does not answer (quarantined {} times)".format(mountpoint, mount['failures'])
+                    )
+            if mount['usage'] is not None:
+                ret[mountpoint] = (mount['usage'], mount['failures'] > 0)
+        return ret
+
+    def _collect(self, mount):
+        """Read the result of the finished probe of the mount point."""
+        job = mount['job']
+        mount['job'] = None
+        if mount['hung']:
+            # The probe answered after the timeout: still quarantined
+            mount['hung'] = False
+        else:
+            mount['failures'] = 0
+            mount['retry'] = 0
+        if job.exception is None:
+            mount['usage'] = job.result
+        else:
+            # Correct issue #346
+            # Disk is ejected during the command
+            mount['usage'] = None
+
+    def stop(self):
+        """Stop the worker threads (the hung ones are abandoned)."""
+        self.pool.stop(timeout=0)
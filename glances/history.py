@@ -42,13 +42,28 @@ class GlancesHistory(object):
 
     def reset(self):
         """Reset all the stats history"""
-        for a in self.stats_history:
-            self.stats_history[a].history_reset()
+        for a in list(self.stats_history.values()):
+            a.history_reset()
 
     def get(self, nb=0):
         """Get the history as a dict of list"""
-        return {i: self.stats_history[i].history_raw(nb=nb) for i in self.stats_history}
+        return {i: a.history_raw(nb=nb) for i, a in list(self.stats_history.items())}
 
     def get_json(self, nb=0):
         """Get the history as a dict of list (with list JSON compliant)"""
-        return {i: self.stats_history[i].history_json(nb=nb) for i in self.stats_history}
+        return {i: a.history_json(nb=nb) for i, a in list(self.stats_history.items())}
+
+    def get_item(self, item, nb=0):
+        """Get the history of the given item as a list (None if item did not exist)
+
+        Only the lasts nb points (all if nb=0) of the item are copied.
+        """
+        if item not in self.stats_history:
+            return None
+        return self.stats_history[item].history_raw(nb=nb)
+
+    def get_item_json(self, item, nb=0):
+        """Get the history of the given item as a list JSON compliant (None if item did not exist)"""
+        if item not in self.stats_history:
+            return None
+        return self.stats_history[item].history_json(nb=nb)
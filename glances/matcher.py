@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Glances.
+#
+# Copyright (C) 2022 Nicolargo <nicolas@nicolargo.com>
+#
+# Glances is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Glances is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Match values against a list of regular expressions (show/hide configuration keys)."""
+
+import re
+
+from glances.logger import logger
+
+
+class GlancesMatcher(object):
+
+    """Match values against a list of regular expressions.
+
+    The regular expressions are compiled once (merged in a single
+    alternation if possible) and the result is memoized per value.
+    A value matches if one of the regular expressions matches the
+    beginning of the value (same as re.match).
+    """
+
+    def __init__(self, patterns, cache_size=4096):
+        self.cache_size = cache_size
+        # Memoized results (key: value)
+        self._cache = {}
+        self._regexes = []
+        for pattern in patterns:
+            try:
+                self._regexes.append(re.compile(pattern))
+            except re.error as e:
+                logger.error("Invalid regular expression {} ({})".format(pattern, e))
+        self.patterns = [r.pattern for r in self._regexes]
+        if len(self._regexes) > 1 and all(r.groups == 0 for r in self._regexes):
+            # Merge the regular expressions (without group, so no backreference)
+            try:
+                self._regexes = [re.compile('|'.join('(?:{})'.format(p) for p in self.patterns))]
+            except re.error:
+                # Patterns can not be merged (example: global flags not at the start)
+                pass
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def match(self, value):
+        """Return True if the value matches one of the regular expressions."""
+        try:
+            return self._cache[value]
+        except KeyError:
+            pass
+        ret = any(r.match(value) is not None for r in self._regexes)
+        if len(self._cache) >= self.cache_size:
+            # Values can be volatile (example: containers veth interfaces)
+            self._cache.clear()
+        self._cache[value] = ret
+        return ret
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Glances.
+#
+# Copyright (C) 2022 Nicolargo <nicolas@nicolargo.com>
+#
+# Glances is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Glances is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Network interfaces collector reading /proc/net/dev and sysfs (Linux only)."""
+
+import os
+import random
+from collections import namedtuple
+from time import time
+
+from glances.logger import logger
+
+# Same fields than the psutil named tuples
+snetio = namedtuple(
+    'snetio', ['bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv', 'errin', 'errout', 'dropin', 'dropout']
+)
+snicstats = namedtuple('snicstats', ['isup', 'speed'])
+
+# Interface up flag (see linux/if.h)
+IFF_UP = 0x1
+
+
+class GlancesNetworkProcfsCollector(object):
+
+    """Grab the network interfaces counters and status.
+
+    The counters of all the interfaces are read in one pass from /proc/net/dev.
+    The status (up and speed) of an interface is read from sysfs when the
+    interface appears, then every status_refresh seconds (the refresh time
+    of the interfaces are spread to not read all of them in the same update).
+    The operational state of an up interface is also read again when its
+    counters do not change (an interface going down stops counting).
+    """
+
+    def __init__(self, procfs_path='/proc', sysfs_path='/sys/class/net', status_refresh=10):
+        self.procfs_path = procfs_path
+        self.sysfs_path = sysfs_path
+        self.status_refresh = status_refresh
+        # Interface status cache
+        # key: interface name
+        # value: (snicstats, next refresh time, counters)
+        self._status = {}
+
+    def net_io_counters(self):
+        """Return the counters of all the interfaces (dict, same as psutil.net_io_counters(pernic=True))."""
+        ret = {}
+        with open(os.path.join(self.procfs_path, 'net', 'dev'), 'r') as f:
+            # The two first lines are the header
+            lines = f.readlines()[2:]
+        for line in lines:
+            name, data = line.rsplit(':', 1)
+            data = data.split()
+            ret[name.strip()] = snetio(
+                bytes_sent=int(data[8]),
+                bytes_recv=int(data[0]),
+                packets_sent=int(data[9]),
+                packets_recv=int(data[1]),
+                errin=int(data[2]),
+                errout=int(data[10]),
+                dropin=int(data[3]),
+                dropout=int(data[11]),
+            )
+        return ret
+
+    def net_if_stats(self, names, counters=None):
+        """Return the status of the given interfaces (dict, same as psutil.net_if_stats()).
+
+        counters: the interfaces counters (dict, see net_io_counters), used to
+        read again the operational state of the up interfaces which stopped counting.
+        Interfaces without status (removed in the meantime) are not returned.
+        """
+        now = time()
+        ret = {}
+        status = {}
+        for name in names:
+            cached = self._status.get(name)
+            counter = counters.get(name) if counters is not None else None
+            try:
+                if cached is None or now >= cached[1]:
+                    cached = (self.get_status(name), now + self.status_refresh * random.uniform(0.5, 1.5), counter)
+                else:
+                    if cached[0].isup and counter is not None and counter == cached[2]:
+                        cached = (cached[0]._replace(isup=self.get_operstate(name)), cached[1], counter)
+                    else:
+                        cached = (cached[0], cached[1], counter)
+            except (IOError, OSError, ValueError) as e:
+                logger.debug('Can not get network interface {} status ({})'.format(name, e))
+                continue
+            status[name] = cached
+            ret[name] = cached[0]
+        # Forget the interfaces that are gone
+        self._status = status
+        return ret
+
+    def get_status(self, name):
+        """Return the status (snicstats) of the interface read from sysfs."""
+        path = os.path.join(self.sysfs_path, name)
+        with open(os.path.join(path, 'flags'), 'r') as f:
+            flags = int(f.read().strip(), 16)
+        try:
+            with open(os.path.join(path, 'speed'), 'r') as f:
+                # Speed in Mbps (-1 or error if unknown)
+                speed = max(0, int(f.read().strip()))
+        except (IOError, OSError, ValueError):
+            speed = 0
+        # Same as the IFF_RUNNING flag of the SIOCGIFFLAGS ioctl (used by psutil)
+        return snicstats(isup=bool(flags & IFF_UP) and self.get_operstate(name), speed=speed)
+
+    def get_operstate(self, name):
+        """Return True if the operational state of the interface (read from sysfs) is up."""
+        with open(os.path.join(self.sysfs_path, name, 'operstate'), 'r') as f:
+            return f.read().strip() in ('up', 'unknown')
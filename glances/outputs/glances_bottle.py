@@ -29,15 +29,30 @@ import zlib
 import socket
 
 from glances.compat import b
+from glances.snapshot import GlancesSerializedStats, GlancesStatsProducer
 from glances.timer import Timer
 from glances.logger import logger
 
 try:
-    from bottle import Bottle, static_file, abort, response, request, auth_basic, template, TEMPLATE_PATH
+    from bottle import (
+        Bottle,
+        static_file,
+        abort,
+        response,
+        request,
+        auth_basic,
+        template,
+        TEMPLATE_PATH,
+        http_date,
+        parse_date,
+    )
 except ImportError:
     logger.critical('Bottle module not found. Glances cannot start in web server mode.')
     sys.exit(2)
 
+from glances.outputs.glances_prometheus import CONTENT_TYPE as PROMETHEUS_CONTENT_TYPE, GlancesPrometheusRenderer
+from glances.outputs.glances_wsgi import GlancesWSGIServerAdapter
+
 
 def compress(func):
     """Compress result with deflate algorithm if the client ask for it."""
@@ -85,14 +100,32 @@ class GlancesBottle(object):
         self.args = args
 
         # Init stats
-        # Will be updated within Bottle route
+        # Will be updated within Bottle route (or in background, see load_config)
         self.stats = None
 
+        # The stats producer updates the stats and publishes them as read-only
+        # snapshots. Routes only read the last published snapshot.
+        self.producer = None
+        self.background_update = False
+
+        # Number of threads of the Web server (0 for the Bottle default single-threaded server)
+        # and timeouts (in seconds) of the idle keep-alive connections and of the requests
+        self.workers = 8
+        self.keepalive_timeout = 5
+        self.request_timeout = 30
+        # Maximum number of streams (served out of the threads pool)
+        # and of connections waiting for a thread (the next ones are rejected)
+        self.max_streams = 16
+        self.queue_size = 64
+
         # cached_time is the minimum time interval between stats updates
         # i.e. HTTP/RESTful calls will not retrieve updated info until the time
         # since last update is passed (will retrieve old cached info instead)
         self.timer = Timer(0)
 
+        # Render the /metrics route (prefix and labels of the prometheus section)
+        self.prometheus = GlancesPrometheusRenderer()
+
         # Load configuration file
         self.load_config(config)
 
@@ -122,12 +155,38 @@ class GlancesBottle(object):
             logger.debug('Read number of processes to display in the WebUI')
             n = config.get_value('outputs', 'max_processes_display', default=None)
             logger.debug('Number of processes to display in the WebUI: {}'.format(n))
+            # Update the stats in background (every cached_time seconds)
+            self.background_update = config.get_bool_value('outputs', 'webserver_background_update', default=False)
+            # Web server threads and timeouts
+            self.workers = config.get_int_value('outputs', 'webserver_workers', default=self.workers)
+            self.keepalive_timeout = config.get_float_value(
+                'outputs', 'webserver_keepalive_timeout', default=self.keepalive_timeout
+            )
+            self.request_timeout = config.get_float_value(
+                'outputs', 'webserver_request_timeout', default=self.request_timeout
+            )
+            self.max_streams = config.get_int_value('outputs', 'webserver_max_streams', default=self.max_streams)
+            self.queue_size = config.get_int_value('outputs', 'webserver_queue_size', default=self.queue_size)
+        if config is not None and config.has_section('prometheus'):
+            labels = config.get_value('prometheus', 'labels', default='src:glances')
+            self.prometheus = GlancesPrometheusRenderer(
+                prefix=config.get_value('prometheus', 'prefix', default='glances'),
+                labels=dict(x.split(':', 1) for x in labels.split(',') if ':' in x),
+            )
 
     def __update__(self):
+        """Update the stats if needed and return the last snapshot."""
+        # In background mode, the stats are updated by the producer thread
         # Never update more than 1 time per cached_time
-        if self.timer.finished():
-            self.stats.update()
+        if not self.background_update and self.timer.finished():
             self.timer = Timer(self.args.cached_time)
+            self.producer.update()
+        return self.producer.snapshot
+
+    @property
+    def snapshot(self):
+        """Return the last published stats snapshot."""
+        return self.producer.snapshot
 
     def app(self):
         return self._app()
@@ -155,6 +214,14 @@ class GlancesBottle(object):
         self._app.route('/api/%s/all' % self.API_VERSION, method="GET", callback=self._api_all)
         self._app.route('/api/%s/all/limits' % self.API_VERSION, method="GET", callback=self._api_all_limits)
         self._app.route('/api/%s/all/views' % self.API_VERSION, method="GET", callback=self._api_all_views)
+        self._app.route('/api/%s/all/delta' % self.API_VERSION, method="GET", callback=self._api_all_delta)
+        self._app.route(
+            '/api/%s/all/delta/<generation:int>' % self.API_VERSION, method="GET", callback=self._api_all_delta
+        )
+        self._app.route('/api/%s/stream' % self.API_VERSION, method="GET", callback=self._api_stream)
+        self._app.route(
+            '/api/%s/processlist/cache' % self.API_VERSION, method="GET", callback=self._api_processes_cache
+        )
         self._app.route('/api/%s/<plugin>' % self.API_VERSION, method="GET", callback=self._api)
         self._app.route('/api/%s/<plugin>/history' % self.API_VERSION, method="GET", callback=self._api_history)
         self._app.route(
@@ -170,6 +237,8 @@ class GlancesBottle(object):
             '/api/%s/<plugin>/<item>/history/<nb:int>' % self.API_VERSION, method="GET", callback=self._api_item_history
         )
         self._app.route('/api/%s/<plugin>/<item>/<value>' % self.API_VERSION, method="GET", callback=self._api_value)
+        # Prometheus metrics
+        self._app.route('/metrics', method="GET", callback=self._metrics)
         bindmsg = 'Glances RESTful API Server started on {}api/{}/'.format(self.bind_url, self.API_VERSION)
         logger.info(bindmsg)
 
@@ -193,6 +262,12 @@ class GlancesBottle(object):
         # Init plugin list
         self.plugins_list = self.stats.getPluginsList()
 
+        # Init the stats producer (the stats are already updated by the Web server)
+        self.producer = GlancesStatsProducer(self.stats, refresh=self.args.cached_time)
+        self.producer.publish()
+        if self.background_update:
+            self.producer.start()
+
         # Bind the Bottle TCP address/port
         if self.args.open_web_browser:
             # Implementation of the issue #946
@@ -201,14 +276,28 @@ class GlancesBottle(object):
             # 2) Glances standalone mode is running on Windows OS
             webbrowser.open(self.bind_url, new=2, autoraise=1)
 
+        if self.workers > 0:
+            server = GlancesWSGIServerAdapter(
+                host=self.args.bind_address,
+                port=self.args.port,
+                workers=self.workers,
+                keepalive_timeout=self.keepalive_timeout,
+                request_timeout=self.request_timeout,
+                max_streams=self.max_streams,
+                queue_size=self.queue_size,
+            )
+        else:
+            server = 'wsgiref'
+
         try:
-            self._app.run(host=self.args.bind_address, port=self.args.port, quiet=not self.args.debug)
+            self._app.run(server=server, host=self.args.bind_address, port=self.args.port, quiet=not self.args.debug)
         except socket.error as e:
             logger.critical('Error: Can not ran Glances Web server ({})'.format(e))
 
     def end(self):
         """End the bottle."""
-        pass
+        if self.producer is not None:
+            self.producer.stop(timeout=1)
 
     def _index(self, refresh_time=None):
         """Bottle callback for index.html (/) file."""
@@ -294,7 +383,50 @@ class GlancesBottle(object):
             abort(404, "Cannot get plugin list (%s)" % str(e))
         return plist
 
-    @compress
+    def _serialized_response(self, serialized):
+        """Return the body of the given GlancesSerializedStats.
+
+        The body is compressed if the client ask for it and an empty
+        HTTP/304 is returned if the client already has it (ETag or
+        Last-Modified validators).
+        """
+        if 'deflate' in request.headers.get('Accept-Encoding', ''):
+            encoding = 'deflate'
+            # ETag should be different for each encoding
+            etag = serialized.etag[:-1] + '-deflate"'
+        else:
+            encoding = 'identity'
+            etag = serialized.etag
+        response.set_header('ETag', etag)
+        if serialized.last_modified is not None:
+            response.set_header('Last-Modified', http_date(serialized.last_modified))
+        response.set_header('Cache-Control', 'no-cache')
+        response.set_header('Vary', 'Accept-Encoding')
+
+        # If-None-Match has precedence over If-Modified-Since
+        if_none_match = request.get_header('If-None-Match')
+        if_modified_since = request.get_header('If-Modified-Since')
+        if if_none_match is not None:
+            not_modified = if_none_match.strip() == '*' or etag in [e.strip() for e in if_none_match.split(',')]
+        elif if_modified_since is not None:
+            # Each version of the stats has its own second (see GlancesLastModified)
+            if_modified_since = parse_date(if_modified_since.split(';')[0].strip())
+            not_modified = (
+                if_modified_since is not None
+                and serialized.last_modified is not None
+                and if_modified_since >= int(serialized.last_modified)
+            )
+        else:
+            not_modified = False
+        if not_modified:
+            response.status = 304
+            return b''
+
+        response.set_header('Content-Encoding', encoding)
+        if encoding == 'deflate':
+            return serialized.deflate()
+        return serialized.body
+
     def _api_all(self):
         """Glances API RESTful implementation.
 
@@ -309,20 +441,20 @@ class GlancesBottle(object):
             fname = os.path.join(tempfile.gettempdir(), 'glances-debug.json')
             try:
                 with open(fname) as f:
-                    return f.read()
-            except IOError:
+                    return self._serialized_response(GlancesSerializedStats(f.read(), os.path.getmtime(fname)))
+            except (IOError, OSError):
                 logger.debug("Debug file (%s) not found" % fname)
 
         # Update the stat
-        self.__update__()
+        stats = self.__update__()
 
         try:
-            # Get the JSON value of the stat ID
-            statval = json.dumps(self.stats.getAllAsDict())
+            # Get the JSON value of the stat ID (serialized one time per snapshot)
+            statval = stats.get_serialized('all', lambda: json.dumps(stats.getAllAsDict()))
         except Exception as e:
             abort(404, "Cannot get stats (%s)" % str(e))
 
-        return statval
+        return self._serialized_response(statval)
 
     @compress
     def _api_all_limits(self):
@@ -337,12 +469,115 @@ class GlancesBottle(object):
 
         try:
             # Get the JSON value of the stat limits
-            limits = json.dumps(self.stats.getAllLimitsAsDict())
+            limits = json.dumps(self.snapshot.getAllLimitsAsDict())
         except Exception as e:
             abort(404, "Cannot get limits (%s)" % (str(e)))
         return limits
 
-    @compress
+    def _api_all_delta(self, generation=0):
+        """Glances API RESTful implementation.
+
+        Return the JSON representation of the stats changes since the given
+        generation (all the stats if the generation is 0 or not available, or if
+        the optional epoch query parameter is not the current epoch):
+        {'epoch': <server epoch>, 'generation': <current generation>, 'since': <generation>,
+         'full': <bool>, 'plugins': {<plugin>: <delta>}}
+        See the stats_delta function (glances/snapshot.py) for the delta format.
+        HTTP/200 if OK
+        HTTP/404 if others error
+        """
+        response.content_type = 'application/json; charset=utf-8'
+
+        # Update the stat
+        self.__update__()
+
+        try:
+            statval = self.producer.get_delta(generation, epoch=request.query.get('epoch') or None)
+        except Exception as e:
+            abort(404, "Cannot get stats delta (%s)" % str(e))
+
+        return self._serialized_response(statval)
+
+    def _api_stream(self):
+        """Glances API RESTful implementation.
+
+        Stream the stats (Server-Sent Events) as soon as they are updated.
+        Each event (named stats) has the epoch and generation as id (<epoch>-<generation>)
+        and the stats delta since the previous event as data (same format than /all/delta).
+        The first event contains all the stats (or the delta since the
+        Last-Event-ID request header if the client reconnects).
+        The optional plugins query parameter filters the plugins
+        (example: /api/3/stream?plugins=cpu,mem)
+        HTTP/200 if OK
+        HTTP/400 if a plugin is not found
+        HTTP/503 if the Web server is single-threaded (webserver_workers=0)
+        """
+        if self.workers <= 0:
+            # A stream would hold the single thread of the Web server forever
+            abort(503, "Stream not available with the single-threaded Web server (webserver_workers=0)")
+
+        plugins = request.query.get('plugins')
+        if plugins:
+            plugins = plugins.split(',')
+            for plugin in plugins:
+                if plugin not in self.plugins_list:
+                    abort(400, "Unknown plugin %s (available plugins: %s)" % (plugin, self.plugins_list))
+        else:
+            plugins = None
+
+        # Last-Event-ID: <epoch>-<generation> (all the stats are sent if the server restarted)
+        epoch, _, generation = request.get_header('Last-Event-ID', '').rpartition('-')
+        try:
+            generation = int(generation) if epoch == self.producer.epoch else 0
+        except ValueError:
+            generation = 0
+
+        response.content_type = 'text/event-stream'
+        response.set_header('Cache-Control', 'no-cache')
+        # Disable the buffering of the reverse proxies (Nginx)
+        response.set_header('X-Accel-Buffering', 'no')
+
+        return self._stream(generation, plugins)
+
+    def _stream(self, generation, plugins):
+        """Generator of the Server-Sent Events (see _api_stream)."""
+        while not self.producer.stopped():
+            snapshot = self.__update__()
+            if snapshot.generation > generation:
+                # The delta is serialized once per snapshot for all the clients
+                delta = self.producer.get_delta(generation, plugins=plugins, snapshot=snapshot)
+                generation = snapshot.generation
+                yield b('id: {}-{}\nevent: stats\ndata: '.format(snapshot.epoch, generation)) + delta.body + b('\n\n')
+            else:
+                self.producer.wait_snapshot(generation, timeout=self.args.cached_time)
+
+    def _metrics(self):
+        """Prometheus metrics of the last stats snapshot (text exposition format).
+
+        The metrics are rendered one time per snapshot. If the last stats update
+        took more than half of the scrape timeout (X-Prometheus-Scrape-Timeout-Seconds
+        request header), the stats are not updated (the last snapshot is returned).
+        HTTP/200 if OK
+        HTTP/404 if others error
+        """
+        response.content_type = PROMETHEUS_CONTENT_TYPE
+
+        try:
+            timeout = float(request.get_header('X-Prometheus-Scrape-Timeout-Seconds', 0))
+        except ValueError:
+            timeout = 0
+        if timeout > 0 and (self.producer.duration or 0) > timeout / 2:
+            stats = self.snapshot
+        else:
+            stats = self.__update__()
+
+        try:
+            statval = stats.get_serialized('metrics', lambda: self.prometheus.render(stats))
+        except Exception as e:
+            abort(404, "Cannot get metrics (%s)" % str(e))
+
+        return self._serialized_response(statval)
+
     def _api_all_views(self):
         """Glances API RESTful implementation.
 
@@ -353,20 +588,24 @@ class GlancesBottle(object):
         """
         response.content_type = 'application/json; charset=utf-8'
 
+        stats = self.snapshot
+
         try:
-            # Get the JSON value of the stat view
-            limits = json.dumps(self.stats.getAllViewsAsDict())
+            # Get the JSON value of the stat view (serialized one time per snapshot)
+            views = stats.get_serialized('all/views', lambda: json.dumps(stats.getAllViewsAsDict()))
         except Exception as e:
             abort(404, "Cannot get views (%s)" % (str(e)))
-        return limits
+        return self._serialized_response(views)
 
-    @compress
     def _api(self, plugin):
         """Glances API RESTful implementation.
 
         Return the JSON representation of a given plugin
+        The optional limit query parameter returns only the limit first items
+        of the list plugins (example: /api/3/processlist?limit=10 for the top
+        10 processes), it is ignored for the other plugins
         HTTP/200 if OK
-        HTTP/400 if plugin is not found
+        HTTP/400 if plugin is not found or if the limit is not a positive integer
         HTTP/404 if others error
         """
         response.content_type = 'application/json; charset=utf-8'
@@ -374,15 +613,51 @@ class GlancesBottle(object):
         if plugin not in self.plugins_list:
             abort(400, "Unknown plugin %s (available plugins: %s)" % (plugin, self.plugins_list))
 
+        limit = request.query.get('limit')
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                abort(400, "Limit should be an integer (%s)" % limit)
+            if limit < 0:
+                abort(400, "Limit should be a positive integer (%s)" % limit)
+
         # Update the stat
-        self.__update__()
+        stats = self.__update__()
+        if limit is not None and not isinstance(stats.get_plugin(plugin).get_raw(), list):
+            # Only the list plugins can be limited
+            limit = None
 
         try:
-            # Get the JSON value of the stat ID
-            statval = self.stats.get_plugin(plugin).get_stats()
+            # Get the JSON value of the stat ID (serialized one time per snapshot)
+            if limit is None:
+                statval = stats.get_serialized(plugin, stats.get_plugin(plugin).get_stats)
+            else:
+                statval = stats.get_serialized(
+                    (plugin, limit), lambda: json.dumps(stats.get_plugin(plugin).get_raw()[:limit])
+                )
         except Exception as e:
             abort(404, "Cannot get plugin %s (%s)" % (plugin, str(e)))
 
+        return self._serialized_response(statval)
+
+    @compress
+    def _api_processes_cache(self):
+        """Glances API RESTful implementation.
+
+        Return the JSON representation of the processes caches statistics
+        (size, hits, misses and evictions of each cache)
+        HTTP/200 if OK
+        HTTP/404 if others error
+        """
+        response.content_type = 'application/json; charset=utf-8'
+
+        try:
+            from glances.processes import glances_processes
+
+            statval = json.dumps(glances_processes.get_cache_stats())
+        except Exception as e:
+            abort(404, "Cannot get processes cache stats (%s)" % str(e))
         return statval
 
     @compress
@@ -401,11 +676,11 @@ class GlancesBottle(object):
             abort(400, "Unknown plugin %s (available plugins: %s)" % (plugin, self.plugins_list))
 
         # Update the stat
-        self.__update__()
+        stats = self.__update__()
 
         try:
             # Get the JSON value of the stat ID
-            statval = self.stats.get_plugin(plugin).get_stats_history(nb=int(nb))
+            statval = stats.get_plugin(plugin).get_stats_history(nb=int(nb))
         except Exception as e:
             abort(404, "Cannot get plugin history %s (%s)" % (plugin, str(e)))
         return statval
@@ -429,7 +704,7 @@ class GlancesBottle(object):
 
         try:
             # Get the JSON value of the stat limits
-            ret = self.stats.get_plugin(plugin).limits
+            ret = self.snapshot.get_plugin(plugin).limits
         except Exception as e:
             abort(404, "Cannot get limits for plugin %s (%s)" % (plugin, str(e)))
         return ret
@@ -453,7 +728,7 @@ class GlancesBottle(object):
 
         try:
             # Get the JSON value of the stat views
-            ret = self.stats.get_plugin(plugin).get_views()
+            ret = self.snapshot.get_plugin(plugin).get_views()
         except Exception as e:
             abort(404, "Cannot get views for plugin %s (%s)" % (plugin, str(e)))
         return ret
@@ -468,13 +743,13 @@ class GlancesBottle(object):
             abort(400, "Unknown plugin %s (available plugins: %s)" % (plugin, self.plugins_list))
 
         # Update the stat
-        self.__update__()
+        stats = self.__update__()
 
         if value is None:
             if history:
-                ret = self.stats.get_plugin(plugin).get_stats_history(item, nb=int(nb))
+                ret = stats.get_plugin(plugin).get_stats_history(item, nb=int(nb))
             else:
-                ret = self.stats.get_plugin(plugin).get_stats_item(item)
+                ret = stats.get_plugin(plugin).get_stats_item(item)
 
             if ret is None:
                 abort(404, "Cannot get item %s%s in plugin %s" % (item, 'history ' if history else '', plugin))
@@ -483,7 +758,7 @@ class GlancesBottle(object):
                 # Not available
                 ret = None
             else:
-                ret = self.stats.get_plugin(plugin).get_stats_value(item, value)
+                ret = stats.get_plugin(plugin).get_stats_value(item, value)
 
             if ret is None:
                 abort(
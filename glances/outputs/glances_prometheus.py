@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Glances.
+#
+# Copyright (C) 2022 Nicolargo <nicolas@nicolargo.com>
+#
+# Glances is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Glances is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Prometheus text exposition format of the stats snapshots."""
+
+import re
+from collections import OrderedDict
+from numbers import Number
+
+from glances.compat import iteritems, nativestr
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Plugins exposed as metrics
+PLUGINS = [
+    'cpu',
+    'percpu',
+    'load',
+    'mem',
+    'memswap',
+    'network',
+    'diskio',
+    'fs',
+    'processcount',
+    'system',
+    'uptime',
+    'sensors',
+    'docker',
+    'gpu',
+]
+
+# Label of the rows of the list plugins (default is the name of the key)
+PLUGINS_LABEL = {
+    'percpu': 'core',
+    'network': 'interface',
+    'diskio': 'disk',
+    'fs': 'mountpoint',
+    'docker': 'container',
+    'sensors': 'sensor',
+    'gpu': 'gpu',
+}
+
+# Additional labels (stats used as label, not as metric)
+PLUGINS_EXTRA_LABELS = {
+    'sensors': ['type'],
+}
+
+# Plugins exposed as an info metric (the stats are the labels, the value is 1)
+INFO_PLUGINS = ['system']
+
+INVALID_NAME_CHARS = re.compile('[^a-zA-Z0-9_:]')
+
+
+def metric_name(*names):
+    """Return a valid Prometheus metric (or label) name."""
+    ret = INVALID_NAME_CHARS.sub('_', '_'.join(str(n) for n in names)).lower()
+    if ret[:1].isdigit():
+        ret = '_' + ret
+    return ret
+
+
+def label_value(value):
+    """Return the escaped label value."""
+    if isinstance(value, (Number, bool)) or value is None:
+        value = str(value)
+    return nativestr(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def sample_value(value):
+    """Return the sample value (float representation)."""
+    value = float(value)
+    if value != value:
+        return 'NaN'
+    if value in (float('inf'), float('-inf')):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value)
+
+
+class GlancesPrometheusRenderer(object):
+
+    """Render the stats snapshot in the Prometheus text exposition format.
+
+    Metrics are named <prefix>_<plugin>_<stat> (all are gauges, except the
+    cumulative_* stats which are counters). The rows of the list plugins are
+    identified by a label (interface, disk, container, core...) and the given
+    labels (dict) are added to all the metrics.
+    """
+
+    def __init__(self, prefix='glances', labels=None):
+        self.prefix = prefix
+        self.labels = ''.join(
+            ',{}="{}"'.format(metric_name(k), label_value(v)) for k, v in sorted(iteritems(labels or {}))
+        )
+
+    def render(self, snapshot):
+        """Return the metrics of the snapshot (string)."""
+        # Samples by metric name (the samples of a metric should be grouped)
+        families = OrderedDict()
+        for plugin in PLUGINS:
+            if plugin not in snapshot.getPluginsList():
+                continue
+            stats = snapshot.get_plugin(plugin).get_export()
+            if plugin in INFO_PLUGINS:
+                if stats:
+                    self._add_info(families, plugin, stats)
+            elif isinstance(stats, dict):
+                self._add(families, metric_name(self.prefix, plugin), stats, '')
+            elif isinstance(stats, list):
+                for row in stats:
+                    if not isinstance(row, dict):
+                        continue
+                    key = row.get('key')
+                    labels = ''
+                    if key in row:
+                        labels = ',{}="{}"'.format(PLUGINS_LABEL.get(plugin, metric_name(key)), label_value(row[key]))
+                    for k in PLUGINS_EXTRA_LABELS.get(plugin, []):
+                        if k in row:
+                            labels += ',{}="{}"'.format(metric_name(k), label_value(row[k]))
+                    self._add(families, metric_name(self.prefix, plugin), row, labels, exclude=key)
+
+        lines = []
+        for name, (metric_type, samples) in iteritems(families):
+            lines.append('# TYPE {} {}'.format(name, metric_type))
+            lines.extend(samples)
+        lines.append('')
+        return '\n'.join(lines)
+
+    def _add(self, families, name, stats, labels, exclude=None):
+        """Add the numerical stats (dict) to the metrics."""
+        for key, value in iteritems(stats):
+            if key == 'key' or key == exclude:
+                continue
+            if isinstance(value, dict):
+                self._add(families, metric_name(name, key), value, labels)
+                continue
+            if isinstance(value, bool):
+                value = int(value)
+            elif not isinstance(value, Number):
+                continue
+            family = metric_name(name, key)
+            if family not in families:
+                families[family] = ('counter' if key.startswith('cumulative_') else 'gauge', [])
+            families[family][1].append(self._sample(family, labels, sample_value(value)))
+
+    def _add_info(self, families, plugin, stats):
+        """Add the stats (dict of strings) as the labels of the <prefix>_<plugin>_info metric."""
+        labels = ''.join(
+            ',{}="{}"'.format(metric_name(k), label_value(v))
+            for k, v in sorted(iteritems(stats))
+            if v is not None and not isinstance(v, (dict, list))
+        )
+        family = metric_name(self.prefix, plugin, 'info')
+        families[family] = ('gauge', [self._sample(family, labels, '1')])
+
+    def _sample(self, family, labels, value):
+        """Return the sample line (labels is a string of ,name="value" items)."""
+        labels += self.labels
+        if labels:
+            return '{}{{{}}} {}'.format(family, labels[1:], value)
+        return '{} {}'.format(family, value)
@@ -153,6 +153,27 @@ def print_all():
     print('    # curl {}/all'.format(API_URL))
     print('    Return a very big dictionnary (avoid using this request, performances will be poor)...')
     print('')
+    print('Get the stats changes since a given generation (all the stats if the generation is 0 or too old)::')
+    print('')
+    print('    # curl {}/all/delta/<generation>?epoch=<epoch>'.format(API_URL))
+    print(
+        "    {'epoch': <epoch>, 'generation': <current generation>, 'since': <generation>, 'full': <bool>, "
+        "'plugins': {...}}"
+    )
+    print('')
+    print('The generations restart when the server restarts: give the epoch of the last')
+    print('response, all the stats are returned if it is not the current one.')
+    print('')
+    print('Only the changed plugins are returned. For the list of dict stats (processlist, network...),')
+    print('only the added, modified and removed (key only) rows are returned.')
+    print('')
+    print('Stream the stats changes (Server-Sent Events), optionally only for some plugins::')
+    print('')
+    print('    # curl -N {}/stream?plugins=cpu,mem'.format(API_URL))
+    print('    id: <epoch>-2')
+    print('    event: stats')
+    print('    data: {"epoch": "<epoch>", "generation": 2, "since": 0, "full": true, "plugins": {...}}')
+    print('')
 
 
 def print_history(stats):
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Glances.
+#
+# Copyright (C) 2022 Nicolargo <nicolas@nicolargo.com>
+#
+# Glances is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Glances is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Multi-threaded WSGI server (standard library only) for the Web server mode."""
+
+import socket
+import threading
+from wsgiref.headers import Headers
+from wsgiref.simple_server import ServerHandler, WSGIRequestHandler, WSGIServer
+
+from bottle import ServerAdapter
+
+from glances.logger import logger
+from glances.workers import GlancesJob, GlancesWorkerPool
+
+# Response sent (by the accept loop) to the connections which can not be queued
+BUSY_RESPONSE = (
+    b'HTTP/1.1 503 Service Unavailable\r\n'
+    b'Content-Type: text/plain\r\n'
+    b'Content-Length: 12\r\n'
+    b'Retry-After: 1\r\n'
+    b'Connection: close\r\n\r\n'
+    b'Server busy\n'
+)
+
+
+def has_body(status):
+    """Return True if a response with the given status (string) has a body (RFC 7230)."""
+    code = status[:3]
+    return not (code.startswith('1') or code in ('204', '304'))
+
+
+class GlancesWSGIHandler(ServerHandler):
+
+    """WSGI handler with HTTP/1.1 persistent connections support."""
+
+    http_version = '1.1'
+
+    def finish_response(self):
+        """Send the response (a stream is served out of the pool of threads)."""
+        if (
+            'Content-Length' not in self.headers
+            and has_body(self.status)
+            and not isinstance(self.result, (list, tuple))
+        ):
+            if not self.request_handler.server.start_stream(self.request_handler.request):
+                # Too many streams
+                if hasattr(self.result, 'close'):
+                    self.result.close()
+                body = b'Too many streams\n'
+                self.status = '503 Service Unavailable'
+                self.headers = Headers(
+                    [('Content-Type', 'text/plain'), ('Content-Length', str(len(body))), ('Retry-After', '1')]
+                )
+                self.result = [body]
+        ServerHandler.finish_response(self)
+
+    def cleanup_headers(self):
+        """Add the Connection header."""
+        ServerHandler.cleanup_headers(self)
+        request_handler = self.request_handler
+        if 'Content-Length' not in self.headers and has_body(self.status):
+            # The end of the response is the end of the connection (streams)
+            request_handler.close_connection = True
+        if request_handler.close_connection:
+            self.headers['Connection'] = 'close'
+        elif request_handler.request_version == 'HTTP/1.0':
+            self.headers['Connection'] = 'keep-alive'
+
+
+class GlancesWSGIRequestHandler(WSGIRequestHandler):
+
+    """Handle the HTTP requests of a connection (keep-alive and timeouts).
+
+    The timeouts are read from the server (see GlancesWSGIServer).
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        # Timeout (in seconds) of the socket operations during a request
+        self.timeout = self.server.request_timeout
+        WSGIRequestHandler.setup(self)
+
+    def address_string(self):
+        # Prevent reverse DNS lookups
+        return self.client_address[0]
+
+    def log_request(self, *args, **kwargs):
+        if not self.server.quiet:
+            WSGIRequestHandler.log_request(self, *args, **kwargs)
+
+    def handle(self):
+        """Handle the requests until the connection is closed."""
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection:
+            if self.server.pool.qsize() > 0:
+                # Connections are waiting for a thread: do not keep an idle one
+                break
+            # Wait for the next request at most keepalive_timeout seconds
+            self.connection.settimeout(self.server.keepalive_timeout)
+            self.handle_one_request()
+
+    def handle_one_request(self):
+        """Handle a single HTTP request."""
+        try:
+            self.raw_requestline = self.rfile.readline(65537)
+            self.connection.settimeout(self.server.request_timeout)
+            if not self.raw_requestline:
+                # Connection closed by the client
+                self.close_connection = True
+                return
+            if len(self.raw_requestline) > 65536:
+                self.requestline = ''
+                self.request_version = ''
+                self.command = ''
+                self.send_error(414)
+                self.close_connection = True
+                return
+            if not self.parse_request():
+                # An error code has been sent, just exit
+                self.close_connection = True
+                return
+
+            environ = self.get_environ()
+            handler = GlancesWSGIHandler(self.rfile, self.wfile, self.get_stderr(), environ, multithread=True)
+            # Backpointer for logging and keep-alive
+            handler.request_handler = self
+            handler.run(self.server.get_app())
+
+            if environ.get('CONTENT_LENGTH', '') not in ('', '0'):
+                # The request body could be not fully read by the application
+                self.close_connection = True
+        except socket.timeout:
+            self.close_connection = True
+        except socket.error as e:
+            logger.debug("Web server connection error with {} ({})".format(self.client_address[0], e))
+            self.close_connection = True
+
+
+class GlancesWSGIServer(WSGIServer):
+
+    """WSGI server processing the connections in a bounded pool of threads.
+
+    At most queue_size connections wait for a thread, the next ones are
+    rejected (503). A connection serving a stream (response without
+    Content-Length) leaves the pool: its thread is replaced, and at most
+    max_streams streams can be served at the same time.
+    """
+
+    def __init__(
+        self,
+        server_address,
+        handler_class,
+        workers=8,
+        keepalive_timeout=5,
+        request_timeout=30,
+        max_streams=16,
+        queue_size=64,
+        quiet=False,
+    ):
+        self.keepalive_timeout = keepalive_timeout
+        self.request_timeout = request_timeout
+        self.max_streams = max_streams
+        self.queue_size = queue_size
+        self.quiet = quiet
+        self.pool = GlancesWorkerPool(max_workers=workers, name='glances-web')
+        # Jobs of the connections (key: socket) and connections serving a stream
+        self._jobs = {}
+        self._streams = set()
+        self._lock = threading.Lock()
+        WSGIServer.__init__(self, server_address, handler_class)
+
+    def process_request(self, request, client_address):
+        """Process the connection in a worker thread."""
+        if self.pool.qsize() >= self.queue_size:
+            logger.debug("Web server busy, reject the connection from {}".format(client_address[0]))
+            try:
+                request.settimeout(1)
+                request.sendall(BUSY_RESPONSE)
+            except socket.error:
+                pass
+            self.shutdown_request(request)
+            return
+        job = GlancesJob(self.process_request_thread, args=(request, client_address))
+        with self._lock:
+            self._jobs[request] = job
+        self.pool.submit_job(job)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._lock:
+                del self._jobs[request]
+                self._streams.discard(request)
+            self.shutdown_request(request)
+
+    def start_stream(self, request):
+        """The connection serves a stream: its thread leaves the pool.
+
+        Return False if max_streams streams are already served.
+        """
+        with self._lock:
+            if request in self._streams:
+                return True
+            if len(self._streams) >= self.max_streams:
+                return False
+            self._streams.add(request)
+            job = self._jobs.get(request)
+        if job is not None:
+            self.pool.abandon(job)
+        return True
+
+    def server_close(self):
+        WSGIServer.server_close(self)
+        self.pool.stop(timeout=1)
+
+
+class GlancesWSGIServerAdapter(ServerAdapter):
+
+    """Bottle adapter for the GlancesWSGIServer.
+
+    Options: workers, keepalive_timeout, request_timeout, max_streams and queue_size.
+    """
+
+    def run(self, app):
+        server_class = GlancesWSGIServer
+        if ':' in self.host:
+            # IPv6 address
+            server_class = type('GlancesWSGIServerV6', (GlancesWSGIServer,), {'address_family': socket.AF_INET6})
+
+        self.srv = server_class(
+            (self.host, self.port),
+            GlancesWSGIRequestHandler,
+            workers=self.options.get('workers', 8),
+            keepalive_timeout=self.options.get('keepalive_timeout', 5),
+            request_timeout=self.options.get('request_timeout', 30),
+            max_streams=self.options.get('max_streams', 16),
+            queue_size=self.options.get('queue_size', 64),
+            quiet=self.quiet,
+        )
+        self.srv.set_app(app)
+        logger.info(
+            "Web server uses {} threads and {} streams (keep-alive timeout: {}s, request timeout: {}s)".format(
+                self.srv.pool.max_workers, self.srv.max_streams, self.srv.keepalive_timeout, self.srv.request_timeout
+            )
+        )
+        try:
+            self.srv.serve_forever()
+        except KeyboardInterrupt:
+            self.srv.server_close()
+            raise
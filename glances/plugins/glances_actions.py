@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Glances.
+#
+# Copyright (C) 2022 Nicolargo <nicolas@nicolargo.com>
+#
+# Glances is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Glances is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Actions executor plugin."""
+
+from glances.actions import glances_actions_executor
+from glances.plugins.glances_plugin import GlancesPlugin
+
+
+class Plugin(GlancesPlugin):
+    """Glances actions executor plugin.
+
+    stats is a dict (queue depth and run latency of the actions)
+    """
+
+    def __init__(self, args=None, config=None):
+        """Init the plugin."""
+        super(Plugin, self).__init__(args=args, config=config, stats_init_value={})
+
+        # Set the actions executor configuration
+        if config is not None:
+            glances_actions_executor.set(
+                max_workers=config.get_int_value(self.plugin_name, 'workers', default=2),
+                timeout=config.get_float_value(self.plugin_name, 'timeout', default=30),
+            )
+
+    def exit(self):
+        """Overwrite the exit method to stop the actions workers."""
+        glances_actions_executor.stop()
+        # Call the father class
+        super(Plugin, self).exit()
+
+    @GlancesPlugin._check_decorator
+    @GlancesPlugin._log_result_decorator
+    def update(self):
+        """Update the actions executor stats."""
+        # Init new stats
+        stats = self.get_init_value()
+
+        if self.input_method == 'local':
+            stats = glances_actions_executor.get_stats()
+        else:
+            # Not available in SNMP mode
+            pass
+
+        # Update the stats
+        self.stats = stats
+
+        return self.stats
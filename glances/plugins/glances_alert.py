@@ -179,6 +179,10 @@ class Plugin(GlancesPlugin):
         # Set the message position
         self.align = 'bottom'
 
+    def get_depends(self):
+        """Events embed the top processes list updated by the processcount plugin."""
+        return ['processcount']
+
     def update(self):
         """Nothing to do here. Just return the global glances_log."""
         # Set the stats to the glances_events
@@ -39,10 +39,20 @@ class Plugin(GlancesPlugin):
         # Init the list of AMP (classes define in the glances/amps_list.py script)
         self.glances_amps = glancesAmpsList(self.args, self.config)
 
+    def exit(self):
+        """Overwrite the exit method to stop the AMPs workers."""
+        self.glances_amps.stop()
+        # Call the father class
+        super(Plugin, self).exit()
+
     def get_key(self):
         """Return the key of the list."""
         return 'name'
 
+    def get_depends(self):
+        """The processes list is updated by the processcount plugin."""
+        return ['processcount']
+
     @GlancesPlugin._check_decorator
     @GlancesPlugin._log_result_decorator
     def update(self):
@@ -21,6 +21,7 @@
 from __future__ import unicode_literals
 
 from glances.logger import logger
+from glances.globals import LINUX
 from glances.plugins.glances_plugin import GlancesPlugin
 from glances.compat import nativestr
 
@@ -73,6 +74,24 @@ class Plugin(GlancesPlugin):
         self.net_connections_enabled = True
         self.nf_conntrack_enabled = True
 
+        # TCP states counter: on Linux, the sockets are counted per state in a single
+        # pass (netlink or /proc/net/tcp) instead of building the psutil connections list
+        # Set collector=psutil in the [connections] section to use psutil.net_connections
+        self.tcp_states_counter = None
+        if LINUX and (config is None or config.get_value(self.plugin_name, 'collector', default='netlink') != 'psutil'):
+            from glances.connections_counter import GlancesTcpStatesCounter
+
+            self.tcp_states_counter = GlancesTcpStatesCounter()
+
+    def get_tcp_states(self):
+        """Return the number of TCP connections per state (dict, key is the psutil state)."""
+        if self.tcp_states_counter is not None:
+            return self.tcp_states_counter.count()
+        ret = {}
+        for c in psutil.net_connections(kind="tcp"):
+            ret[c.status] = ret.get(c.status, 0) + 1
+        return ret
+
     @GlancesPlugin._check_decorator
     @GlancesPlugin._log_result_decorator
     def update(self):
@@ -89,7 +108,7 @@ class Plugin(GlancesPlugin):
             # Grab network interface stat using the psutil net_connections method
             if self.net_connections_enabled:
                 try:
-                    net_connections = psutil.net_connections(kind="tcp")
+                    states = self.get_tcp_states()
                 except Exception as e:
                     logger.debug('Can not get network connections stats ({})'.format(e))
                     self.net_connections_enabled = False
@@ -97,15 +116,15 @@ class Plugin(GlancesPlugin):
                     return self.stats
 
                 for s in self.status_list:
-                    stats[s] = len([c for c in net_connections if c.status == s])
+                    stats[s] = states.get(s, 0)
                 initiated = 0
                 for s in self.initiated_states:
-                    stats[s] = len([c for c in net_connections if c.status == s])
+                    stats[s] = states.get(s, 0)
                     initiated += stats[s]
                 stats['initiated'] = initiated
                 terminated = 0
-                for s in self.initiated_states:
-                    stats[s] = len([c for c in net_connections if c.status == s])
+                for s in self.terminated_states:
+                    stats[s] = states.get(s, 0)
                     terminated += stats[s]
                 stats['terminated'] = terminated
 
@@ -26,10 +26,12 @@ from copy import deepcopy
 from dateutil import parser
 
 from glances.compat import iterkeys, itervalues, nativestr, pretty_date
+from glances.docker_cgroup import GlancesCgroupCollector
+from glances.globals import LINUX
 from glances.logger import logger
 from glances.plugins.glances_plugin import GlancesPlugin
 from glances.processes import sort_stats as sort_stats_processes, glances_processes
-from glances.timer import getTimeSinceLastUpdate
+from glances.timer import Timer, getTimeSinceLastUpdate
 
 # Docker-py library (optional and Linux-only)
 # https://github.com/docker/docker-py
@@ -96,6 +98,29 @@ class Plugin(GlancesPlugin):
         # value: instance of ThreadDockerGrabber
         self.thread_list = {}
 
+        # Containers stats collector: 'api' (default) or 'cgroup' (Linux only)
+        # With the cgroup collector, the stats of all the running containers are read
+        # in one pass from the cgroup hierarchy
+        self.cgroup_collector = None
+        if self._collector() == 'cgroup':
+            if LINUX:
+                self.cgroup_collector = GlancesCgroupCollector()
+            else:
+                logger.warning("docker plugin - cgroup collector is only available on Linux")
+
+        # Docker version and containers metadata cache
+        # Updated from the Docker events and by a diff of the containers list
+        # every inventory_refresh seconds
+        self.inventory = None
+        if not import_error_tag and self.docker_client is not None:
+            self.inventory = DockerInventory(
+                self.docker_client,
+                all_tag=self._all_tag(),
+                refresh=self.config.get_float_value('docker', 'inventory_refresh', default=5)
+                if self.config is not None
+                else 5,
+            )
+
         # Dict of Network stats (Storing previous network stats to compute Rx/s and Tx/s)
         # key: Container Id
         # value: network stats dict
@@ -114,6 +139,8 @@ class Plugin(GlancesPlugin):
         """Overwrite the exit method to close threads."""
         for t in itervalues(self.thread_list):
             t.stop()
+        if self.inventory is not None:
+            self.inventory.stop()
         # Call the father class
         super(Plugin, self).exit()
 
@@ -166,6 +193,24 @@ class Plugin(GlancesPlugin):
         else:
             return all_tag[0].lower() == 'true'
 
+    def _collector(self):
+        """Return the containers stats collector of the Glances/Docker configuration file.
+
+        # Stats collector: api (Docker API stats stream) or cgroup (Linux only)
+        collector=cgroup
+        """
+        collector = self.get_conf_value('collector')
+        if len(collector) == 0:
+            return 'api'
+        else:
+            return collector[0].lower()
+
+    def get_container_stats(self, container_id):
+        """Return the last stats of the container (Docker API stats format)."""
+        if self.cgroup_collector is not None:
+            return self.cgroup_collector.get_stats(container_id)
+        return self.thread_list[container_id].stats
+
     @GlancesPlugin._check_decorator
     @GlancesPlugin._log_result_decorator
     def update(self):
@@ -190,42 +235,46 @@ class Plugin(GlancesPlugin):
             #     "Os": "linux",
             #     "GoVersion": "go1.3.3"
             # }
+            # Containers list (metadata cache, see DockerInventory)
+            # Issue #1152: Docker module doesn't export details about stopped containers
+            # The Docker/all key of the configuration file should be set to True
             try:
-                stats['version'] = self.docker_client.version()
+                containers = self.inventory.update()
             except Exception as e:
                 # Correct issue#649
-                logger.error("{} plugin - Cannot get Docker version ({})".format(self.plugin_name, e))
-                # We may have lost connection remove version info
+                logger.error("{} plugin - Cannot get containers list ({})".format(self.plugin_name, e))
+                # We may have lost connection remove version info and empty the containers list
+                self.inventory.reset()
                 if 'version' in self.stats:
                     del self.stats['version']
                 self.stats['containers'] = []
                 return self.stats
-
-            # Update current containers list
-            try:
-                # Issue #1152: Docker module doesn't export details about stopped containers
-                # The Docker/all key of the configuration file should be set to True
-                containers = self.docker_client.containers.list(all=self._all_tag()) or []
-            except Exception as e:
-                logger.error("{} plugin - Cannot get containers list ({})".format(self.plugin_name, e))
-                # We may have lost connection empty the containers list.
-                self.stats['containers'] = []
-                return self.stats
-
-            # Start new thread for new container
-            for container in containers:
-                if container.id not in self.thread_list:
-                    # Thread did not exist in the internal dict
-                    # Create it and add it to the internal dict
-                    logger.debug(
-                        "{} plugin - Create thread for container {}".format(self.plugin_name, container.id[:12])
-                    )
-                    t = ThreadDockerGrabber(container)
-                    self.thread_list[container.id] = t
-                    t.start()
+            stats['version'] = self.inventory.version
+
+            if self.cgroup_collector is not None:
+                # Grab the stats of all the running containers in one pass
+                self.cgroup_collector.update(
+                    [
+                        (c['Id'], c['Pid'])
+                        for c in containers
+                        if c['Status'] in ('running', 'paused') and c['Pid']
+                    ]
+                )
+            else:
+                # Start new thread for new container
+                for container in containers:
+                    if container['Id'] not in self.thread_list:
+                        # Thread did not exist in the internal dict
+                        # Create it and add it to the internal dict
+                        logger.debug(
+                            "{} plugin - Create thread for container {}".format(self.plugin_name, container['Id'][:12])
+                        )
+                        t = ThreadDockerGrabber(container['container'])
+                        self.thread_list[container['Id']] = t
+                        t.start()
 
             # Stop threads for non-existing containers
-            absent_containers = set(iterkeys(self.thread_list)) - set([c.id for c in containers])
+            absent_containers = set(iterkeys(self.thread_list)) - set([c['Id'] for c in containers])
             for container_id in absent_containers:
                 # Stop the thread
                 logger.debug("{} plugin - Stop thread for old container {}".format(self.plugin_name, container_id[:12]))
@@ -237,11 +286,11 @@ class Plugin(GlancesPlugin):
             stats['containers'] = []
             for container in containers:
                 # Only show specific containers
-                if not self.is_show(nativestr(container.name)):
+                if not self.is_show(container['name']):
                     continue
 
                 # Do not take hidden container into account
-                if self.is_hide(nativestr(container.name)):
+                if self.is_hide(container['name']):
                     continue
 
                 # Init the stats for the current container
@@ -249,52 +298,41 @@ class Plugin(GlancesPlugin):
                 # The key is the container name and not the Id
                 container_stats['key'] = self.get_key()
                 # Export name (first name in the Names list, without the /)
-                container_stats['name'] = nativestr(container.name)
+                container_stats['name'] = container['name']
                 # Export global Names (used by the WebUI)
-                container_stats['Names'] = [nativestr(container.name)]
+                container_stats['Names'] = [container['name']]
                 # Container Id
-                container_stats['Id'] = container.id
+                container_stats['Id'] = container['Id']
                 # Container Image
-                container_stats['Image'] = container.image.tags
+                container_stats['Image'] = container['Image']
                 # Global stats (from attrs)
                 # Container Status
-                container_stats['Status'] = container.attrs['State']['Status']
+                container_stats['Status'] = container['Status']
                 # Container Command (see #1912)
-                container_stats['Command'] = []
-                if container.attrs['Config'].get('Entrypoint', None):
-                    container_stats['Command'].extend(container.attrs['Config'].get('Entrypoint', []))
-                if container.attrs['Config'].get('Cmd', None):
-                    container_stats['Command'].extend(container.attrs['Config'].get('Cmd', []))
-                if not container_stats['Command']:
-                    container_stats['Command'] = None
+                container_stats['Command'] = container['Command']
                 # Standards stats
                 # See https://docs.docker.com/engine/api/v1.41/#operation/ContainerStats
                 # Be aware that the API can change... (example see issue #1857)
                 if container_stats['Status'] in ('running', 'paused'):
+                    all_stats = self.get_container_stats(container['Id'])
                     # CPU
-                    container_stats['cpu'] = self.get_docker_cpu(container.id, self.thread_list[container.id].stats)
+                    container_stats['cpu'] = self.get_docker_cpu(container['Id'], all_stats)
                     container_stats['cpu_percent'] = container_stats['cpu'].get('total', None)
                     # MEM
-                    container_stats['memory'] = self.get_docker_memory(
-                        container.id, self.thread_list[container.id].stats
-                    )
+                    container_stats['memory'] = self.get_docker_memory(container['Id'], all_stats)
                     container_stats['memory_usage'] = container_stats['memory'].get('usage', None)
                     if container_stats['memory'].get('cache', None) is not None:
                         container_stats['memory_usage'] -= container_stats['memory']['cache']
                     # IO
-                    container_stats['io'] = self.get_docker_io(container.id, self.thread_list[container.id].stats)
+                    container_stats['io'] = self.get_docker_io(container['Id'], all_stats)
                     container_stats['io_r'] = container_stats['io'].get('ior', None)
                     container_stats['io_w'] = container_stats['io'].get('iow', None)
                     # NET
-                    container_stats['network'] = self.get_docker_network(
-                        container.id, self.thread_list[container.id].stats
-                    )
+                    container_stats['network'] = self.get_docker_network(container['Id'], all_stats)
                     container_stats['network_rx'] = container_stats['network'].get('rx', None)
                     container_stats['network_tx'] = container_stats['network'].get('tx', None)
                     # Uptime
-                    container_stats['Uptime'] = pretty_date(
-                        parser.parse(container.attrs['State']['StartedAt']).replace(tzinfo=None)
-                    )
+                    container_stats['Uptime'] = pretty_date(container['StartedAt'])
                 else:
                     container_stats['cpu'] = {}
                     container_stats['cpu_percent'] = None
@@ -728,6 +766,178 @@ class ThreadDockerGrabber(threading.Thread):
         return self._stopper.is_set()
 
 
+class ThreadDockerEvents(threading.Thread):
+    """
+    Specific thread to follow the Docker containers events.
+
+    The callback is called with the container id for each event of the events_list.
+    """
+
+    # Events changing the containers metadata
+    events_list = ['create', 'start', 'restart', 'die', 'destroy', 'rename', 'pause', 'unpause']
+
+    def __init__(self, client, callback):
+        """Init the class.
+
+        client: instance of Docker-py DockerClient
+        """
+        super(ThreadDockerEvents, self).__init__()
+        self.daemon = True
+        # Event needed to stop properly the thread
+        self._stopper = threading.Event()
+        self._callback = callback
+        # The docker-py return events as a stream
+        self._events_stream = client.events(decode=True, filters={'type': 'container'})
+
+    def run(self):
+        """Grab the events.
+
+        Infinite loop, should be stopped by calling the stop() method
+        """
+        try:
+            for event in self._events_stream:
+                if self.stopped():
+                    break
+                if event.get('Action', event.get('status')) in self.events_list:
+                    self._callback(event.get('id') or event['Actor']['ID'])
+        except Exception as e:
+            logger.debug("docker plugin - Exception thrown during events run ({})".format(e))
+
+    def stop(self, timeout=None):
+        """Stop the thread."""
+        logger.debug("docker plugin - Close events thread")
+        self._stopper.set()
+        try:
+            self._events_stream.close()
+        except Exception:
+            pass
+
+    def stopped(self):
+        """Return True is the thread is stopped."""
+        return self._stopper.is_set()
+
+
+class DockerInventory(object):
+    """
+    Cache of the Docker version and of the containers metadata.
+
+    Only the new or modified containers are inspected:
+    - immediately for the containers of the Docker events (see ThreadDockerEvents)
+    - every refresh seconds for the containers of the list diff (containers
+      list and version are the only other requests to the Docker API)
+    """
+
+    def __init__(self, client, all_tag=False, refresh=5, events=True):
+        """Init the class.
+
+        client: instance of Docker-py DockerClient
+        """
+        self.client = client
+        self.all_tag = all_tag
+        self.refresh = refresh
+        self.events = events
+        self.version = None
+        # Dict of containers metadata (see inspect)
+        # key: Container Id
+        self.containers = {}
+        # Image tags cache (key: Image Id)
+        self._image_tags = {}
+        # Ids of the containers to inspect (updated by the events thread)
+        self._invalidated = set()
+        self._lock = threading.Lock()
+        self._events_thread = None
+        self._timer = Timer(0)
+
+    def invalidate(self, container_id):
+        """Inspect the given container on the next update."""
+        with self._lock:
+            self._invalidated.add(container_id)
+
+    def reset(self):
+        """Forget the cache (a full list diff is done on the next update)."""
+        self.containers = {}
+        self._image_tags = {}
+        self._timer = Timer(0)
+
+    def update(self):
+        """Update and return the list of the containers metadata."""
+        if self._timer.finished():
+            if self.events and (self._events_thread is None or not self._events_thread.is_alive()):
+                # Follow the events before the list to not miss any change
+                try:
+                    self._events_thread = ThreadDockerEvents(self.client, self.invalidate)
+                    self._events_thread.start()
+                except Exception as e:
+                    logger.debug("docker plugin - Cannot follow the Docker events ({})".format(e))
+                    self._events_thread = None
+            self.version = self.client.version()
+            self.diff()
+            self._timer = Timer(self.refresh)
+        with self._lock:
+            invalidated, self._invalidated = self._invalidated, set()
+        for container_id in invalidated:
+            self.inspect(container_id)
+        return list(itervalues(self.containers))
+
+    def diff(self):
+        """Update the cache with the containers list (only the new or modified containers are inspected)."""
+        containers = {c['Id']: c for c in self.client.api.containers(all=self.all_tag)}
+        for container_id in set(self.containers) - set(containers):
+            del self.containers[container_id]
+        for container_id, c in containers.items():
+            cached = self.containers.get(container_id)
+            if cached is None or cached['Status'] != c.get('State', cached['Status']):
+                self.inspect(container_id)
+        # Forget the tags of the unused images
+        images = set(c['ImageId'] for c in itervalues(self.containers))
+        for image_id in set(self._image_tags) - images:
+            del self._image_tags[image_id]
+
+    def inspect(self, container_id):
+        """Inspect the container and update its metadata in the cache."""
+        try:
+            container = self.client.containers.get(container_id)
+        except docker.errors.NotFound:
+            self.containers.pop(container_id, None)
+            return
+        status = container.attrs['State']['Status']
+        if not self.all_tag and status not in ('running', 'paused', 'restarting'):
+            # Only the running containers are displayed (see the all key of the configuration file)
+            self.containers.pop(container_id, None)
+            return
+        image_id = container.attrs['Image']
+        if image_id not in self._image_tags:
+            try:
+                self._image_tags[image_id] = self.client.images.get(image_id).tags
+            except docker.errors.NotFound:
+                self._image_tags[image_id] = []
+        # Container Command (see #1912)
+        command = []
+        if container.attrs['Config'].get('Entrypoint', None):
+            command.extend(container.attrs['Config'].get('Entrypoint', []))
+        if container.attrs['Config'].get('Cmd', None):
+            command.extend(container.attrs['Config'].get('Cmd', []))
+        started_at = None
+        if status in ('running', 'paused'):
+            started_at = parser.parse(container.attrs['State']['StartedAt']).replace(tzinfo=None)
+        self.containers[container_id] = {
+            'container': container,
+            'Id': container.id,
+            'name': nativestr(container.name),
+            'ImageId': image_id,
+            'Image': self._image_tags[image_id],
+            'Status': status,
+            'Command': command or None,
+            'Pid': container.attrs['State'].get('Pid'),
+            'StartedAt': started_at,
+        }
+
+    def stop(self):
+        """Stop the events thread."""
+        if self._events_thread is not None:
+            self._events_thread.stop()
+
+
 def sort_stats(stats):
     # Sort Docker stats using the same function than processes
     sort_by = 'cpu_percent'
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Glances.
+#
+# Copyright (C) 2022 Nicolargo <nicolas@nicolargo.com>
+#
+# Glances is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Glances is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Export workers plugin."""
+
+from glances.plugins.glances_plugin import GlancesPlugin
+
+
+class Plugin(GlancesPlugin):
+    """Glances export workers plugin.
+
+    stats is a list of dict (queue depth, lag, drops and latency of each export module)
+    """
+
+    def __init__(self, args=None, config=None):
+        """Init the plugin."""
+        super(Plugin, self).__init__(args=args, config=config, stats_init_value=[])
+
+        # Export workers (set by GlancesStats, see set_workers)
+        self.workers = {}
+
+    def set_workers(self, workers):
+        """Set the export workers dict (key: export module name)."""
+        self.workers = workers
+
+    def get_key(self):
+        """Return the key of the list."""
+        return 'name'
+
+    @GlancesPlugin._check_decorator
+    @GlancesPlugin._log_result_decorator
+    def update(self):
+        """Update the export workers stats."""
+        # Init new stats
+        stats = self.get_init_value()
+
+        if self.input_method == 'local':
+            stats = [self.workers[e].get_stats() for e in sorted(self.workers)]
+        else:
+            # Not available in SNMP mode
+            pass
+
+        # Update the stats
+        self.stats = stats
+
+        return self.stats
@@ -43,6 +43,13 @@ class Plugin(GlancesPlugin):
         # Init stats
         self.glances_folders = glancesFolderList(config)
 
+    def exit(self):
+        """Overwrite the exit method to stop the folders scans."""
+        if self.glances_folders is not None:
+            self.glances_folders.stop()
+        # Call the father class
+        super(Plugin, self).exit()
+
     def get_key(self):
         """Return the key of the list."""
         return 'path'
@@ -124,10 +131,14 @@ class Plugin(GlancesPlugin):
                 path = i['path']
             msg = '{:{width}}'.format(nativestr(path), width=name_max_width)
             ret.append(self.curse_add_line(msg))
-            try:
-                msg = '{:>9}'.format(self.auto_unit(i['size']))
-            except (TypeError, ValueError):
-                msg = '{:>9}'.format(i['size'])
+            if i['size'] is None:
+                # First scan is running
+                msg = '{:>9}'.format('-')
+            else:
+                try:
+                    msg = '{:>9}'.format(self.auto_unit(i['size']))
+                except (TypeError, ValueError):
+                    msg = '{:>9}'.format(i['size'])
             ret.append(self.curse_add_line(msg, self.get_alert(i, header='folder_' + i['indice'])))
 
         return ret
@@ -23,6 +23,7 @@ from __future__ import unicode_literals
 import operator
 
 from glances.compat import u, nativestr, PermissionError
+from glances.fs_usage import GlancesFsUsage, GlancesMountTable
 from glances.plugins.glances_plugin import GlancesPlugin
 
 import psutil
@@ -85,6 +86,23 @@ class Plugin(GlancesPlugin):
         # We want to display the stat in the curse interface
         self.display_curse = True
 
+        # File systems usage probes, ran in worker threads with a timeout (in seconds)
+        # Mount points which do not answer are quarantined and their last usage is displayed
+        self.fs_usage = GlancesFsUsage(
+            timeout=config.get_float_value(self.plugin_name, 'timeout', default=1) if config is not None else 1,
+            max_workers=config.get_int_value(self.plugin_name, 'workers', default=4) if config is not None else 4,
+        )
+        # The partitions list is only grabbed when the mount table changes
+        self.mount_table = GlancesMountTable()
+        self.partitions = []
+
+    def exit(self):
+        """Overwrite the exit method to stop the probes."""
+        self.fs_usage.stop()
+        self.mount_table.close()
+        # Call the father class
+        super(Plugin, self).exit()
+
     def get_key(self):
         """Return the key of the list."""
         return 'mnt_point'
@@ -99,34 +117,37 @@ class Plugin(GlancesPlugin):
         if self.input_method == 'local':
             # Update stats using the standard system lib
 
-            # Grab the stats using the psutil disk_partitions
-            # If 'all'=False return physical devices only (e.g. hard disks, cd-rom drives, USB keys)
-            # and ignore all others (e.g. memory partitions such as /dev/shm)
-            try:
-                fs_stat = psutil.disk_partitions(all=False)
-            except (UnicodeDecodeError, PermissionError):
-                return self.stats
-
-            # Optional hack to allow logical mounts points (issue #448)
-            for fs_type in self.get_conf_value('allow'):
+            if self.mount_table.changed():
+                # Grab the stats using the psutil disk_partitions
+                # If 'all'=False return physical devices only (e.g. hard disks, cd-rom drives, USB keys)
+                # and ignore all others (e.g. memory partitions such as /dev/shm)
                 try:
-                    fs_stat += [f for f in psutil.disk_partitions(all=True) if f.fstype.find(fs_type) >= 0]
-                except UnicodeDecodeError:
+                    fs_stat = psutil.disk_partitions(all=False)
+                except (UnicodeDecodeError, PermissionError):
+                    self.mount_table.invalidate()
                     return self.stats
 
+                # Optional hack to allow logical mounts points (issue #448)
+                for fs_type in self.get_conf_value('allow'):
+                    try:
+                        fs_stat += [f for f in psutil.disk_partitions(all=True) if f.fstype.find(fs_type) >= 0]
+                    except UnicodeDecodeError:
+                        self.mount_table.invalidate()
+                        return self.stats
+                self.partitions = fs_stat
+
+            # Do not take hidden file system into account
+            # Also check device name (see issue #1606)
+            fs_stat = [fs for fs in self.partitions if not self.is_hide(fs.mountpoint) and not self.is_hide(fs.device)]
+
+            # Grab the disk usage (see GlancesFsUsage)
+            fs_usages = self.fs_usage.get([fs.mountpoint for fs in fs_stat])
+
             # Loop over fs
             for fs in fs_stat:
-                # Do not take hidden file system into account
-                # Also check device name (see issue #1606)
-                if self.is_hide(fs.mountpoint) or self.is_hide(fs.device):
-                    continue
-                # Grab the disk usage
-                try:
-                    fs_usage = psutil.disk_usage(fs.mountpoint)
-                except OSError:
-                    # Correct issue #346
-                    # Disk is ejected during the command
+                if fs.mountpoint not in fs_usages:
                     continue
+                fs_usage, stale = fs_usages[fs.mountpoint]
                 fs_current = {
                     'device_name': fs.device,
                     'fs_type': fs.fstype,
@@ -136,6 +157,8 @@ class Plugin(GlancesPlugin):
                     'used': fs_usage.used,
                     'free': fs_usage.free,
                     'percent': fs_usage.percent,
+                    # True if the file system does not answer (last known usage)
+                    'stale': stale,
                     'key': self.get_key(),
                 }
                 stats.append(fs_current)
@@ -245,7 +268,8 @@ class Plugin(GlancesPlugin):
             else:
                 mnt_point = i['mnt_point']
             msg = '{:{width}}'.format(nativestr(mnt_point), width=name_max_width)
-            ret.append(self.curse_add_line(msg))
+            # Highlight the file systems which do not answer
+            ret.append(self.curse_add_line(msg, 'CAREFUL' if i.get('stale') else 'DEFAULT'))
             if args.fs_free_space:
                 msg = '{:>7}'.format(self.auto_unit(i['free']))
             else:
@@ -25,6 +25,7 @@ import base64
 from glances.timer import getTimeSinceLastUpdate
 from glances.plugins.glances_plugin import GlancesPlugin
 from glances.compat import n
+from glances.globals import LINUX
 from glances.logger import logger
 
 import psutil
@@ -100,6 +101,21 @@ class Plugin(GlancesPlugin):
             self.hide_zero = False
         self.hide_zero_fields = ['rx', 'tx']
 
+        # Network interfaces collector: psutil (default) or procfs (Linux only)
+        # procfs reads the counters of all the interfaces in one pass from /proc/net/dev
+        # and the status of the interfaces from sysfs (only every status_refresh seconds,
+        # or when the counters of an up interface do not change)
+        self.procfs = None
+        if config is not None and config.get_value(self.plugin_name, 'collector', default='psutil') == 'procfs':
+            if LINUX:
+                from glances.network_procfs import GlancesNetworkProcfsCollector
+
+                self.procfs = GlancesNetworkProcfsCollector(
+                    status_refresh=config.get_float_value(self.plugin_name, 'status_refresh', default=10)
+                )
+            else:
+                logger.warning('Network procfs collector is only available on Linux')
+
         # Force a first update because we need two update to have the first stat
         self.update()
         self.refresh_timer.set(0)
@@ -123,8 +139,11 @@ class Plugin(GlancesPlugin):
 
             # Grab network interface stat using the psutil net_io_counter method
             try:
-                net_io_counters = psutil.net_io_counters(pernic=True)
-            except UnicodeDecodeError as e:
+                if self.procfs is not None:
+                    net_io_counters = self.procfs.net_io_counters()
+                else:
+                    net_io_counters = psutil.net_io_counters(pernic=True)
+            except (UnicodeDecodeError, IOError, OSError, ValueError) as e:
                 logger.debug('Can not get network interface counters ({})'.format(e))
                 return self.stats
 
@@ -132,7 +151,13 @@ class Plugin(GlancesPlugin):
             # Grab interface's speed (issue #718)
             net_status = {}
             try:
-                net_status = psutil.net_if_stats()
+                if self.procfs is not None:
+                    # Only the status of the displayed interfaces
+                    net_status = self.procfs.net_if_stats(
+                        [i for i in net_io_counters if not self.is_hide(i)], net_io_counters
+                    )
+                else:
+                    net_status = psutil.net_if_stats()
             except OSError as e:
                 # see psutil #797/glances #1106
                 logger.debug('Can not get network interface status ({})'.format(e))
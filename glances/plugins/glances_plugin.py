@@ -32,6 +32,7 @@ from glances.compat import iterkeys, itervalues, listkeys, map, mean, nativestr,
 from glances.actions import GlancesActions
 from glances.history import GlancesHistory
 from glances.logger import logger
+from glances.matcher import GlancesMatcher
 from glances.events import glances_events
 from glances.thresholds import glances_thresholds
 from glances.timer import Counter, Timer
@@ -103,6 +104,9 @@ class GlancesPlugin(object):
 
         # Init the limits (configuration keys) dictionary
         self._limits = dict()
+        # Show/hide matchers and aliases cache (see is_show, is_hide and has_alias)
+        self._matchers = dict()
+        self._aliases = dict()
         if config is not None:
             logger.debug('Load section {} in {}'.format(self.plugin_name, config.config_file_paths()))
             self.load_limits(config=config)
@@ -156,6 +160,13 @@ class GlancesPlugin(object):
         """Return the key of the list."""
         return None
 
+    def get_depends(self):
+        """Return the list of plugins to update before the current one.
+
+        Only used by the parallel update scheduler (see GlancesStats.update).
+        """
+        return []
+
     def is_enabled(self, plugin_name=None):
         """Return true if plugin is enabled."""
         if not plugin_name:
@@ -238,14 +249,10 @@ class GlancesPlugin(object):
         - the stats history for the given item (list) instead
         - None if item did not exist in the history
         """
-        s = self.stats_history.get(nb=nb)
         if item is None:
-            return s
+            return self.stats_history.get(nb=nb)
         else:
-            if item in s:
-                return s[item]
-            else:
-                return None
+            return self.stats_history.get_item(item, nb=nb)
 
     def get_json_history(self, item=None, nb=0):
         """Return the history (JSON format).
@@ -255,14 +262,10 @@ class GlancesPlugin(object):
         - None if item did not exist in the history
         Limit to lasts nb items (all if nb=0)
         """
-        s = self.stats_history.get_json(nb=nb)
         if item is None:
-            return s
+            return self.stats_history.get_json(nb=nb)
         else:
-            if item in s:
-                return s[item]
-            else:
-                return None
+            return self.stats_history.get_item_json(item, nb=nb)
 
     def get_export_history(self, item=None):
         """Return the stats history object to export."""
@@ -596,6 +599,7 @@ class GlancesPlugin(object):
         """Load limits from the configuration file, if it exists."""
         # By default set the history length to 3 points per second during one day
         self._limits['history_size'] = 28800
+        self.reset_matchers()
 
         if not hasattr(config, 'has_section'):
             return False
@@ -628,6 +632,7 @@ class GlancesPlugin(object):
     def limits(self, input_limits):
         """Set the limits to input_limits."""
         self._limits = input_limits
+        self.reset_matchers()
 
     def set_refresh(self, value):
         """Set the plugin refresh rate"""
@@ -647,6 +652,7 @@ class GlancesPlugin(object):
     def set_limits(self, item, value):
         """Set the limits object."""
         self._limits['{}_{}'.format(self.plugin_name, item)] = value
+        self.reset_matchers()
 
     def get_limits(self, item=None):
         """Return the limits object."""
@@ -872,6 +878,19 @@ class GlancesPlugin(object):
         except KeyError:
             return default
 
+    def reset_matchers(self):
+        """Forget the show/hide matchers and the aliases (to call when the limits change)."""
+        self._matchers = dict()
+        self._aliases = dict()
+
+    def get_matcher(self, value, header=""):
+        """Return the GlancesMatcher of the (header_) value configuration list (compiled once)."""
+        try:
+            return self._matchers[(value, header)]
+        except KeyError:
+            ret = self._matchers[(value, header)] = GlancesMatcher(self.get_conf_value(value, header=header))
+            return ret
+
     def is_show(self, value, header=""):
         """Return True if the value is in the show configuration list.
 
@@ -882,11 +901,8 @@ class GlancesPlugin(object):
         Example for diskio:
         show=sda.*
         """
-        # @TODO: possible optimisation: create a re.compile list
-        if self.get_conf_value('show', header=header) == []:
-            return True
-        else:
-            return any(j for j in [re.match(i, value) for i in self.get_conf_value('show', header=header)])
+        matcher = self.get_matcher('show', header=header)
+        return len(matcher) == 0 or matcher.match(value)
 
     def is_hide(self, value, header=""):
         """Return True if the value is in the hide configuration list.
@@ -896,17 +912,24 @@ class GlancesPlugin(object):
         Example for diskio:
         hide=sda2,sda5,loop.*
         """
-        # @TODO: possible optimisation: create a re.compile list
-        return any(j for j in [re.match(i, value) for i in self.get_conf_value('hide', header=header)])
+        return self.get_matcher('hide', header=header).match(value)
 
     def has_alias(self, header):
         """Return the alias name for the relative header it it exists otherwise None."""
+        try:
+            return self._aliases[header]
+        except KeyError:
+            pass
         try:
             # Force to lower case (issue #1126)
-            return self._limits[self.plugin_name + '_' + header.lower() + '_' + 'alias'][0]
+            ret = self._limits[self.plugin_name + '_' + header.lower() + '_' + 'alias'][0]
         except (KeyError, IndexError):
             # logger.debug("No alias found for {}".format(header))
-            return None
+            ret = None
+        if len(self._aliases) >= 4096:
+            self._aliases = dict()
+        self._aliases[header] = ret
+        return ret
 
     def msg_curse(self, args=None, max_width=None):
         """Return default string to display in the curse interface."""
@@ -20,7 +20,9 @@
 """Ports scanner plugin."""
 
 import os
+import select
 import subprocess
+import struct
 import threading
 import socket
 import time
@@ -32,6 +34,7 @@ from glances.web_list import GlancesWebList
 from glances.timer import Timer, Counter
 from glances.compat import bool_type
 from glances.logger import logger
+from glances.workers import GlancesWorkerPool
 from glances.plugins.glances_plugin import GlancesPlugin
 
 try:
@@ -42,6 +45,10 @@ except ImportError as e:
     requests_tag = False
     logger.warning("Missing Python Lib ({}), Ports plugin is limited to port scanning".format(e))
 
+# ICMP messages types
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+
 
 class Plugin(GlancesPlugin):
     """Glances ports scanner plugin."""
@@ -76,22 +83,20 @@ class Plugin(GlancesPlugin):
     def update(self):
         """Update the ports list."""
         if self.input_method == 'local':
-            # Only refresh:
-            # * if there is not other scanning thread
-            # * every refresh seconds (define in the configuration file)
+            # Only start the scanning thread if it is not running
             if self._thread is None:
                 thread_is_running = False
             else:
                 thread_is_running = self._thread.is_alive()
             if not thread_is_running:
-                # Run ports scanner
-                self._thread = ThreadScanner(self.stats)
+                # Run ports scanner (the targets are scanned every refresh seconds)
+                self._thread = ThreadScanner(
+                    self.stats,
+                    max_workers=self.config.get_int_value(self.plugin_name, 'workers', default=10)
+                    if self.config is not None
+                    else 10,
+                )
                 self._thread.start()
-                # # Restart timer
-                # if len(self.stats) > 0:
-                #     self.timer_ports = Timer(self.stats[0]['refresh'])
-                # else:
-                #     self.timer_ports = Timer(0)
         else:
             # Not available in SNMP mode
             pass
@@ -207,9 +212,12 @@ class ThreadScanner(threading.Thread):
     Specific thread for the port/web scanner.
 
     stats is a list of dict
+
+    The thread schedules the scans (every refresh seconds per target) and
+    runs them in a pool of max_workers threads.
     """
 
-    def __init__(self, stats):
+    def __init__(self, stats, max_workers=10):
         """Init the class."""
         logger.debug("ports plugin - Create thread for scan list {}".format(stats))
         super(ThreadScanner, self).__init__()
@@ -219,25 +227,49 @@ class ThreadScanner(threading.Thread):
         self._stats = stats
         # Is part of Ports plugin
         self.plugin_name = "ports"
+        # The scans are ran in a pool of workers
+        self.pool = GlancesWorkerPool(max_workers=max_workers, name='glances-ports')
+        # Scans state (key: indice)
+        self._jobs = {}
+        self._next = {}
+        # HTTP sessions (one per worker thread, to reuse the connections)
+        self._local = threading.local()
+        self._sessions = []
+        # ICMP socket type (None: not yet known, False: no permission, use the ping command)
+        self._icmp_type = None
+        self._icmp_seq = 0
+        self._icmp_lock = threading.Lock()
 
     def run(self):
         """Grab the stats.
 
         Infinite loop, should be stopped by calling the stop() method.
         """
-        for p in self._stats:
-            # End of the thread has been asked
-            if self.stopped():
+        while not self.stopped():
+            now = time.time()
+            for p in self._stats:
+                if 'url' in p and not requests_tag:
+                    continue
+                job = self._jobs.get(p['indice'])
+                if job is not None and not job.done():
+                    # The last scan of the target is still running
+                    continue
+                if self._next.get(p['indice'], 0) > now:
+                    continue
+                self._next[p['indice']] = now + p['refresh']
+                if 'port' in p:
+                    # Scan a port (ICMP or TCP)
+                    self._jobs[p['indice']] = self.pool.submit(self._port_scan, p)
+                elif 'url' in p:
+                    # Scan an URL
+                    self._jobs[p['indice']] = self.pool.submit(self._web_scan, p)
+            if not self._next:
                 break
-            # Scan a port (ICMP or TCP)
-            if 'port' in p:
-                self._port_scan(p)
-                # Had to wait between two scans
-                # If not, result are not ok
-                time.sleep(1)
-            # Scan an URL
-            elif 'url' in p and requests_tag:
-                self._web_scan(p)
+            # Wait until the next scan (or the end of the thread)
+            self._stopper.wait(min(1, max(0.1, min(self._next.values()) - time.time())))
+        self.pool.stop(timeout=0)
+        for session in self._sessions:
+            session.close()
 
     @property
     def stats(self):
@@ -258,10 +290,18 @@ class ThreadScanner(threading.Thread):
         """Return True is the thread is stopped."""
         return self._stopper.is_set()
 
+    def _session(self):
+        """Return the HTTP session of the current worker thread."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            self._sessions.append(session)
+        return session
+
     def _web_scan(self, web):
         """Scan the  Web/URL (dict) and update the status key."""
         try:
-            req = requests.head(
+            req = self._session().head(
                 web['url'],
                 allow_redirects=True,
                 verify=web['ssl_verify'],
@@ -295,6 +335,76 @@ class ThreadScanner(threading.Thread):
 
     def _port_scan_icmp(self, port):
         """Scan the (ICMP) port structure (dict) and update the status key."""
+        sock = self._icmp_socket()
+        if sock is not None:
+            return self._port_scan_icmp_socket(port, sock)
+        return self._port_scan_icmp_command(port)
+
+    def _icmp_socket(self):
+        """Return an ICMP socket or None if not allowed.
+
+        Unprivileged ICMP sockets (SOCK_DGRAM, see net.ipv4.ping_group_range
+        on Linux) are used if possible, else raw sockets (root).
+        """
+        if self._icmp_type is False:
+            return None
+        for sock_type in [self._icmp_type] if self._icmp_type else [socket.SOCK_DGRAM, socket.SOCK_RAW]:
+            try:
+                sock = socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP)
+            except (socket.error, OSError, AttributeError):
+                continue
+            self._icmp_type = sock_type
+            return sock
+        logger.debug("{}: ICMP sockets are not allowed, use the ping command".format(self.plugin_name))
+        self._icmp_type = False
+        return None
+
+    def _port_scan_icmp_socket(self, port, sock):
+        """Scan the (ICMP) port structure (dict) with an echo request sent from the ICMP socket."""
+        ret = None
+        ip = self._resolv_name(port['host'])
+        with self._icmp_lock:
+            self._icmp_seq = (self._icmp_seq + 1) & 0xFFFF
+            seq = self._icmp_seq
+        # The identifier is overwritten by the kernel for the SOCK_DGRAM sockets
+        ident = os.getpid() & 0xFFFF
+        payload = b'glances'
+        header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+        header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, icmp_checksum(header + payload), ident, seq)
+        try:
+            counter = Counter()
+            sock.sendto(header + payload, (ip, 0))
+            deadline = time.time() + port['timeout']
+            while ret is None:
+                remaining = deadline - time.time()
+                if remaining <= 0 or not select.select([sock], [], [], remaining)[0]:
+                    # Timeout
+                    port['status'] = False
+                    ret = 1
+                    break
+                data, addr = sock.recvfrom(1024)
+                if bytearray(data[:1])[0] >> 4 == 4:
+                    # Skip the IP header (raw sockets)
+                    data = data[(bytearray(data[:1])[0] & 0x0F) * 4 :]
+                if len(data) < 8 or addr[0] != ip:
+                    continue
+                msg_type, _, _, msg_ident, msg_seq = struct.unpack('!BBHHH', data[:8])
+                if (
+                    msg_type == ICMP_ECHO_REPLY
+                    and msg_seq == seq
+                    and (self._icmp_type != socket.SOCK_RAW or msg_ident == ident)
+                ):
+                    port['status'] = counter.get()
+                    ret = 0
+        except Exception as e:
+            logger.debug("{}: Error while pinging host {} ({})".format(self.plugin_name, port['host'], e))
+        finally:
+            sock.close()
+
+        return ret
+
+    def _port_scan_icmp_command(self, port):
+        """Scan the (ICMP) port structure (dict) with the system ping command."""
         ret = None
 
         # Create the ping command
@@ -344,11 +454,13 @@ class ThreadScanner(threading.Thread):
         ret = None
 
         # Create and configure the scanning socket
+        # (with a timeout, the connection is a non blocking connect followed by a poll)
         try:
-            socket.setdefaulttimeout(port['timeout'])
             _socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            _socket.settimeout(port['timeout'])
         except Exception as e:
             logger.debug("{}: Error while creating scanning socket ({})".format(self.plugin_name, e))
+            return ret
 
         # Scan port
         ip = self._resolv_name(port['host'])
@@ -366,3 +478,13 @@ class ThreadScanner(threading.Thread):
             _socket.close()
 
         return ret
+
+
+def icmp_checksum(data):
+    """Return the Internet checksum (RFC 1071) of the data."""
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack('!{}H'.format(len(data) // 2), data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
@@ -74,7 +74,13 @@ class Plugin(GlancesPlugin):
         if self.input_method == 'local':
             # Update stats using the standard system lib
             # Here, update is call for processcount AND processlist
-            glances_processes.update()
+            # Only the displayed processes are sorted and fully grabbed (top mode)
+            # except in programs mode (all the processes are needed to build the programs)
+            # and if no process is displayed (quiet mode: all the processes are exported)
+            if getattr(self.args, 'programs', False) or not glances_processes.max_processes:
+                glances_processes.update()
+            else:
+                glances_processes.update(top=glances_processes.max_processes)
 
             # Return the processes count
             stats = glances_processes.get_count()
@@ -141,12 +141,20 @@ class Plugin(GlancesPlugin):
         if args.sort_processes_key is not None:
             glances_processes.set_sort_key(args.sort_processes_key, False)
 
+        # Set the processes collector if it is defined in the configuration file
+        if config is not None:
+            glances_processes.set_collector(config.get_value('processlist', 'collector', default='psutil'))
+
         # Note: 'glances_processes' is already init in the processes.py script
 
     def get_key(self):
         """Return the key of the list."""
         return 'pid'
 
+    def get_depends(self):
+        """The processes list is updated by the processcount plugin."""
+        return ['processcount']
+
     def update(self):
         """Update processes stats using the input method."""
         # Init new stats
@@ -750,8 +758,19 @@ class Plugin(GlancesPlugin):
         return ret
 
     def __sort_stats(self, sorted_by=None):
-        """Return the stats (dict) sorted by (sorted_by)."""
-        return sort_stats(self.stats, sorted_by, reverse=glances_processes.sort_reverse)
+        """Return the stats (dict) sorted by (sorted_by).
+
+        Only the displayed processes (see glances_processes.max_processes) are sorted and returned.
+        """
+        ret = sort_stats(
+            self.stats, sorted_by, reverse=glances_processes.sort_reverse, top=glances_processes.max_processes
+        )
+        if ret is not self.stats:
+            # Move the displayed processes at the beginning of the stats list
+            # because the process selected in the UI is retrieved by its position
+            top_ids = set(id(p) for p in ret)
+            self.stats[:] = ret + [p for p in self.stats if id(p) not in top_ids]
+        return ret
 
     def __max_pid_size(self):
         """Return the maximum PID size in number of char."""
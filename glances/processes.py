@@ -17,6 +17,7 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+import heapq
 import os
 
 from glances.compat import iterkeys
@@ -31,6 +32,81 @@ import psutil
 sort_processes_key_list = ['cpu_percent', 'memory_percent', 'username', 'cpu_times', 'io_counters', 'name']
 
 
+class GlancesPidCache(object):
+    """Cache of per-process values.
+
+    The key is the (pid, create_time) couple, so a recycled pid does not
+    get the value of a dead process. Each update starts a new generation
+    (see new_generation); the entries not used (get or set) during the last
+    max_age generations are removed by the sweep method. If max_size is set,
+    the least recently used entries are also removed to respect it.
+    """
+
+    def __init__(self, max_age=1, max_size=None):
+        self.max_age = max_age
+        self.max_size = max_size
+        # key = (pid, create_time)
+        # value = [generation of the last use, cached value]
+        self._data = {}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """Return the cached value for key (default if not in the cache)."""
+        try:
+            entry = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        entry[0] = self.generation
+        return entry[1]
+
+    def set(self, key, value):
+        """Set the cached value for key."""
+        self._data[key] = [self.generation, value]
+
+    def new_generation(self):
+        """Start a new generation (should be called once per update)."""
+        self.generation += 1
+
+    def sweep(self):
+        """Remove the old entries and return the number of removed entries."""
+        oldest = self.generation - self.max_age + 1
+        old_keys = [k for k, v in self._data.items() if v[0] < oldest]
+        if self.max_size is not None and len(self._data) - len(old_keys) > self.max_size:
+            old_keys = set(old_keys)
+            lru = sorted((k for k in self._data if k not in old_keys), key=lambda k: self._data[k][0])
+            old_keys.update(lru[: len(lru) - self.max_size])
+        for k in old_keys:
+            del self._data[k]
+        self.evictions += len(old_keys)
+        return len(old_keys)
+
+    def clear(self):
+        """Remove all the entries."""
+        self._data.clear()
+
+    def get_stats(self):
+        """Return the cache statistics (dict)."""
+        return {
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'generation': self.generation,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
 class GlancesProcesses(object):
     """Get processed stats using the psutil library."""
 
@@ -46,22 +122,25 @@ class GlancesProcesses(object):
         # First iteration, no cache
         self.cache_timer = Timer(0)
 
-        # Init the io dict
-        # key = pid
+        # Init the io cache
+        # key = (pid, create_time)
         # value = [ read_bytes_old, write_bytes_old ]
-        self.io_old = {}
+        self.io_old = GlancesPidCache()
 
         # Init stats
         self.auto_sort = None
         self._sort_key = None
+        # Sort keys of the ongoing events (see GlancesEvents)
+        # In top mode, their stats are grabbed for all the processes
+        self.events_sort_keys = set()
         # Default processes sort key is 'auto'
         # Can be overwrite from the configuration file (issue#1536) => See glances_processlist.py init
         self.set_sort_key('auto', auto=True)
         self.processlist = []
         self.reset_processcount()
 
-        # Cache is a dict with key=pid and value = dict of cached value
-        self.processlist_cache = {}
+        # Cache with key=(pid, create_time) and value = dict of cached value
+        self.processlist_cache = GlancesPidCache()
 
         # Tag to enable/disable the processes stats (to reduce the Glances CPU consumption)
         # Default is to enable the processes stats
@@ -70,6 +149,9 @@ class GlancesProcesses(object):
         # Extended stats for top process is enable by default
         self.disable_extended_tag = False
 
+        # Processes collector: psutil (default) or procfs (see set_collector)
+        self._procfs = None
+
         # Test if the system can grab io_counters
         try:
             p = psutil.Process()
@@ -216,6 +298,22 @@ class GlancesProcesses(object):
         """Get the process regular expression compiled."""
         return self._filter.filter_re
 
+    def set_collector(self, collector):
+        """Set the processes collector.
+
+        - psutil: use psutil.process_iter (default)
+        - procfs: incremental collector reading /proc (Linux only)
+        """
+        if collector == 'procfs' and LINUX:
+            from glances.processes_procfs import GlancesProcfsCollector
+
+            self._procfs = GlancesProcfsCollector()
+        else:
+            if collector != 'psutil':
+                logger.warning('Processes collector {} is not available, fallback to psutil'.format(collector))
+            self._procfs = None
+        logger.debug('Processes collector is {}'.format('procfs' if self._procfs is not None else 'psutil'))
+
     def disable_kernel_threads(self):
         """Ignore kernel threads in process list."""
         self.no_kernel_threads = True
@@ -246,8 +344,14 @@ class GlancesProcesses(object):
         for k in self._max_values_list:
             self._max_values[k] = 0.0
 
-    def update(self):
-        """Update the processes stats."""
+    def update(self, top=None):
+        """Update the processes stats.
+
+        If top is set (number of displayed processes), only the top processes
+        are sorted and enriched with the displayed stats (memory_info, gids and
+        io_counters if it is not the sort key of the list or of an ongoing event).
+        Others processes are kept, not sorted, at the end of the list.
+        """
         # Reset the stats
         self.processlist = []
         self.reset_processcount()
@@ -261,7 +365,16 @@ class GlancesProcesses(object):
 
         # Grab standard stats
         #####################
-        sorted_attrs = ['cpu_percent', 'cpu_times', 'memory_percent', 'name', 'status', 'status', 'num_threads']
+        sorted_attrs = [
+            'cpu_percent',
+            'cpu_times',
+            'memory_percent',
+            'name',
+            'status',
+            'status',
+            'num_threads',
+            'create_time',
+        ]
         displayed_attr = ['memory_info', 'nice', 'pid', 'ppid']
         cached_attrs = ['cmdline', 'username']
 
@@ -271,11 +384,26 @@ class GlancesProcesses(object):
         if not self.disable_gids:
             displayed_attr.append('gids')
         # Some stats are not sort key
-        # An optimisation can be done be only grabbed displayed_attr
-        # for displayed processes (but only in standalone mode...)
+        # In top mode, they are only grabbed for the displayed processes
+        lazy_attrs = []
+        if top is not None:
+            lazy_attrs = [a for a in ['memory_info', 'gids'] if a in displayed_attr]
+            if self.no_kernel_threads and 'gids' in lazy_attrs:
+                # Needed by the kernel threads filter
+                lazy_attrs.remove('gids')
+            if (
+                'io_counters' in sorted_attrs
+                and self.sort_key != 'io_counters'
+                and 'io_counters' not in self.events_sort_keys
+            ):
+                lazy_attrs.append('io_counters')
         sorted_attrs.extend(displayed_attr)
+        sorted_attrs = [a for a in sorted_attrs if a not in lazy_attrs]
         # Some stats are cached (not necessary to be refreshed every time)
-        if self.cache_timer.finished():
+        # Note: the procfs collector already grabs them once per process lifetime
+        if self._procfs is not None:
+            is_cached = None
+        elif self.cache_timer.finished():
             sorted_attrs += cached_attrs
             self.cache_timer.set(self.cache_timeout)
             self.cache_timer.reset()
@@ -283,26 +411,81 @@ class GlancesProcesses(object):
         else:
             is_cached = True
 
+        # Entries of the dead processes will be removed from the caches
+        self.io_old.new_generation()
+        self.processlist_cache.new_generation()
+
         # Build the processes stats list (it is why we need psutil>=5.3.0)
+        # psutil.Process instances are kept (key is pid) to grab the lazy stats
+        psutil_processes = {}
+        if self._procfs is not None:
+            processlist = self._procfs.update(io_counters='io_counters' in sorted_attrs)
+        else:
+            processlist = []
+            for p in psutil.process_iter(attrs=sorted_attrs, ad_value=None):
+                psutil_processes[p.info['pid']] = p
+                processlist.append(p.info)
         self.processlist = [
-            p.info
-            for p in psutil.process_iter(attrs=sorted_attrs, ad_value=None)
+            p
+            for p in processlist
             # OS-related processes filter
-            if not (BSD and p.info['name'] == 'idle')
-            and not (WINDOWS and p.info['name'] == 'System Idle Process')
-            and not (MACOS and p.info['name'] == 'kernel_task')
+            if not (BSD and p['name'] == 'idle')
+            and not (WINDOWS and p['name'] == 'System Idle Process')
+            and not (MACOS and p['name'] == 'kernel_task')
             and
             # Kernel threads filter
-            not (self.no_kernel_threads and LINUX and p.info['gids'].real == 0)
+            not (self.no_kernel_threads and LINUX and p['gids'] is not None and p['gids'].real == 0)
         ]
 
-        # Sort the processes list by the current sort_key
-        self.processlist = sort_stats(self.processlist, sorted_by=self.sort_key, reverse=True)
-
         # Update the processcount
         self.update_processcount(self.processlist)
 
         # Loop over processes and add metadata
+        for proc in self.processlist:
+            # PID is the key
+            proc['key'] = 'pid'
+
+            # Time since last update (for disk_io rate computation)
+            proc['time_since_update'] = time_since_update
+
+            # Process status (only keep the first char)
+            proc['status'] = str(proc['status'])[:1].upper()
+
+            # Manage cached information
+            if is_cached is None:
+                # Nothing to do (procfs collector)
+                pass
+            elif is_cached:
+                # Grab cached values (in case of a new incoming process)
+                cached = self.processlist_cache.get(pid_key(proc))
+                if cached is None:
+                    try:
+                        cached = psutil.Process(pid=proc['pid']).as_dict(attrs=cached_attrs, ad_value=None)
+                    except psutil.NoSuchProcess:
+                        pass
+                    else:
+                        self.processlist_cache.set(pid_key(proc), cached)
+                # Add cached value to current stat
+                if cached is not None:
+                    proc.update(cached)
+            else:
+                # Save values to cache
+                self.processlist_cache.set(pid_key(proc), {cached: proc[cached] for cached in cached_attrs})
+
+        # Apply filter
+        self.processlist = [p for p in self.processlist if not (self._filter.is_filtered(p))]
+
+        # Sort the processes list by the current sort_key
+        if top is None:
+            self.processlist = sort_stats(self.processlist, sorted_by=self.sort_key, reverse=True)
+        else:
+            # Only select (heap based partial sort) and enrich the top processes
+            top_list = sort_stats(self.processlist, sorted_by=self.sort_key, reverse=True, top=top)
+            self.enrich(top_list, lazy_attrs, psutil_processes)
+            top_ids = set(id(p) for p in top_list)
+            self.processlist = top_list + [p for p in self.processlist if id(p) not in top_ids]
+
+        # Loop over processes and add IO and extended stats
         first = True
         for proc in self.processlist:
             # Get extended stats, only for top processes (see issue #403).
@@ -356,15 +539,6 @@ class GlancesProcesses(object):
             first = False
             # /End of extended stats
 
-            # PID is the key
-            proc['key'] = 'pid'
-
-            # Time since last update (for disk_io rate computation)
-            proc['time_since_update'] = time_since_update
-
-            # Process status (only keep the first char)
-            proc['status'] = str(proc['status'])[:1].upper()
-
             # Process IO
             # procstat['io_counters'] is a list:
             # [read_bytes, write_bytes, read_bytes_old, write_bytes_old, io_tag]
@@ -374,41 +548,26 @@ class GlancesProcesses(object):
                 io_new = [proc['io_counters'].read_bytes, proc['io_counters'].write_bytes]
                 # For IO rate computation
                 # Append saved IO r/w bytes
-                try:
-                    proc['io_counters'] = io_new + self.io_old[proc['pid']]
+                io_old = self.io_old.get(pid_key(proc))
+                if io_old is not None:
+                    proc['io_counters'] = io_new + io_old
                     io_tag = 1
-                except KeyError:
+                else:
                     proc['io_counters'] = io_new + [0, 0]
                     io_tag = 0
                 # then save the IO r/w bytes
-                self.io_old[proc['pid']] = io_new
+                self.io_old.set(pid_key(proc), io_new)
             else:
                 proc['io_counters'] = [0, 0] + [0, 0]
                 io_tag = 0
             # Append the IO tag (for display)
             proc['io_counters'] += [io_tag]
 
-            # Manage cached information
-            if is_cached:
-                # Grab cached values (in case of a new incoming process)
-                if proc['pid'] not in self.processlist_cache:
-                    try:
-                        self.processlist_cache[proc['pid']] = psutil.Process(pid=proc['pid']).as_dict(
-                            attrs=cached_attrs, ad_value=None
-                        )
-                    except psutil.NoSuchProcess:
-                        pass
-                # Add cached value to current stat
-                try:
-                    proc.update(self.processlist_cache[proc['pid']])
-                except KeyError:
-                    pass
-            else:
-                # Save values to cache
-                self.processlist_cache[proc['pid']] = {cached: proc[cached] for cached in cached_attrs}
-
-        # Apply filter
-        self.processlist = [p for p in self.processlist if not (self._filter.is_filtered(p))]
+        # Remove the entries of the dead processes from the caches
+        self.io_old.sweep()
+        if is_cached is not None:
+            # The cache is only used by the psutil collector
+            self.processlist_cache.sweep()
 
         # Compute the maximum value for keys in self._max_values_list: CPU, MEM
         # Useful to highlight the processes with maximum values
@@ -417,10 +576,30 @@ class GlancesProcesses(object):
             if values_list:
                 self.set_max_values(k, max(values_list))
 
+    def enrich(self, processlist, attrs, psutil_processes=None):
+        """Grab the given (lazy) stats attrs for the processes in processlist."""
+        if not attrs:
+            return
+        psutil_processes = psutil_processes or {}
+        for proc in processlist:
+            if self._procfs is not None:
+                if 'io_counters' in attrs:
+                    proc['io_counters'] = self._procfs.get_io_counters(proc['pid'])
+                continue
+            try:
+                process = psutil_processes.get(proc['pid']) or psutil.Process(proc['pid'])
+                proc.update(process.as_dict(attrs=attrs, ad_value=None))
+            except psutil.NoSuchProcess:
+                proc.update({a: None for a in attrs})
+
     def get_count(self):
         """Get the number of processes."""
         return self.processcount
 
+    def get_cache_stats(self):
+        """Get the statistics of the per-process caches."""
+        return {'io_old': self.io_old.get_stats(), 'processlist_cache': self.processlist_cache.get_stats()}
+
     def getlist(self, sorted_by=None):
         """Get the processlist."""
         return self.processlist
@@ -448,6 +627,11 @@ class GlancesProcesses(object):
         return p.wait(timeout)
 
 
+def pid_key(process):
+    """Return the key of the process in the per-process caches."""
+    return process['pid'], process.get('create_time')
+
+
 def weighted(value):
     """Manage None value in dict value."""
     return -float('inf') if value is None else value
@@ -482,14 +666,26 @@ def _sort_lambda(sorted_by='cpu_percent', sorted_by_secondary='memory_percent'):
     return ret
 
 
-def sort_stats(stats, sorted_by='cpu_percent', sorted_by_secondary='memory_percent', reverse=True):
+def _sort(stats, key, reverse=True, top=None):
+    """Sort the stats list (in place) or return the top first stats (heap based partial sort)."""
+    if top is None:
+        stats.sort(key=key, reverse=reverse)
+        return stats
+    elif reverse:
+        return heapq.nlargest(top, stats, key=key)
+    else:
+        return heapq.nsmallest(top, stats, key=key)
+
+
+def sort_stats(stats, sorted_by='cpu_percent', sorted_by_secondary='memory_percent', reverse=True, top=None):
     """Return the stats (dict) sorted by (sorted_by).
 
     Reverse the sort if reverse is True.
+    If top is set, only return the top first stats (the stats list is not modified).
     """
     if sorted_by is None and sorted_by_secondary is None:
         # No need to sort...
-        return stats
+        return stats if top is None else stats[:top]
 
     # Check if a specific sort should be done
     sort_lambda = _sort_lambda(sorted_by=sorted_by, sorted_by_secondary=sorted_by_secondary)
@@ -497,23 +693,32 @@ def sort_stats(stats, sorted_by='cpu_percent', sorted_by_secondary='memory_perce
     if sort_lambda is not None:
         # Specific sort
         try:
-            stats.sort(key=sort_lambda, reverse=reverse)
+            stats = _sort(stats, sort_lambda, reverse=reverse, top=top)
         except Exception:
             # If an error is detected, fallback to cpu_percent
-            stats.sort(
-                key=lambda process: (weighted(process['cpu_percent']), weighted(process[sorted_by_secondary])),
+            stats = _sort(
+                stats,
+                lambda process: (weighted(process['cpu_percent']), weighted(process[sorted_by_secondary])),
                 reverse=reverse,
+                top=top,
             )
     else:
         # Standard sort
         try:
-            stats.sort(
-                key=lambda process: (weighted(process[sorted_by]), weighted(process[sorted_by_secondary])),
+            stats = _sort(
+                stats,
+                lambda process: (weighted(process[sorted_by]), weighted(process[sorted_by_secondary])),
                 reverse=reverse,
+                top=top,
             )
         except (KeyError, TypeError):
             # Fallback to name
-            stats.sort(key=lambda process: process['name'] if process['name'] is not None else '~', reverse=False)
+            stats = _sort(
+                stats,
+                lambda process: process['name'] if process['name'] is not None else '~',
+                reverse=False,
+                top=top,
+            )
 
     return stats
 
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Glances.
+#
+# Copyright (C) 2021 Nicolargo <nicolas@nicolargo.com>
+#
+# Glances is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Glances is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Incremental /proc based processes collector (Linux only)."""
+
+import os
+from collections import namedtuple
+from time import time
+
+from glances.logger import logger
+
+import psutil
+
+try:
+    import pwd
+except ImportError:
+    # Not available on Windows
+    pwd = None
+
+# Same fields than the psutil (Linux) named tuples
+pcputimes = namedtuple('pcputimes', ['user', 'system', 'children_user', 'children_system', 'iowait'])
+pmem = namedtuple('pmem', ['rss', 'vms', 'shared', 'text', 'lib', 'data', 'dirty'])
+pio = namedtuple('pio', ['read_count', 'write_count', 'read_bytes', 'write_bytes', 'read_chars', 'write_chars'])
+pgids = namedtuple('pgids', ['real', 'effective', 'saved'])
+
+# /proc/<pid>/stat state char to psutil status
+PROC_STATUSES = {
+    'R': psutil.STATUS_RUNNING,
+    'S': psutil.STATUS_SLEEPING,
+    'D': psutil.STATUS_DISK_SLEEP,
+    'T': psutil.STATUS_STOPPED,
+    't': psutil.STATUS_TRACING_STOP,
+    'Z': psutil.STATUS_ZOMBIE,
+    'X': psutil.STATUS_DEAD,
+    'x': psutil.STATUS_DEAD,
+    # Following status are not available in all the psutil versions
+    'K': getattr(psutil, 'STATUS_WAKE_KILL', 'wake-kill'),
+    'W': getattr(psutil, 'STATUS_WAKING', 'waking'),
+    'I': getattr(psutil, 'STATUS_IDLE', 'idle'),
+    'P': getattr(psutil, 'STATUS_PARKED', 'parked'),
+}
+
+
+class GlancesProcfsProcess(object):
+
+    """State of a process kept from one update to another.
+
+    A process is identified by the (pid, start_time) couple, so a
+    recycled pid is seen as a new process.
+    """
+
+    def __init__(self, pid, start_time, comm):
+        self.pid = pid
+        self.start_time = start_time
+        # Static stats (dict), grabbed once per process lifetime
+        # (and again if the comm changes: exec after a fork keeps the pid and start time)
+        self.comm = comm
+        self.static = None
+        # CPU ticks (user + system) and time of the previous update
+        self.cpu_ticks = None
+        self.timestamp = None
+
+
+class GlancesProcfsCollector(object):
+
+    """Build the processes list by reading the /proc filesystem.
+
+    Each update only reads the /proc/<pid>/stat, statm (and io) files.
+    The static stats (name, cmdline, username, gids) are read once, when
+    the process is seen for the first time (or when its comm changes).
+
+    The list items have the same keys and types than the psutil process_iter
+    info dict: cpu_percent, cpu_times, create_time, memory_percent, name,
+    status, num_threads, memory_info, nice, pid, ppid, cmdline, username,
+    gids and (optionally) io_counters.
+    """
+
+    def __init__(self, procfs_path='/proc'):
+        self.procfs_path = procfs_path
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.boot_time = psutil.boot_time()
+        # Dict of GlancesProcfsProcess (key is the pid)
+        self.processes = {}
+        # Cache of the user names (key is the uid)
+        self.usernames = {}
+
+    def _read(self, pid, name):
+        with open('{}/{}/{}'.format(self.procfs_path, pid, name), 'rb') as f:
+            return f.read()
+
+    def get_username(self, uid):
+        """Return the user name of the given uid (cached)."""
+        if uid not in self.usernames:
+            try:
+                self.usernames[uid] = pwd.getpwuid(uid).pw_name
+            except (KeyError, AttributeError):
+                self.usernames[uid] = str(uid)
+        return self.usernames[uid]
+
+    def get_static(self, pid, comm):
+        """Return the static stats of the process (read once per process lifetime).
+
+        Return None if the process is gone.
+        """
+        ret = {'name': comm, 'cmdline': None, 'username': None, 'gids': None}
+        try:
+            cmdline = self._read(pid, 'cmdline').decode('utf-8', 'replace')
+        except (IOError, OSError):
+            pass
+        else:
+            if cmdline.endswith('\x00'):
+                cmdline = cmdline[:-1]
+            ret['cmdline'] = cmdline.split('\x00') if cmdline else []
+            # The comm field is truncated to 15 chars, use the cmdline to get the full name
+            if len(comm) >= 15 and ret['cmdline']:
+                exe = os.path.basename(ret['cmdline'][0])
+                if exe.startswith(comm):
+                    ret['name'] = exe
+        try:
+            for line in self._read(pid, 'status').splitlines():
+                if line.startswith(b'Uid:'):
+                    ret['username'] = self.get_username(int(line.split()[1]))
+                elif line.startswith(b'Gid:'):
+                    ret['gids'] = pgids(*[int(i) for i in line.split()[1:4]])
+        except (IOError, OSError):
+            # The process is gone
+            return None
+        except (ValueError, TypeError):
+            pass
+        return ret
+
+    def update(self, io_counters=True):
+        """Update and return the processes list."""
+        mem_total = psutil.virtual_memory().total
+        ret = []
+        seen = set()
+        for pid in os.listdir(self.procfs_path):
+            if not pid.isdigit():
+                continue
+            pid = int(pid)
+            try:
+                stat = self._read(pid, 'stat')
+                statm = self._read(pid, 'statm').split()
+            except (IOError, OSError):
+                # The process is gone
+                continue
+            timestamp = time()
+
+            # The comm field (between parentheses) can contain spaces
+            comm = stat[stat.find(b'(') + 1 : stat.rfind(b')')].decode('utf-8', 'replace')
+            fields = stat[stat.rfind(b')') + 2 :].split()
+            start_time = int(fields[19])
+
+            process = self.processes.get(pid)
+            if process is None or process.start_time != start_time:
+                process = GlancesProcfsProcess(pid, start_time, comm)
+            elif process.comm != comm:
+                # The process called exec
+                process.comm = comm
+                process.static = None
+            if process.static is None:
+                process.static = self.get_static(pid, comm)
+                if process.static is None:
+                    continue
+                self.processes[pid] = process
+            seen.add(pid)
+
+            # CPU
+            cpu_ticks = int(fields[11]) + int(fields[12])
+            if process.cpu_ticks is None or timestamp <= process.timestamp:
+                cpu_percent = 0.0
+            else:
+                cpu_percent = (
+                    100.0 * (cpu_ticks - process.cpu_ticks) / self.clock_ticks / (timestamp - process.timestamp)
+                )
+            process.cpu_ticks = cpu_ticks
+            process.timestamp = timestamp
+
+            # statm fields: size resident shared text lib data dt (in pages)
+            statm = [int(i) * self.page_size for i in statm[:7]]
+            memory_info = pmem(statm[1], statm[0], *statm[2:])
+            info = {
+                'pid': pid,
+                'ppid': int(fields[1]),
+                'status': PROC_STATUSES.get(fields[0].decode(), '?'),
+                'num_threads': int(fields[17]),
+                'nice': int(fields[16]),
+                'cpu_percent': round(cpu_percent, 1),
+                'create_time': self.boot_time + start_time / float(self.clock_ticks),
+                'cpu_times': pcputimes(
+                    *[int(fields[i]) / float(self.clock_ticks) for i in (11, 12, 13, 14)]
+                    + [int(fields[39]) / float(self.clock_ticks) if len(fields) > 39 else 0.0]
+                ),
+                'memory_info': memory_info,
+                'memory_percent': memory_info.rss * 100.0 / mem_total if mem_total else None,
+            }
+            info.update(process.static)
+            if io_counters:
+                info['io_counters'] = self.get_io_counters(pid)
+            ret.append(info)
+
+        # Forget the processes that are gone
+        for pid in [p for p in self.processes if p not in seen]:
+            del self.processes[pid]
+
+        logger.debug("Procfs collector: {} processes".format(len(ret)))
+        return ret
+
+    def get_io_counters(self, pid):
+        """Return the io_counters of the process (None if access is denied)."""
+        try:
+            io = dict(line.split(b': ') for line in self._read(pid, 'io').splitlines())
+            return pio(
+                int(io[b'syscr']),
+                int(io[b'syscw']),
+                int(io[b'read_bytes']),
+                int(io[b'write_bytes']),
+                int(io[b'rchar']),
+                int(io[b'wchar']),
+            )
+        except (IOError, OSError, KeyError, ValueError):
+            return None
@@ -19,27 +19,31 @@
 
 """Secures functions for Glances"""
 
+import threading
+
 from glances.compat import nativestr
 from subprocess import Popen, PIPE
 
 
-def secure_popen(cmd):
+def secure_popen(cmd, timeout=None):
     """A more or less secure way to execute system commands
 
     Multiple command should be seperated with a &&
 
+    If timeout (in seconds) is set, a command running longer is killed
+
     :return: the result of the commands
     """
     ret = ''
 
     # Split by multiple commands '&&'
     for c in cmd.split('&&'):
-        ret += __secure_popen(c)
+        ret += __secure_popen(c, timeout=timeout)
 
     return ret
 
 
-def __secure_popen(cmd):
+def __secure_popen(cmd, timeout=None):
     """A more or less secure way to execute system command
 
     Manage redirection (>) and pipes (|)
@@ -56,6 +60,7 @@ def __secure_popen(cmd):
 
     sub_cmd_stdin = None
     p_last = None
+    p_list = []
     # Split by pipe '|'
     for sub_cmd in cmd.split('|'):
         # Split by space ' '
@@ -65,9 +70,24 @@ def __secure_popen(cmd):
             # Allow p_last to receive a SIGPIPE if p exits.
             p_last.stdout.close()
         p_last = p
+        p_list.append(p)
         sub_cmd_stdin = p.stdout
 
-    p_ret = p_last.communicate()
+    if timeout is None:
+        p_ret = p_last.communicate()
+    else:
+        # Kill the processes of the pipe if the timeout occurs
+        timed_out = threading.Event()
+        killer = threading.Timer(timeout, __kill, args=[p_list, timed_out])
+        killer.start()
+        try:
+            p_ret = p_last.communicate()
+        finally:
+            killer.cancel()
+        if timed_out.is_set():
+            for p in p_list:
+                p.wait()
+            return 'Glances error: Timeout ({} seconds) for {}'.format(timeout, cmd.strip())
 
     if nativestr(p_ret[1]) == '':
         # No error
@@ -81,3 +101,17 @@ def __secure_popen(cmd):
         ret = nativestr(p_ret[1])
 
     return ret
+
+
+def __kill(p_list, timed_out):
+    """Kill the processes of the pipe (timeout)."""
+    for p in p_list:
+        if p.poll() is not None:
+            # Process already ended (the timeout occurs at the end of the command)
+            continue
+        timed_out.set()
+        try:
+            p.kill()
+        except OSError:
+            # Process already ended
+            pass
@@ -28,6 +28,7 @@ from glances import __version__
 from glances.compat import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer, Server
 from glances.autodiscover import GlancesAutoDiscoverClient
 from glances.logger import logger
+from glances.snapshot import GlancesStatsProducer
 from glances.stats_server import GlancesStatsServer
 from glances.timer import Timer
 
@@ -137,6 +138,10 @@ class GlancesInstance(object):
         # Initial update
         self.stats.update()
 
+        # Snapshots of the stats (used to compute the stats delta)
+        self.producer = GlancesStatsProducer(self.stats, refresh=args.cached_time)
+        self.producer.publish()
+
         # cached_time is the minimum time interval between stats updates
         # i.e. XML/RPC calls will not retrieve updated info until the time
         # since last update is passed (will retrieve old cached info instead)
@@ -146,7 +151,7 @@ class GlancesInstance(object):
     def __update__(self):
         # Never update more than 1 time per cached_time
         if self.timer.finished():
-            self.stats.update()
+            self.producer.update()
             self.timer = Timer(self.cached_time)
 
     def init(self):
@@ -158,6 +163,12 @@ class GlancesInstance(object):
         self.__update__()
         return json.dumps(self.stats.getAll())
 
+    def getAllDelta(self, generation=0, epoch=None):
+        # Update and return the stats changes since the given generation
+        # of the given epoch (see GlancesStatsProducer.get_delta)
+        self.__update__()
+        return self.producer.get_delta(generation, epoch=epoch).body.decode('utf-8')
+
     def getAllPlugins(self):
         # Return the plugins list
         return json.dumps(self.stats.getPluginsList())
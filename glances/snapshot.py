@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Glances.
+#
+# Copyright (C) 2022 Nicolargo <nicolas@nicolargo.com>
+#
+# Glances is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Glances is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Read-only snapshots of the stats and their background producer."""
+
+import copy
+import hashlib
+import json
+import threading
+import uuid
+import zlib
+from collections import deque
+from time import time
+
+from glances.compat import b
+from glances.logger import logger
+from glances.plugins.glances_plugin import GlancesPlugin
+from glances.timer import Counter
+
+
+class GlancesPluginSnapshot(GlancesPlugin):
+
+    """Read-only copy of the stats, views and limits of a plugin.
+
+    Only the getters of the GlancesPlugin class should be used.
+    The history is not copied, it is shared with the plugin (the history
+    rings can be read while the plugin adds points, see GlancesHistoryRing).
+    """
+
+    def __init__(self, plugin):
+        # Do not call the GlancesPlugin constructor (no config, no history init)
+        self.plugin_name = plugin.plugin_name
+        self.args = plugin.args
+        self.stats = copy.deepcopy(plugin.get_raw())
+        # Stats to export (only copied if the plugin overwrites the get_export method)
+        export = plugin.get_export()
+        self._export = None if export is plugin.get_raw() else copy.deepcopy(export)
+        self.views = copy.deepcopy(plugin.get_views())
+        self._limits = dict(plugin.limits)
+        self.reset_matchers()
+        self._key = plugin.get_key()
+        self.items_history_list = plugin.items_history_list
+        self.stats_history = plugin.stats_history
+
+    def get_key(self):
+        """Return the key of the list."""
+        return self._key
+
+    def get_export(self):
+        """Return the stats object to export."""
+        return self.stats if self._export is None else self._export
+
+    def update(self):
+        """A snapshot can not be updated."""
+        return self.stats
+
+
+def stats_delta(old, new, key=None):
+    """Return the delta between the old and new stats of a plugin.
+
+    Return None if the stats are the same, else a dict with:
+    - stats: the new stats (if they can not be compared row by row)
+    or, for the list of dict stats with a key (see GlancesPlugin.get_key):
+    - key: the key of the rows
+    - added: list of the new rows
+    - modified: list of the modified rows
+    - removed: list of the key of the removed rows
+    - order: list of the rows key (only if the order of the rows changed)
+    """
+    if old == new:
+        return None
+    if key is None or not isinstance(old, list) or not isinstance(new, list):
+        return {'stats': new}
+    try:
+        old_rows = {row[key]: row for row in old}
+        new_keys = [row[key] for row in new]
+    except (KeyError, TypeError):
+        return {'stats': new}
+    if len(old_rows) != len(old) or len(set(new_keys)) != len(new):
+        # Keys are not unique
+        return {'stats': new}
+    ret = {'key': key, 'added': [], 'modified': [], 'removed': []}
+    for row_key, row in zip(new_keys, new):
+        if row_key not in old_rows:
+            ret['added'].append(row)
+        elif old_rows[row_key] != row:
+            ret['modified'].append(row)
+    new_keys_set = set(new_keys)
+    ret['removed'] = [row[key] for row in old if row[key] not in new_keys_set]
+    # Order of the rows after apply_stats_delta
+    removed = set(ret['removed'])
+    order = [row[key] for row in old if row[key] not in removed] + [row[key] for row in ret['added']]
+    if order != new_keys:
+        ret['order'] = new_keys
+    return ret
+
+
+def apply_stats_delta(old, delta):
+    """Apply the delta (see stats_delta) to the old stats and return the new stats."""
+    if delta is None:
+        return old
+    if 'stats' in delta:
+        return delta['stats']
+    key = delta['key']
+    removed = set(delta['removed'])
+    modified = {row[key]: row for row in delta['modified']}
+    ret = [modified.get(row[key], row) for row in old if row[key] not in removed] + delta['added']
+    if 'order' in delta:
+        rows = {row[key]: row for row in ret}
+        ret = [rows[k] for k in delta['order']]
+    return ret
+
+
+class GlancesSerializedStats(object):
+
+    """Stats serialized (JSON) once, with their ETag and last modification time."""
+
+    def __init__(self, body, last_modified):
+        self.body = b(body)
+        self.etag = '"{}"'.format(hashlib.sha1(self.body).hexdigest())
+        self.last_modified = last_modified
+        self._lock = threading.Lock()
+        self._deflate = None
+
+    def deflate(self, compress_level=6):
+        """Return the body compressed with the DEFLATE algorithm (compressed once)."""
+        with self._lock:
+            if self._deflate is None:
+                zobj = zlib.compressobj(
+                    compress_level, zlib.DEFLATED, zlib.MAX_WBITS, zlib.DEF_MEM_LEVEL, zlib.Z_DEFAULT_STRATEGY
+                )
+                self._deflate = zobj.compress(self.body) + zobj.flush()
+        return self._deflate
+
+
+class GlancesLastModified(object):
+
+    """Last modification time of the serialized stats, shared by the snapshots.
+
+    HTTP dates have a one second resolution: a new version of the serialized
+    stats (new ETag) gets a last modification time in a later second than the
+    previous version one, so If-Modified-Since can not match both. If it is
+    not possible (new version in the same second), the new version has no
+    last modification time (the ETag should be used).
+    """
+
+    # Maximum number of keys (the delta keys change with each generation,
+    # so the versions are forgotten when it is full)
+    MAX_KEYS = 1024
+
+    def __init__(self):
+        # key: serialized stats key,
+        # value: (generation, etag, last modification time, last second given to a version)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, generation, etag, timestamp):
+        """Return the last modification time of the given version of the serialized stats (or None)."""
+        with self._lock:
+            old = self._versions.get(key)
+            if old is not None and old[1] == etag:
+                return old[2]
+            if old is not None and old[0] > generation:
+                # A newer version is known
+                return None
+            second = int(timestamp)
+            if old is not None and second <= old[3]:
+                # The second is already used by a previous version
+                # (the time should not run ahead of the clock)
+                timestamp, second = None, old[3]
+            if len(self._versions) >= self.MAX_KEYS:
+                self._versions = {}
+            self._versions[key] = (generation, etag, timestamp, second)
+        return timestamp
+
+
+class GlancesStatsSnapshot(object):
+
+    """Read-only copy of all the plugins stats (same getters than GlancesStats).
+
+    A snapshot is never modified after its creation, so it can be read
+    by any thread without lock. Serialized stats are cached in the
+    snapshot (see get_serialized).
+    """
+
+    def __init__(self, stats, generation=0, last_modified=None, plugins=None, epoch=None):
+        # Generation number (incremented for each new snapshot)
+        # and epoch (identifier of the producer, the generations restart with a new producer)
+        self.generation = generation
+        self.epoch = epoch
+        # Creation time of the snapshot
+        self.timestamp = time()
+        # Only copy the given plugins (list of plugin names, default is all the plugins)
+        self._plugins = {
+            p: GlancesPluginSnapshot(stats.get_plugin(p))
+            for p in stats.getPluginsList(enable=False)
+            if plugins is None or p in plugins
+        }
+        self._plugins_list = [p for p in stats.getPluginsList() if p in self._plugins]
+        # Serialized stats cache (key is given by the get_serialized caller)
+        self._serialized = {}
+        self._serialized_lock = threading.Lock()
+        # Last modification times of the serialized stats (GlancesLastModified shared
+        # by the snapshots, used to keep the last modification time of unchanged stats)
+        self.last_modified = last_modified
+
+    def get_serialized(self, key, fct):
+        """Return the GlancesSerializedStats of the fct() string (JSON, Prometheus metrics...).
+
+        fct is only called one time per snapshot and key.
+        """
+        with self._serialized_lock:
+            ret = self._serialized.get(key)
+            if ret is None:
+                ret = GlancesSerializedStats(fct(), self.timestamp)
+                if self.last_modified is not None:
+                    ret.last_modified = self.last_modified.get(key, self.generation, ret.etag, self.timestamp)
+                self._serialized[key] = ret
+        return ret
+
+    def getPluginsList(self, enable=True):
+        """Return the plugins list."""
+        if enable:
+            return list(self._plugins_list)
+        else:
+            return list(self._plugins)
+
+    def get_plugin(self, plugin_name):
+        """Return the plugin snapshot (None if not found)."""
+        return self._plugins.get(plugin_name)
+
+    def getAllAsDict(self):
+        """Return all the stats (dict)."""
+        return {p: self._plugins[p].get_raw() for p in self._plugins}
+
+    def getAllExportsAsDict(self, plugin_list=None):
+        """Return all the stats to be exported (dict)."""
+        if plugin_list is None:
+            plugin_list = self._plugins
+        return {p: self._plugins[p].get_export() for p in plugin_list}
+
+    def getAllLimitsAsDict(self, plugin_list=None):
+        """Return all the stats limits (dict)."""
+        if plugin_list is None:
+            plugin_list = self._plugins
+        return {p: self._plugins[p].limits for p in plugin_list}
+
+    def getAllViewsAsDict(self):
+        """Return all the stats views (dict)."""
+        return {p: self._plugins[p].get_views() for p in self._plugins}
+
+    def get_delta(self, old=None, plugins=None):
+        """Return the delta of the enabled plugins stats since the old snapshot.
+
+        If old is None, all the stats are returned (full is True).
+        If plugins (list of plugin names) is set, only return their delta.
+        """
+        ret = {'epoch': self.epoch, 'generation': self.generation, 'since': 0, 'full': old is None, 'plugins': {}}
+        if old is not None:
+            ret['since'] = old.generation
+        for p in self._plugins_list:
+            if plugins is not None and p not in plugins:
+                continue
+            plugin = self._plugins[p]
+            if old is None or old.get_plugin(p) is None:
+                ret['plugins'][p] = {'stats': plugin.get_raw()}
+            else:
+                delta = stats_delta(old.get_plugin(p).get_raw(), plugin.get_raw(), key=plugin.get_key())
+                if delta is not None:
+                    ret['plugins'][p] = delta
+        return ret
+
+
+class GlancesStatsProducer(threading.Thread):
+
+    """Update the stats and publish them as a GlancesStatsSnapshot.
+
+    The update method can be called directly (update on demand) or
+    every refresh seconds by the thread (see the start method).
+    """
+
+    def __init__(self, stats, refresh=1, history=10):
+        """Init the class."""
+        super(GlancesStatsProducer, self).__init__(name='glances-stats-producer')
+        self.daemon = True
+        # Event needed to stop properly the thread
+        self._stopper = threading.Event()
+        # Only one update at a time
+        self._lock = threading.Lock()
+        # Notify the new snapshots (see wait_snapshot)
+        self._condition = threading.Condition()
+        self.stats = stats
+        self.refresh = refresh
+        # Last published snapshot
+        # The epoch identifies the producer: a generation is only meaningful with its epoch
+        self.epoch = uuid.uuid4().hex
+        self.generation = 0
+        self.snapshot = None
+        # Last modification times of the serialized stats
+        self.last_modified = GlancesLastModified()
+        # Last history published snapshots (used to compute the deltas)
+        self.snapshots = deque(maxlen=history)
+        # Duration of the last update (in seconds)
+        self.duration = None
+
+    def publish(self):
+        """Publish the current stats as a new snapshot and return it."""
+        snapshot = GlancesStatsSnapshot(
+            self.stats, generation=self.generation + 1, last_modified=self.last_modified, epoch=self.epoch
+        )
+        with self._condition:
+            self.generation = snapshot.generation
+            # Replacing the reference is atomic, readers get the old or the new one
+            self.snapshot = snapshot
+            self.snapshots.append(snapshot)
+            self._condition.notify_all()
+        return snapshot
+
+    def wait_snapshot(self, generation, timeout=None):
+        """Wait for a snapshot newer than the given generation (or the timeout).
+
+        Return the last published snapshot.
+        """
+        with self._condition:
+            if self.generation <= generation and not self.stopped():
+                self._condition.wait(timeout)
+            return self.snapshot
+
+    def get_snapshot(self, generation):
+        """Return the published snapshot with the given generation (None if not available)."""
+        for snapshot in list(self.snapshots):
+            if snapshot.generation == generation:
+                return snapshot
+        return None
+
+    def get_delta(self, generation=0, plugins=None, snapshot=None, epoch=None):
+        """Return the GlancesSerializedStats of the delta since the given generation.
+
+        All the stats are returned if the generation is not available anymore,
+        or if the given epoch is not the producer one (the generation was published
+        by another producer, example: before a server restart).
+        The delta is computed for the given snapshot (default is the last one)
+        and plugins (list of plugin names, default is all the enabled plugins).
+        """
+        if snapshot is None:
+            snapshot = self.snapshot
+        old = None if epoch is not None and epoch != self.epoch else self.get_snapshot(generation)
+        if old is not None and old.generation > snapshot.generation:
+            old = None
+        if plugins is not None:
+            plugins = tuple(sorted(plugins))
+        return snapshot.get_serialized(
+            ('delta', old.generation if old is not None else 0, plugins),
+            lambda: json.dumps(snapshot.get_delta(old, plugins=plugins)),
+        )
+
+    def update(self):
+        """Update the stats, publish and return the new snapshot."""
+        with self._lock:
+            counter = Counter()
+            self.stats.update()
+            snapshot = self.publish()
+            self.duration = counter.get()
+        return snapshot
+
+    def run(self):
+        """Update the stats every refresh seconds.
+
+        Infinite loop, should be stopped by calling the stop() method.
+        """
+        logger.info("Stats are updated every {} seconds in background".format(self.refresh))
+        while not self.stopped():
+            try:
+                self.update()
+            except Exception as e:
+                logger.error("Can not update the stats ({})".format(e))
+            # Wait the end of the refresh period
+            self._stopper.wait(max(0, self.refresh - (self.duration or 0)))
+
+    def stop(self, timeout=None):
+        """Stop the thread."""
+        logger.debug("Stop the stats producer")
+        self._stopper.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self.is_alive():
+            self.join(timeout)
+
+    def stopped(self):
+        """Return True is the thread is stopped."""
+        return self._stopper.is_set()
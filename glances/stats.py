@@ -22,12 +22,15 @@
 import collections
 import os
 import sys
-import threading
 import traceback
 
+from glances.compat import queue
+from glances.export_workers import GlancesExportWorker, OVERFLOW_POLICIES
 from glances.logger import logger
 from glances.globals import exports_path, plugins_path, sys_path
-from glances.timer import Counter
+from glances.snapshot import GlancesStatsSnapshot
+from glances.timer import Counter, Timer
+from glances.workers import GlancesJob, GlancesWorkerPool
 
 
 class GlancesStats(object):
@@ -48,6 +51,9 @@ class GlancesStats(object):
         self.first_export = True
         self.load_modules(self.args)
 
+        # Init the parallel update scheduler (if enabled)
+        self.init_update_scheduler()
+
     def __getattr__(self, item):
         """Overwrite the getattr method in case of attribute is not found.
 
@@ -96,8 +102,13 @@ class GlancesStats(object):
         self._exports = collections.defaultdict(dict)
         # All available exporters dictionary
         self._exports_all = collections.defaultdict(dict)
+        # Active exporters workers dictionary
+        self._export_workers = {}
         # Load the export modules
         self.load_exports(args=args)
+        # The exports plugin reports the workers statistics
+        if 'exports' in self._plugins:
+            self._plugins['exports'].set_workers(self._export_workers)
 
         # Restoring system path
         sys.path = sys_path
@@ -171,11 +182,28 @@ class GlancesStats(object):
                 # generate self._exports_list["xxx"] = ...
                 self._exports[export_name] = export_module.Export(args=args, config=self.config)
                 self._exports_all[export_name] = self._exports[export_name]
+                # Start the export worker
+                self._export_workers[export_name] = self._export_worker(export_name)
 
         # Log plugins list
         logger.debug("Active exports modules list: {}".format(self.getExportsList()))
         return True
 
+    def _export_worker(self, export_name):
+        """Create and start the worker of the export module.
+
+        The queue is configured with the queue_size and queue_policy
+        keys of the export section.
+        """
+        queue_size = 3
+        queue_policy = OVERFLOW_POLICIES[0]
+        if hasattr(self.config, 'has_section') and self.config.has_section(export_name):
+            queue_size = self.config.get_int_value(export_name, 'queue_size', default=queue_size)
+            queue_policy = self.config.get_value(export_name, 'queue_policy', default=queue_policy)
+        worker = GlancesExportWorker(self._exports[export_name], queue_size=queue_size, policy=queue_policy)
+        worker.start()
+        return worker
+
     def getPluginsList(self, enable=True):
         """Return the plugins list.
 
@@ -208,9 +236,49 @@ class GlancesStats(object):
         for p in self._plugins:
             self._plugins[p].load_limits(config)
 
+    def init_update_scheduler(self):
+        """Init the parallel update scheduler.
+
+        The scheduler is enabled by the update_workers key of the [global]
+        section (number of threads used to update the plugins).
+        Default is 0: plugins are updated one after the other.
+        """
+        self._update_pool = None
+        self._update_jobs = {}
+        # Plugins whose update missed its deadline (history and views not updated yet)
+        self._update_late = set()
+        self.update_deadline = None
+        if not hasattr(self.config, 'has_section') or not self.config.has_section('global'):
+            return False
+        update_workers = self.config.get_int_value('global', 'update_workers', default=0)
+        if update_workers <= 0:
+            return False
+        # Default deadline is the refresh time (see get_update_deadline)
+        self.update_deadline = self.config.get_float_value('global', 'update_deadline', default=0) or None
+        self._update_pool = GlancesWorkerPool(max_workers=update_workers, name='glances-update')
+        logger.info("Parallel update scheduler enabled ({} workers)".format(update_workers))
+        return True
+
+    def get_update_deadline(self, plugin_name):
+        """Return the maximum time (in seconds) to wait for the plugin update.
+
+        Can be set per plugin (deadline key of the plugin section) or for
+        all the plugins (update_deadline key of the [global] section).
+        Default is the refresh time.
+        """
+        deadline = self._plugins[plugin_name].get_limits(item='deadline')
+        if deadline is None:
+            deadline = self.update_deadline
+        if deadline is None:
+            deadline = getattr(self.args, 'time', 2)
+        return deadline
+
     def update(self):
         """Wrapper method to update the stats."""
         # For standalone and server modes
+        if self._update_pool is not None:
+            return self._update_parallel()
+
         # For each plugins, call the update method
         for p in self._plugins:
             if self._plugins[p].is_disabled():
@@ -224,22 +292,112 @@ class GlancesStats(object):
             # ... and the views
             self._plugins[p].update_views()
 
+    def _update_parallel(self):
+        """Update the stats using the worker pool.
+
+        A plugin is submitted to the pool as soon as all the plugins it
+        depends on (see the get_depends method) are updated.
+        If a plugin did not finish its update before its deadline, its last
+        stats are kept, and so are the stats of the plugins depending on it
+        (they are not updated while it is still running). Its history and
+        views are updated during the next cycle.
+        History and views are updated in the current thread.
+        """
+        # Late updates finished since the last cycle
+        for p in list(self._update_late):
+            if self._update_jobs[p].done():
+                self._update_late.discard(p)
+                if self._update_jobs[p].exception is None:
+                    self._plugins[p].update_stats_history()
+                    self._plugins[p].update_views()
+
+        plugins = [p for p in self._plugins if not self._plugins[p].is_disabled()]
+        waiting = set(plugins)
+        # Running plugins (dict of plugin_name: deadline timer)
+        running = {}
+        # Plugins not updated during this cycle (still running, or depending on one of them)
+        blocked = set()
+        # Queue filled by the workers with the name of the updated plugins
+        finished = queue.Queue()
+
+        while waiting or running:
+            # Submit the plugins whose dependencies are updated
+            ready = [
+                p
+                for p in plugins
+                if p in waiting and not any(d in waiting or d in running for d in self._plugins[p].get_depends())
+            ]
+            if not ready and not running:
+                # Circular dependencies, submit the waiting plugins anyway
+                ready = [p for p in plugins if p in waiting]
+            for p in ready:
+                waiting.discard(p)
+                if p in self._update_jobs and not self._update_jobs[p].done():
+                    # The update started during a previous cycle is still running
+                    logger.debug("Plugin {} update is still running, keep its last stats".format(p))
+                    blocked.add(p)
+                    continue
+                if any(d in blocked for d in self._plugins[p].get_depends()):
+                    # Its stats would be read while they are updated
+                    logger.debug("Plugin {} depends on a running update, keep its last stats".format(p))
+                    blocked.add(p)
+                    continue
+                self._update_jobs[p] = self._update_pool.submit_job(
+                    GlancesJob(self._plugins[p].update, callback=lambda job, p=p: finished.put(p))
+                )
+                running[p] = Timer(self.get_update_deadline(p))
+
+            if not running:
+                continue
+
+            # Wait for the next updated plugin (or the next deadline)
+            try:
+                p = finished.get(timeout=max(0, min(t.duration - t.get() for t in running.values())))
+            except queue.Empty:
+                for p in [p for p in running if running[p].finished()]:
+                    logger.warning(
+                        "Plugin {} update missed its deadline ({} seconds), keep its last stats".format(
+                            p, running[p].duration
+                        )
+                    )
+                    del running[p]
+                    blocked.add(p)
+                    self._update_late.add(p)
+                continue
+
+            del running[p]
+            if self._update_jobs[p].exception is not None:
+                logger.error("Error while updating the {} plugin ({})".format(p, self._update_jobs[p].exception))
+                continue
+            # Update the history...
+            self._plugins[p].update_stats_history()
+            # ... and the views
+            self._plugins[p].update_views()
+
     def export(self, input_stats=None):
         """Export all the stats.
 
-        Each export module is ran in a dedicated thread.
+        A read-only snapshot of the stats is queued to the worker (dedicated
+        thread) of each export module.
         """
         if self.first_export:
             logger.debug("Do not export stats during the first iteration because some information are missing")
             self.first_export = False
             return False
 
-        input_stats = input_stats or {}
+        if not self._exports or input_stats is None:
+            return False
+
+        # Only copy the exported plugins
+        plugins = set()
+        for e in self._exports:
+            plugins.update(self._exports[e].plugins_to_export())
+        snapshot = GlancesStatsSnapshot(input_stats, plugins=plugins)
 
         for e in self._exports:
             logger.debug("Export stats using the %s module" % e)
-            thread = threading.Thread(target=self._exports[e].update, args=(input_stats,))
-            thread.start()
+            if not self._export_workers[e].put(snapshot):
+                logger.debug("Export queue of the %s module is full, stats dropped" % e)
 
         return True
 
@@ -309,9 +467,16 @@ class GlancesStats(object):
 
     def end(self):
         """End of the Glances stats."""
-        # Close export modules
+        # Stop the export workers, then close export modules
         for e in self._exports:
+            self._export_workers[e].stop(timeout=3)
+            if self._export_workers[e].is_alive():
+                # Still exporting: the module (and its spool) can not be closed
+                continue
             self._exports[e].exit()
+        # Stop the update scheduler
+        if self._update_pool is not None:
+            self._update_pool.stop(timeout=1)
         # Close plugins
         for p in self._plugins:
             self._plugins[p].exit()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Glances.
+#
+# Copyright (C) 2021 Nicolargo <nicolas@nicolargo.com>
+#
+# Glances is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Glances is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Bounded pool of worker threads shared by the Glances engines."""
+
+import threading
+from time import time
+
+from glances.compat import queue
+from glances.logger import logger
+from glances.timer import Counter
+
+
+class GlancesJob(object):
+
+    """A function call submitted to a GlancesWorkerPool."""
+
+    def __init__(self, fct, args=None, kwargs=None, callback=None):
+        self.fct = fct
+        self.args = args or ()
+        self.kwargs = kwargs or {}
+        # Optional function called (from the worker thread) with the job
+        # as argument when the job is finished
+        self.callback = callback
+        self.result = None
+        self.exception = None
+        # Time when a worker thread started to run the job
+        self.start_time = None
+        # Duration of the job (in seconds)
+        self.duration = None
+        self._done = threading.Event()
+
+    def run(self):
+        """Run the job (called by the worker thread)."""
+        self.start_time = time()
+        counter = Counter()
+        try:
+            self.result = self.fct(*self.args, **self.kwargs)
+        except Exception as e:
+            logger.debug("Job {} failed ({})".format(getattr(self.fct, '__name__', self.fct), e))
+            self.exception = e
+        finally:
+            self.duration = counter.get()
+            self._done.set()
+            if self.callback is not None:
+                self.callback(self)
+
+    def done(self):
+        """Return True if the job is finished."""
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Wait until the job is finished or the timeout (in seconds) occurs.
+
+        Return True if the job is finished.
+        """
+        self._done.wait(timeout)
+        return self.done()
+
+
+class GlancesWorkerPool(object):
+
+    """This class manages a bounded pool of worker threads.
+
+    Threads are started on demand (up to max_workers) and live until
+    the stop method is called. Jobs are ran in FIFO order.
+    A running job which hangs can be abandoned: its worker is not counted
+    in max_workers anymore (so it is replaced) and exits when the job ends.
+    """
+
+    def __init__(self, max_workers=4, name='glances-worker'):
+        self.max_workers = max(1, int(max_workers))
+        self.name = name
+        self._queue = queue.Queue()
+        self._threads = []
+        self._idle = 0
+        # Abandoned running jobs (see the abandon method)
+        self._abandoned = set()
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def submit(self, fct, *args, **kwargs):
+        """Submit fct(*args, **kwargs) to the pool and return the GlancesJob."""
+        return self.submit_job(GlancesJob(fct, args=args, kwargs=kwargs))
+
+    def submit_job(self, job):
+        """Submit an existing GlancesJob to the pool and return it."""
+        if self._stopped:
+            raise RuntimeError("Worker pool {} is stopped".format(self.name))
+        with self._lock:
+            if self._idle <= 0 and len(self._threads) - len(self._abandoned) < self.max_workers:
+                self._start_worker()
+            else:
+                self._idle -= 1
+        self._queue.put(job)
+        return job
+
+    def abandon(self, job):
+        """Abandon the running job (the caller does not wait for it anymore).
+
+        Its worker is replaced, so the other jobs do not wait behind it.
+        """
+        with self._lock:
+            if self._stopped or job.start_time is None or job.done() or job in self._abandoned:
+                return
+            self._abandoned.add(job)
+            if self._idle < 0:
+                # A job is waiting for a worker
+                self._start_worker()
+                self._idle += 1
+
+    def qsize(self):
+        """Return the number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    def _start_worker(self):
+        """Start a new worker thread (should be called with the lock)."""
+        thread = threading.Thread(target=self._worker, name='{}-{}'.format(self.name, len(self._threads)))
+        thread.daemon = True
+        self._threads.append(thread)
+        thread.start()
+
+    def _worker(self):
+        """Main loop of a worker thread."""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                # Stop message
+                break
+            job.run()
+            with self._lock:
+                if job in self._abandoned:
+                    # The worker has been replaced
+                    self._abandoned.discard(job)
+                    if threading.current_thread() in self._threads:
+                        self._threads.remove(threading.current_thread())
+                    break
+                self._idle += 1
+
+    def stop(self, timeout=None):
+        """Stop all the workers (pending jobs are ran before)."""
+        self._stopped = True
+        with self._lock:
+            threads = self._threads
+            self._threads = []
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join(timeout)
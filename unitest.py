@@ -38,6 +38,7 @@ from glances.programs import processes_to_programs
 from glances.compat import subsample, range
 from glances.secure import secure_popen
 from glances.compat import PY3
+from glances.workers import GlancesWorkerPool
 
 if PY3:
     from tracemalloc import Snapshot
@@ -294,6 +295,1020 @@ class TestGlances(unittest.TestCase):
         # Check if number of processes in the list equal counter
         # self.assertEqual(total, len(stats_grab))
 
+    def test_018_update_scheduler(self):
+        """Check the parallel update scheduler."""
+        print('INFO: [TEST_018] Check the parallel update scheduler')
+        pool = GlancesWorkerPool(max_workers=2)
+        jobs = [pool.submit(pow, 2, i) for i in range(8)]
+        self.assertTrue(all(j.wait(timeout=5) for j in jobs))
+        self.assertEqual([j.result for j in jobs], [2 ** i for i in range(8)])
+        pool.stop()
+        stats._update_pool = GlancesWorkerPool(max_workers=4)
+        try:
+            stats.update()
+        finally:
+            stats._update_pool.stop()
+            stats._update_pool = None
+        self.assertTrue(type(stats.get_plugin('processlist').get_raw()) is list)
+        self.assertTrue(type(stats.get_plugin('cpu').get_views()) is dict)
+        # A late plugin blocks the plugins depending on it
+        import threading
+        hung = threading.Event()
+        calls = []
+        processcount = stats.get_plugin('processcount')
+        processlist = stats.get_plugin('processlist')
+        processcount.update = lambda: hung.wait(10)
+        processlist.update = lambda: calls.append(1)
+        stats._update_pool = GlancesWorkerPool(max_workers=4)
+        stats.update_deadline = 0.2
+        try:
+            stats.update()
+            self.assertEqual(calls, [])
+            self.assertEqual(stats._update_late, set(['processcount']))
+            stats.update()
+            self.assertEqual(calls, [])
+            hung.set()
+            stats._update_jobs['processcount'].wait(5)
+            stats.update()
+            self.assertEqual(stats._update_late, set())
+            self.assertEqual(calls, [1])
+        finally:
+            hung.set()
+            del processcount.update
+            del processlist.update
+            stats._update_pool.stop()
+            stats._update_pool = None
+            stats.update_deadline = None
+
+    @unittest.skipIf(not LINUX, "Procfs collector available only on Linux")
+    def test_019_procfs_collector(self):
+        """Check the procfs processes collector."""
+        print('INFO: [TEST_019] Check the procfs processes collector')
+        import os
+        import psutil
+        from glances.processes_procfs import GlancesProcfsCollector
+        collector = GlancesProcfsCollector()
+        collector.update()
+        processlist = {p['pid']: p for p in collector.update()}
+        self.assertTrue(os.getpid() in processlist)
+        proc = processlist[os.getpid()]
+        ref = psutil.Process().as_dict(attrs=['ppid', 'name', 'cmdline', 'username', 'gids', 'num_threads'])
+        for key in ref:
+            self.assertEqual(proc[key], ref[key], msg='Procfs collector error on key: %s' % key)
+        self.assertEqual(proc['memory_info'].vms, psutil.Process().memory_info().vms)
+        self.assertTrue(proc['status'] in [psutil.STATUS_RUNNING, psutil.STATUS_SLEEPING])
+        # The static stats are read again after an exec (new comm)
+        collector.processes[os.getpid()].comm = 'forked'
+        collector.processes[os.getpid()].static['name'] = 'forked'
+        processlist = {p['pid']: p for p in collector.update()}
+        self.assertEqual(processlist[os.getpid()]['name'], ref['name'])
+
+    def test_020_sort_stats_top(self):
+        """Check the top-N processes sort."""
+        print('INFO: [TEST_020] Check the top-N processes sort')
+        from glances.processes import glances_processes, sort_stats
+        stats = [{'name': str(i), 'cpu_percent': float(i % 7), 'memory_percent': float(i)} for i in range(50)]
+        full = sort_stats(list(stats), 'cpu_percent')
+        top = sort_stats(stats, 'cpu_percent', top=5)
+        self.assertEqual(top, full[:5])
+        self.assertEqual(len(stats), 50)
+        # The sort key of an ongoing event is grabbed for all the processes
+        from glances.events import GlancesEvents
+        events = GlancesEvents()
+        events.add('CRITICAL', 'CPU_IOWAIT', 90, proc_list=[{'io_counters': [0, 0, 0, 0, 0]}])
+        self.assertEqual(glances_processes.events_sort_keys, set(['io_counters']))
+        events.add('OK', 'CPU_IOWAIT', 10, proc_list=[{'io_counters': [0, 0, 0, 0, 0]}])
+        self.assertEqual(glances_processes.events_sort_keys, set())
+
+    def test_021_pid_cache(self):
+        """Check the per-process cache."""
+        print('INFO: [TEST_021] Check the per-process cache')
+        from glances.processes import GlancesPidCache
+        cache = GlancesPidCache(max_size=2)
+        cache.new_generation()
+        for pid in range(3):
+            cache.set((pid, 1.0), pid)
+        cache.sweep()
+        self.assertEqual(len(cache), 2)
+        cache.new_generation()
+        self.assertEqual(cache.get((2, 1.0)), 2)
+        # Recycled pid
+        self.assertIsNone(cache.get((2, 2.0)))
+        cache.sweep()
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get_stats()['hits'], 1)
+        self.assertEqual(cache.get_stats()['misses'], 1)
+        self.assertEqual(cache.get_stats()['evictions'], 2)
+
+    def test_022_stats_snapshot(self):
+        """Check the stats snapshot producer."""
+        print('INFO: [TEST_022] Check the stats snapshot producer')
+        from glances.snapshot import GlancesStatsProducer
+        producer = GlancesStatsProducer(stats, refresh=0.1)
+        snapshot = producer.publish()
+        self.assertEqual(snapshot.generation, 1)
+        self.assertEqual(snapshot.getPluginsList(), stats.getPluginsList())
+        self.assertEqual(snapshot.get_plugin('mem').get_raw(), stats.get_plugin('mem').get_raw())
+        self.assertEqual(snapshot.get_plugin('load').get_stats_item('min1'),
+                         stats.get_plugin('load').get_stats_item('min1'))
+        producer.start()
+        time.sleep(0.5)
+        producer.stop(timeout=5)
+        self.assertFalse(producer.is_alive())
+        self.assertTrue(producer.snapshot.generation > 1)
+        # Old snapshots are not modified by the new updates
+        self.assertEqual(snapshot.generation, 1)
+        self.assertTrue(snapshot.get_plugin('processlist').get_raw() is not
+                        producer.snapshot.get_plugin('processlist').get_raw())
+
+    def test_023_serialized_stats(self):
+        """Check the serialized stats cache."""
+        print('INFO: [TEST_023] Check the serialized stats cache')
+        import zlib
+        from glances.snapshot import GlancesStatsProducer
+        producer = GlancesStatsProducer(stats)
+        snapshot = producer.publish()
+        calls = []
+        serialized = snapshot.get_serialized('system', lambda: calls.append(1) or '{"os": "Linux"}')
+        self.assertTrue(snapshot.get_serialized('system', lambda: calls.append(1) or '{}') is serialized)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(zlib.decompress(serialized.deflate()), serialized.body)
+        # Unchanged stats keep their ETag and last modification time
+        time.sleep(0.1)
+        new = producer.publish().get_serialized('system', lambda: '{"os": "Linux"}')
+        self.assertEqual(new.etag, serialized.etag)
+        self.assertEqual(new.last_modified, serialized.last_modified)
+        # A new version is at least one second (HTTP date resolution) more recent...
+        from glances.snapshot import GlancesLastModified
+        last_modified = GlancesLastModified()
+        self.assertEqual(last_modified.get('system', 1, '"a"', 100.2), 100.2)
+        self.assertEqual(last_modified.get('system', 2, '"b"', 101.5), 101.5)
+        # ... or has no last modification time (the time does not run ahead of the clock)
+        self.assertEqual(last_modified.get('system', 3, '"c"', 101.9), None)
+        self.assertEqual(last_modified.get('system', 4, '"d"', 101.95), None)
+        self.assertEqual(last_modified.get('system', 5, '"e"', 102.1), 102.1)
+        self.assertEqual(last_modified.get('system', 5, '"e"', 103.1), 102.1)
+        new = producer.publish().get_serialized('system', lambda: '{"os": "Windows"}')
+        self.assertTrue(new.last_modified is None or int(new.last_modified) > int(serialized.last_modified))
+        self.assertTrue(new.last_modified is None or new.last_modified <= time.time())
+
+    def test_024_stats_delta(self):
+        """Check the stats delta."""
+        print('INFO: [TEST_024] Check the stats delta')
+        import json
+        from glances.snapshot import GlancesStatsProducer, stats_delta, apply_stats_delta
+        old = [{'pid': 1, 'cpu': 1.0}, {'pid': 2, 'cpu': 2.0}, {'pid': 3, 'cpu': 3.0}]
+        new = [{'pid': 3, 'cpu': 5.0}, {'pid': 1, 'cpu': 1.0}, {'pid': 4, 'cpu': 0.0}]
+        delta = stats_delta(old, new, key='pid')
+        self.assertEqual(delta['added'], [{'pid': 4, 'cpu': 0.0}])
+        self.assertEqual(delta['modified'], [{'pid': 3, 'cpu': 5.0}])
+        self.assertEqual(delta['removed'], [2])
+        self.assertEqual(apply_stats_delta(old, delta), new)
+        self.assertIsNone(stats_delta(new, new, key='pid'))
+        self.assertEqual(stats_delta({'a': 1}, {'a': 2}), {'stats': {'a': 2}})
+        producer = GlancesStatsProducer(stats)
+        first = producer.publish()
+        client_stats = {p: d['stats'] for p, d in json.loads(producer.get_delta(0).body)['plugins'].items()}
+        stats.update()
+        producer.publish()
+        delta = json.loads(producer.get_delta(first.generation, epoch=producer.epoch).body)
+        self.assertFalse(delta['full'])
+        self.assertEqual(delta['epoch'], producer.epoch)
+        # Generation of another producer (server restart)
+        self.assertTrue(json.loads(producer.get_delta(first.generation, epoch='restarted').body)['full'])
+        for p, d in delta['plugins'].items():
+            client_stats[p] = apply_stats_delta(client_stats[p], d)
+        self.assertEqual(client_stats['load'], json.loads(stats.get_plugin('load').get_stats()))
+        self.assertEqual(client_stats['processlist'], json.loads(stats.get_plugin('processlist').get_stats()))
+        # Plugins filter (used by the stream API)
+        delta = json.loads(producer.get_delta(0, plugins=['mem', 'load']).body)
+        self.assertEqual(sorted(delta['plugins']), ['load', 'mem'])
+        # New snapshot notification
+        self.assertEqual(producer.wait_snapshot(first.generation, timeout=5).generation, producer.generation)
+        self.assertTrue(producer.wait_snapshot(producer.generation, timeout=0.1) is producer.snapshot)
+
+    def test_025_wsgi_server(self):
+        """Check the multi-threaded WSGI server."""
+        print('INFO: [TEST_025] Check the multi-threaded WSGI server')
+        import threading
+        try:
+            from http.client import HTTPConnection
+        except ImportError:
+            from httplib import HTTPConnection
+        from glances.outputs.glances_wsgi import GlancesWSGIServer, GlancesWSGIRequestHandler
+
+        import socket
+        end = threading.Event()
+
+        def stream():
+            yield b'data\n'
+            end.wait(10)
+
+        def app(environ, start_response):
+            if environ['PATH_INFO'] == '/stream':
+                start_response('200 OK', [('Content-Type', 'text/event-stream')])
+                return stream()
+            if environ['PATH_INFO'] == '/not_modified':
+                start_response('304 Not Modified', [])
+                return []
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [environ['PATH_INFO'].encode('utf-8')]
+
+        server = GlancesWSGIServer(
+            ('127.0.0.1', 0), GlancesWSGIRequestHandler, workers=2, max_streams=2, quiet=True
+        )
+        server.set_app(app)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            connection = HTTPConnection('127.0.0.1', server.server_port, timeout=5)
+            # Two requests on the same (keep-alive) connection
+            for path in ['/first', '/second']:
+                connection.request('GET', path)
+                r = connection.getresponse()
+                self.assertEqual(r.status, 200)
+                self.assertEqual(r.read(), path.encode('utf-8'))
+                self.assertNotEqual(r.getheader('Connection'), 'close')
+            # Served while the first connection is still open
+            other = HTTPConnection('127.0.0.1', server.server_port, timeout=5)
+            other.request('GET', '/other')
+            self.assertEqual(other.getresponse().read(), b'/other')
+            other.close()
+            # No body: the connection is kept open
+            connection.request('GET', '/not_modified')
+            r = connection.getresponse()
+            self.assertEqual(r.status, 304)
+            r.read()
+            self.assertNotEqual(r.getheader('Connection'), 'close')
+            connection.close()
+            # The streams do not hold the threads, up to max_streams
+            streams = []
+            for i in range(3):
+                streams.append(socket.create_connection(('127.0.0.1', server.server_port), timeout=5))
+                streams[-1].sendall(b'GET /stream HTTP/1.1\r\nHost: localhost\r\n\r\n')
+                self.assertIn(b' 503 ' if i == 2 else b' 200 ', streams[-1].recv(1024).split(b'\r\n')[0] + b' ')
+            other = HTTPConnection('127.0.0.1', server.server_port, timeout=5)
+            other.request('GET', '/other')
+            self.assertEqual(other.getresponse().read(), b'/other')
+            other.close()
+            end.set()
+            for s in streams:
+                s.close()
+        finally:
+            end.set()
+            server.shutdown()
+            server.server_close()
+
+    @unittest.skipIf(not LINUX, "cgroup collector is Linux only")
+    def test_026_docker_cgroup(self):
+        """Check the containers cgroup stats collector."""
+        print('INFO: [TEST_026] Check the containers cgroup stats collector')
+        import os
+        import shutil
+        import tempfile
+        from glances.docker_cgroup import GlancesCgroupCollector
+
+        def write(root, path, content):
+            path = os.path.join(root, path)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                f.write(content)
+
+        root = tempfile.mkdtemp()
+        try:
+            # Fake cgroup v2 hierarchy and procfs for the container process 42
+            write(root, 'proc/stat', 'cpu  100 0 100 800 0 0 0 0 0 0\n')
+            write(root, 'proc/42/cgroup', '0::/system.slice/docker-abc.scope\n')
+            write(
+                root,
+                'proc/42/net/dev',
+                'Inter-|   Receive\n face |bytes    packets\n'
+                '    lo: 10 1 0 0 0 0 0 0 10 1 0 0 0 0 0 0\n'
+                '  eth0: 1000 10 0 0 0 0 0 0 2000 20 0 0 0 0 0 0\n',
+            )
+            cgroup = 'cgroup/system.slice/docker-abc.scope'
+            write(root, 'cgroup/cgroup.controllers', 'cpu io memory\n')
+            write(root, cgroup + '/cpu.stat', 'usage_usec 5000\nuser_usec 3000\nsystem_usec 2000\n')
+            write(root, cgroup + '/memory.current', '4096\n')
+            write(root, cgroup + '/memory.max', 'max\n')
+            write(root, cgroup + '/memory.stat', 'anon 1024\nfile 2048\n')
+            write(root, cgroup + '/io.stat', '8:0 rbytes=100 wbytes=200 rios=1 wios=2\n8:16 rbytes=1 wbytes=2\n')
+
+            collector = GlancesCgroupCollector(
+                cgroup_path=os.path.join(root, 'cgroup'), procfs_path=os.path.join(root, 'proc')
+            )
+            self.assertEqual(collector.version, 2)
+            stats = collector.update([('abc', 42), ('gone', 43)])
+            self.assertEqual(list(stats), ['abc'])
+            stats = stats['abc']
+            self.assertEqual(stats['cpu_stats']['cpu_usage']['total_usage'], 5000000)
+            self.assertEqual(stats['precpu_stats'], {})
+            self.assertEqual(stats['memory_stats']['usage'], 4096)
+            self.assertEqual(stats['memory_stats']['stats'], {'rss': 1024, 'cache': 2048})
+            self.assertEqual(
+                stats['blkio_stats']['io_service_bytes_recursive'],
+                [{'op': 'read', 'value': 101}, {'op': 'write', 'value': 202}],
+            )
+            self.assertEqual(stats['networks'], {'eth0': {'rx_bytes': 1000, 'tx_bytes': 2000}})
+            # Second pass: the previous CPU stats are used to compute the CPU usage
+            write(root, cgroup + '/cpu.stat', 'usage_usec 6000\n')
+            stats = collector.update([('abc', 42)])['abc']
+            self.assertEqual(stats['precpu_stats']['cpu_usage']['total_usage'], 5000000)
+            self.assertEqual(collector.get_stats('abc'), stats)
+            self.assertEqual(collector.get_stats('gone'), {})
+        finally:
+            shutil.rmtree(root)
+
+    def test_027_docker_inventory(self):
+        """Check the Docker containers metadata cache."""
+        print('INFO: [TEST_027] Check the Docker containers metadata cache')
+        try:
+            import docker
+            from glances.plugins.glances_docker import DockerInventory
+        except ImportError:
+            self.skipTest('Docker Python Lib or dateutil is not installed')
+
+        class FakeContainer(object):
+            def __init__(self, id, name, status):
+                self.id = id
+                self.name = name
+                self.attrs = {
+                    'Image': 'sha256:' + name,
+                    'Config': {'Entrypoint': None, 'Cmd': ['sleep', '1']},
+                    'State': {'Status': status, 'Pid': 42, 'StartedAt': '2022-01-01T10:00:00.123456789Z'},
+                }
+
+        class FakeAPI(object):
+            def __init__(self, client):
+                self.client = client
+
+            def containers(self, all=False):
+                self.client.calls += 1
+                return [{'Id': c.id, 'State': c.attrs['State']['Status']} for c in self.client.running.values()]
+
+        class FakeClient(object):
+            def __init__(self):
+                self.containers = self.images = self
+                self.api = FakeAPI(self)
+                self.calls = 0
+                self.running = {}
+
+            def version(self):
+                self.calls += 1
+                return {'Version': 'fake'}
+
+            def get(self, id):
+                """Return the container or the image."""
+                self.calls += 1
+                if id.startswith('sha256:'):
+                    return type('Image', (object,), {'tags': [id[7:] + ':latest']})
+                if id not in self.running:
+                    raise docker.errors.NotFound(id)
+                return self.running[id]
+
+        client = FakeClient()
+        for i in range(10):
+            client.running['id{}'.format(i)] = FakeContainer('id{}'.format(i), 'c{}'.format(i), 'running')
+        inventory = DockerInventory(client, refresh=60, events=False)
+        containers = inventory.update()
+        self.assertEqual(len(containers), 10)
+        self.assertEqual(inventory.version, {'Version': 'fake'})
+        self.assertEqual(sorted(c['name'] for c in containers)[0], 'c0')
+        self.assertEqual(containers[0]['Command'], ['sleep', '1'])
+        self.assertEqual(containers[0]['StartedAt'].year, 2022)
+        # Cached: no request to the Docker API
+        calls = client.calls
+        inventory.update()
+        self.assertEqual(client.calls, calls)
+        # Events: only the given containers are inspected
+        del client.running['id1']
+        client.running['id2'].name = 'renamed'
+        inventory.invalidate('id1')
+        inventory.invalidate('id2')
+        containers = inventory.update()
+        self.assertEqual(client.calls, calls + 2)
+        self.assertEqual(len(containers), 9)
+        self.assertIn('renamed', [c['name'] for c in containers])
+        # List diff: only the modified containers are inspected
+        client.running['id3'].attrs['State']['Status'] = 'paused'
+        inventory.reset()
+        inventory.diff()
+        self.assertEqual(inventory.containers['id3']['Status'], 'paused')
+
+    @unittest.skipIf(not LINUX, "procfs network collector is Linux only")
+    def test_028_network_procfs(self):
+        """Check the procfs network interfaces collector."""
+        print('INFO: [TEST_028] Check the procfs network interfaces collector')
+        import os
+        import shutil
+        import tempfile
+        import psutil
+        from glances.network_procfs import GlancesNetworkProcfsCollector, snetio
+
+        # Same counters than psutil
+        collector = GlancesNetworkProcfsCollector()
+        counters = collector.net_io_counters()
+        self.assertEqual(sorted(counters), sorted(psutil.net_io_counters(pernic=True)))
+        status = collector.net_if_stats(list(counters))
+        for name, s in psutil.net_if_stats().items():
+            if name in status:
+                self.assertEqual(status[name].isup, s.isup)
+
+        # Status cache
+        root = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(root, 'veth0'))
+            for name, value in [('flags', '0x1003'), ('operstate', 'up'), ('speed', '10000')]:
+                with open(os.path.join(root, 'veth0', name), 'w') as f:
+                    f.write(value + '\n')
+            collector = GlancesNetworkProcfsCollector(sysfs_path=root, status_refresh=60)
+            self.assertEqual(collector.net_if_stats(['veth0', 'gone']), {'veth0': (True, 10000)})
+            with open(os.path.join(root, 'veth0', 'operstate'), 'w') as f:
+                f.write('down\n')
+            # Not read again before status_refresh seconds...
+            self.assertEqual(collector.net_if_stats(['veth0'])['veth0'].isup, True)
+            counters = {'veth0': snetio(1, 1, 1, 1, 0, 0, 0, 0)}
+            self.assertEqual(collector.net_if_stats(['veth0'], counters)['veth0'].isup, True)
+            counters = {'veth0': snetio(2, 2, 2, 2, 0, 0, 0, 0)}
+            self.assertEqual(collector.net_if_stats(['veth0'], counters)['veth0'].isup, True)
+            # ... except the operational state when the counters do not change
+            self.assertEqual(collector.net_if_stats(['veth0'], counters), {'veth0': (False, 10000)})
+            collector.status_refresh = 0
+            collector._status['veth0'] = (collector._status['veth0'][0], 0)
+            self.assertEqual(collector.net_if_stats(['veth0'])['veth0'].isup, False)
+        finally:
+            shutil.rmtree(root)
+
+    def test_029_matcher(self):
+        """Check the show/hide matchers."""
+        print('INFO: [TEST_029] Check the show/hide matchers')
+        from glances.matcher import GlancesMatcher
+
+        matcher = GlancesMatcher(['sda2', 'loop.*', '(?i)VETH'])
+        for value in ['sda2', 'sda21', 'loop0', 'veth123']:
+            self.assertTrue(matcher.match(value))
+        for value in ['sda', 'xloop0']:
+            self.assertFalse(matcher.match(value))
+        # Same as re.match, with backreferences and invalid regular expressions
+        matcher = GlancesMatcher(['(a)b\\1', 'c(', 'd'])
+        self.assertEqual(matcher.patterns, ['(a)b\\1', 'd'])
+        self.assertTrue(matcher.match('aba'))
+        self.assertFalse(matcher.match('abd'))
+        self.assertFalse(GlancesMatcher([]).match('sda'))
+
+        plugin = stats.get_plugin('diskio')
+        limits = plugin.limits
+        try:
+            plugin.limits = dict(limits, diskio_hide=['loop.*'], diskio_sda_alias=['System'])
+            self.assertTrue(plugin.is_hide('loop1'))
+            self.assertFalse(plugin.is_hide('sda'))
+            self.assertTrue(plugin.is_show('sda'))
+            self.assertEqual(plugin.has_alias('sda'), 'System')
+            # Memoized results are forgotten when the limits change
+            plugin.set_limits('hide', ['sda'])
+            self.assertFalse(plugin.is_hide('loop1'))
+            self.assertTrue(plugin.is_hide('sda'))
+        finally:
+            plugin.limits = limits
+
+    @unittest.skipIf(not LINUX, "TCP states counter is Linux only")
+    def test_030_tcp_states_counter(self):
+        """Check the TCP states counter."""
+        print('INFO: [TEST_030] Check the TCP states counter')
+        import socket
+        import psutil
+        from glances.connections_counter import GlancesTcpStatesCounter
+
+        netlink = GlancesTcpStatesCounter()
+        procfs = GlancesTcpStatesCounter()
+        procfs.netlink = False
+        before = [netlink.count()[psutil.CONN_LISTEN], procfs.count()[psutil.CONN_LISTEN]]
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            server.bind(('127.0.0.1', 0))
+            server.listen(1)
+            after = [netlink.count()[psutil.CONN_LISTEN], procfs.count()[psutil.CONN_LISTEN]]
+        finally:
+            server.close()
+        self.assertEqual([a - b for a, b in zip(after, before)], [1, 1])
+
+    def test_031_fs_usage(self):
+        """Check the file systems usage probes."""
+        print('INFO: [TEST_031] Check the file systems usage probes')
+        import threading
+        import psutil
+        from glances import fs_usage
+        from glances.fs_usage import GlancesFsUsage, GlancesMountTable
+
+        hung = threading.Event()
+        disk_usage = psutil.disk_usage
+
+        def fake_disk_usage(path):
+            if path == '/hung':
+                hung.wait(10)
+                path = '/'
+            return disk_usage(path)
+
+        probes = GlancesFsUsage(timeout=0.2)
+        fs_usage.psutil.disk_usage = fake_disk_usage
+        try:
+            self.assertEqual(sorted(probes.get(['/', '/not_a_mount_point'])), ['/'])
+            self.assertFalse(probes.get(['/'])['/'][1])
+            # The first probe of /hung answers
+            hung.set()
+            self.assertEqual(sorted(probes.get(['/', '/hung'])), ['/', '/hung'])
+            # Then it hangs: last known usage, stale and quarantined
+            hung.clear()
+            start = time.time()
+            usages = probes.get(['/', '/hung'])
+            self.assertLess(time.time() - start, 2)
+            self.assertFalse(usages['/'][1])
+            self.assertTrue(usages['/hung'][1])
+            self.assertGreater(probes.mounts['/hung']['retry'], time.time())
+            # Still stale, but not probed again (the probe is still running)
+            self.assertTrue(probes.get(['/', '/hung'])['/hung'][1])
+            # The probe answers too late: still quarantined
+            hung.set()
+            time.sleep(0.1)
+            self.assertTrue(probes.get(['/', '/hung'])['/hung'][1])
+            self.assertEqual(probes.mounts['/hung']['failures'], 1)
+            # End of the quarantine: the probe answers in time
+            time.sleep(max(0, probes.mounts['/hung']['retry'] - time.time()))
+            self.assertFalse(probes.get(['/', '/hung'])['/hung'][1])
+            self.assertEqual(probes.mounts['/hung']['failures'], 0)
+        finally:
+            fs_usage.psutil.disk_usage = disk_usage
+            hung.set()
+            probes.stop()
+
+        # The hung probes do not hold the workers
+        hung.clear()
+        probes = GlancesFsUsage(timeout=0.2, max_workers=1)
+        fs_usage.psutil.disk_usage = fake_disk_usage
+        try:
+            hung.set()
+            probes.get(['/hung', '/'])
+            hung.clear()
+            probes.get(['/hung', '/'])
+            self.assertTrue(probes.mounts['/hung']['hung'])
+            probes.mounts['/']['retry'] = 0
+            self.assertFalse(probes.get(['/hung', '/'])['/'][1])
+        finally:
+            fs_usage.psutil.disk_usage = disk_usage
+            hung.set()
+            probes.stop()
+
+        mount_table = GlancesMountTable()
+        self.assertTrue(mount_table.changed())
+        if LINUX:
+            self.assertFalse(mount_table.changed())
+        mount_table.close()
+
+    def test_032_amps_list(self):
+        """Check the AMPs match index and workers."""
+        print('INFO: [TEST_032] Check the AMPs match index and workers')
+        from glances.amps_list import AmpsList
+        from glances.amps.glances_amp import GlancesAmp
+
+        class FakeAmp(GlancesAmp):
+            NAME = 'Fake'
+            updates = 0
+
+            def update(self, process_list):
+                FakeAmp.updates += 1
+                self.set_result('{} processes'.format(len(process_list)))
+                return self.result()
+
+        amps = AmpsList(None, None)
+        python = FakeAmp(name='python')
+        python.configs = {'enable': 'true', 'regex': '.*python.*', 'refresh': 60, 'count': 0}
+        nginx = FakeAmp(name='nginx')
+        nginx.configs = {'enable': 'true', 'regex': 'nginx', 'refresh': 60, 'count': 0}
+        amps.set({'python': python, 'nginx': nginx})
+
+        def process(pid, name, cmdline):
+            return {
+                'pid': pid,
+                'create_time': 1,
+                'name': name,
+                'cmdline': cmdline,
+                'cpu_percent': 0,
+                'memory_percent': 0,
+            }
+
+        processlist = [process(1, 'init', None), process(2, 'python3', ['python3']), process(3, 'sh', ['nginx'])]
+        matches = []
+        match = amps._match
+
+        def count_match(p):
+            matches.append(p['pid'])
+            return match(p)
+
+        amps._match = count_match
+        ret = amps._build_amps_lists(processlist)
+        self.assertEqual([p['pid'] for p in ret['python']], [2])
+        self.assertEqual([p['pid'] for p in ret['nginx']], [3])
+        self.assertEqual(sorted(matches), [1, 2, 3])
+        # Only the new (or renamed) processes are matched
+        del matches[:]
+        processlist = processlist[1:] + [process(4, 'python', None)]
+        processlist[1]['name'] = 'nginx'
+        ret = amps._build_amps_lists(processlist)
+        self.assertEqual(sorted(matches), [3, 4])
+        self.assertEqual([p['pid'] for p in ret['python']], [2, 4])
+        self.assertNotIn((1, 1), amps._index)
+        # A regex change rebuilds the index
+        del matches[:]
+        nginx.configs['regex'] = 'ngin['
+        ret = amps._build_amps_lists(processlist)
+        self.assertEqual(sorted(matches), [2, 3, 4])
+        self.assertNotIn('nginx', ret)
+
+        # The AMP update is only ran when its refresh time is expired
+        amps._submit('python', python, ret['python'])
+        self.assertTrue(amps._jobs['python'].wait(5))
+        self.assertEqual(python.result(), '2 processes')
+        amps._submit('python', python, ret['python'])
+        self.assertTrue(amps._jobs['python'].wait(5))
+        self.assertEqual(FakeAmp.updates, 1)
+        amps.stop()
+
+    def test_033_ports_scanner(self):
+        """Check the ports scanner."""
+        print('INFO: [TEST_033] Check the ports scanner')
+        import socket
+        from glances.plugins.glances_ports import ThreadScanner, icmp_checksum
+
+        # RFC 1071 example
+        self.assertEqual(icmp_checksum(b'\x00\x01\xf2\x03\xf4\xf5\xf6\xf7'), 0x220D)
+
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(('127.0.0.1', 0))
+        server.listen(5)
+        closed = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        closed.bind(('127.0.0.1', 0))
+        closed_port = closed.getsockname()[1]
+        closed.close()
+        stats = [
+            {'indice': 'port_0', 'host': '127.0.0.1', 'port': server.getsockname()[1], 'timeout': 1, 'refresh': 60},
+            {'indice': 'port_1', 'host': '127.0.0.1', 'port': closed_port, 'timeout': 1, 'refresh': 60},
+            {'indice': 'port_2', 'host': '127.0.0.1', 'port': closed_port, 'timeout': 1, 'refresh': 0.2},
+        ]
+        for p in stats:
+            p['status'] = None
+        scanner = ThreadScanner(stats, max_workers=2)
+        scans = []
+        port_scan = scanner._port_scan
+
+        def count_port_scan(port):
+            scans.append(port['indice'])
+            return port_scan(port)
+
+        scanner._port_scan = count_port_scan
+        scanner.start()
+        try:
+            time.sleep(1)
+            self.assertIsInstance(stats[0]['status'], float)
+            self.assertFalse(stats[1]['status'])
+            # Each target is scanned every refresh seconds
+            self.assertEqual(scans.count('port_0'), 1)
+            self.assertGreater(scans.count('port_2'), 2)
+        finally:
+            scanner.stop()
+            scanner.join(5)
+            server.close()
+        self.assertFalse(scanner.is_alive())
+
+    def test_034_actions_executor(self):
+        """Check the actions executor."""
+        print('INFO: [TEST_034] Check the actions executor')
+        import threading
+        from glances import actions
+        from glances.actions import GlancesActionsExecutor
+        from glances.secure import secure_popen
+
+        # A slow command is killed
+        start = time.time()
+        self.assertTrue(secure_popen('sleep 10', timeout=0.2).startswith('Glances error: Timeout'))
+        self.assertLess(time.time() - start, 5)
+
+        executor = GlancesActionsExecutor(max_workers=2, timeout=1)
+        release = threading.Event()
+        ran = []
+        popen = actions.secure_popen
+
+        def fake_popen(cmd, timeout=None):
+            release.wait(5)
+            ran.append(cmd)
+            return ''
+
+        actions.secure_popen = fake_popen
+        try:
+            start = time.time()
+            executor.submit('load', 'critical', ['first'])
+            # The triggers are queued and coalesced while the first run is running
+            for i in range(3):
+                executor.submit('load', 'critical', ['cmd_{}'.format(i)])
+            executor.submit('mem', 'warning', ['mem'])
+            self.assertLess(time.time() - start, 1)
+            time.sleep(0.2)
+            stats = executor.get_stats()
+            self.assertEqual(stats['running'], 2)
+            self.assertEqual(stats['queue'], 1)
+            self.assertEqual(stats['coalesced'], 2)
+            release.set()
+            for _ in range(50):
+                if executor.get_stats()['runs'] == 3:
+                    break
+                time.sleep(0.1)
+            self.assertEqual(sorted(ran), ['cmd_2', 'first', 'mem'])
+            stats = executor.get_stats()
+            self.assertEqual(stats['queue'], 0)
+            self.assertEqual(stats['running'], 0)
+            self.assertIsNotNone(stats['latency'])
+        finally:
+            actions.secure_popen = popen
+            release.set()
+            executor.stop()
+
+    def test_035_folder_size(self):
+        """Check the incremental folder size."""
+        print('INFO: [TEST_035] Check the incremental folder size')
+        import os
+        import shutil
+        import tempfile
+        from glances.folder_size import GlancesFolderSize
+
+        def write(path, size, mode='w'):
+            with open(path, mode) as f:
+                f.write('x' * size)
+
+        for use_inotify in [True, False]:
+            root = tempfile.mkdtemp()
+            try:
+                os.makedirs(os.path.join(root, 'a', 'b'))
+                write(os.path.join(root, 'a', 'b', 'f1'), 100)
+                write(os.path.join(root, 'f0'), 10)
+                folder = GlancesFolderSize(root, use_inotify=use_inotify, full_scan=3)
+                if use_inotify and LINUX:
+                    self.assertIsNotNone(folder.inotify)
+                self.assertEqual(folder.get(), 110)
+                # New directory, moved directory and removed file
+                os.makedirs(os.path.join(root, 'c', 'd'))
+                write(os.path.join(root, 'c', 'd', 'f2'), 7)
+                os.rename(os.path.join(root, 'c'), os.path.join(root, 'a', 'c'))
+                os.remove(os.path.join(root, 'f0'))
+                self.assertEqual(folder.get(), 107)
+                # Modified file (known with inotify or after a full scan)
+                write(os.path.join(root, 'a', 'b', 'f1'), 50, mode='a')
+                self.assertEqual(folder.get(), 157)
+                # Removed directory
+                shutil.rmtree(os.path.join(root, 'a'))
+                self.assertEqual(folder.get(), 0)
+                self.assertEqual(list(folder._dirs), [root])
+                folder.close()
+            finally:
+                shutil.rmtree(root)
+        self.assertRaises(OSError, GlancesFolderSize('/nonexisting').get)
+
+    def test_036_export_worker(self):
+        """Check the export workers."""
+        print('INFO: [TEST_036] Check the export workers')
+        import threading
+        from glances.export_workers import GlancesExportWorker
+        from glances.snapshot import GlancesStatsSnapshot
+
+        class FakeExport(object):
+            export_name = 'fake'
+
+            def __init__(self):
+                self.release = threading.Event()
+                self.exported = []
+
+            def update(self, snapshot):
+                self.release.wait(5)
+                self.exported.append(snapshot)
+
+        snapshots = [GlancesStatsSnapshot(stats, generation=i, plugins=['load']) for i in range(6)]
+        self.assertEqual(snapshots[0].getPluginsList(enable=False), ['load'])
+        for policy, expected in [('drop-oldest', [0, 3, 4]), ('drop-newest', [0, 1, 2]), ('coalesce', [0, 5])]:
+            export = FakeExport()
+            worker = GlancesExportWorker(export, queue_size=2, policy=policy)
+            worker.start()
+            try:
+                worker.put(snapshots[0])
+                # Wait for the first export to start
+                for _ in range(50):
+                    if not worker.get_stats()['queue']:
+                        break
+                    time.sleep(0.1)
+                for snapshot in snapshots[1:5]:
+                    worker.put(snapshot)
+                if policy == 'coalesce':
+                    worker.put(snapshots[5])
+                self.assertEqual(worker.get_stats()['queue'], 1 if policy == 'coalesce' else 2)
+                self.assertGreater(worker.get_stats()['drops'], 0)
+                export.release.set()
+            finally:
+                worker.stop(timeout=5)
+            self.assertFalse(worker.is_alive())
+            self.assertEqual([s.generation for s in export.exported], expected)
+            self.assertEqual(worker.get_stats()['exported'], len(expected))
+            self.assertIsNotNone(worker.get_stats()['latency'])
+
+    def test_037_export_spool(self):
+        """Check the export spool."""
+        print('INFO: [TEST_037] Check the export spool')
+        import os
+        import shutil
+        import tempfile
+        from glances.export_spool import GlancesExportSpool
+
+        path = tempfile.mkdtemp()
+        try:
+            spool = GlancesExportSpool(path, max_size=4000, segment_size=200, replay_rate=5)
+            self.assertTrue(spool.empty())
+            for i in range(10):
+                spool.append(1000 + i, 'load', ['min1'], [i])
+            self.assertGreater(len(os.listdir(path)), 1)
+
+            replayed = []
+
+            def export_bulk(batches):
+                replayed.extend(batches)
+
+            def down(batches):
+                # Only the first batch is exported
+                replayed.append(batches.pop(0))
+                raise IOError('Backend not available')
+
+            self.assertRaises(IOError, spool.replay, down, now=0)
+            # Rate limit (5 batches per second)
+            self.assertEqual(spool.replay(export_bulk, now=0), 4)
+            self.assertEqual(spool.replay(export_bulk, now=0), 0)
+            spool.close()
+            # The replay position is kept
+            spool = GlancesExportSpool(path, max_size=4000, segment_size=200, replay_rate=5)
+            self.assertEqual(spool.replay(export_bulk, now=10), 5)
+            self.assertEqual([b[0] for b in replayed], list(range(1000, 1010)))
+            self.assertEqual(replayed[0], [1000, 'load', ['min1'], [0]])
+            self.assertTrue(spool.empty())
+            # Size cap: the oldest batches are dropped
+            for i in range(200):
+                spool.append(2000 + i, 'load', ['min1'], [i])
+            self.assertLessEqual(spool.size(), 4000)
+            self.assertGreater(spool.get_stats()['dropped'], 0)
+            spool.close()
+        finally:
+            shutil.rmtree(path)
+
+    def test_038_export_batch(self):
+        """Check the export batches."""
+        print('INFO: [TEST_038] Check the export batches')
+        from glances.exports.glances_export import GlancesExport
+        from glances.snapshot import GlancesStatsSnapshot
+
+        class FakeExport(GlancesExport):
+            def __init__(self):
+                super(FakeExport, self).__init__(config=None, args=test_args)
+                self.export_enable = True
+                self.export_list = ['load', 'mem']
+                self.exported = []
+
+            def export(self, name, columns, points):
+                if name == 'load':
+                    raise IOError('Backend not available')
+                self.exported.append((self.timestamp, name))
+
+        def update(export, timestamp):
+            snapshot = GlancesStatsSnapshot(stats, plugins=['load', 'mem'])
+            snapshot.timestamp = timestamp
+            export.update(snapshot)
+
+        # Default: the stats are exported at the end of each update (an error does not stop the export)
+        export = FakeExport()
+        update(export, 100)
+        self.assertEqual(export.exported, [(100, 'mem')])
+
+        # Bulk export, at the end of each 10 seconds period
+        bulks = []
+        export = FakeExport()
+        export.export_bulk = lambda batches: bulks.append([(b[0], b[1]) for b in batches])
+        export.batch_interval = 10
+        update(export, 101)
+        update(export, 105)
+        self.assertEqual(bulks, [])
+        update(export, 111)
+        self.assertEqual(bulks, [[(101, 'load'), (101, 'mem'), (105, 'load'), (105, 'mem')]])
+        export.flush()
+        self.assertEqual(bulks[-1], [(111, 'load'), (111, 'mem')])
+        # ... or as soon as batch_size stats are waiting
+        export.batch_size = 4
+        update(export, 112)
+        update(export, 113)
+        self.assertEqual(len(bulks), 3)
+        self.assertEqual(bulks[-1][-1], (113, 'mem'))
+        # batch_size alone
+        export.batch_interval = 0
+        update(export, 200)
+        self.assertEqual(len(bulks), 3)
+        update(export, 201)
+        self.assertEqual(bulks[-1], [(200, 'load'), (200, 'mem'), (201, 'load'), (201, 'mem')])
+
+    def test_039_export_flatten(self):
+        """Check the export lists (names and values) of the stats."""
+        print('INFO: [TEST_039] Check the export lists')
+        import copy
+        from glances.exports.glances_export import GlancesExport
+
+        class FakeStats(object):
+            timestamp = 0
+
+            def __init__(self, stats, limits):
+                self.stats = stats
+                self.limits = limits
+
+            def getAllExportsAsDict(self, plugin_list=None):
+                return self.stats
+
+            def getAllLimitsAsDict(self, plugin_list=None):
+                return self.limits
+
+        class FakeExport(GlancesExport):
+            def __init__(self):
+                super(FakeExport, self).__init__(config=None, args=test_args)
+                self.export_enable = True
+                self.export_list = ['docker', 'load']
+                self.exported = []
+
+            def export(self, name, columns, points):
+                self.exported.append((name, columns, points))
+
+        fake_stats = FakeStats(
+            {
+                'docker': [
+                    {'key': 'name', 'name': 'web', 'Cpu': {'total': 1.5}, 'io': [{'rx': 2}], 'ports': [], 'up': True},
+                    {'key': 'name', 'name': 'db', 'Cpu': {'total': 0.5}, 'io': [{'rx': 3}], 'ports': [80], 'up': False},
+                ],
+                'load': {'min1': 0.5, 'cpucore': 4},
+            },
+            {'docker': {'history_size': 10}, 'load': {'load_careful': 0.7, 'min1': 1}},
+        )
+        reference = copy.deepcopy(fake_stats.stats)
+        export = FakeExport()
+        for _ in range(2):
+            export.exported = []
+            export.update(fake_stats)
+            self.assertEqual(
+                export.exported,
+                [
+                    (
+                        'docker',
+                        ['web.key', 'web.name', 'web.cputotal', 'web.iorx', 'web.ports', 'web.up', 'web.history_size']
+                        + ['db.key', 'db.name', 'db.cputotal', 'db.iorx', 'db.ports', 'db.up', 'db.history_size'],
+                        ['name', 'web', 1.5, 2, '', 'true', 10, 'name', 'db', 0.5, 3, 80, 'false', 10],
+                    ),
+                    ('load', ['min1', 'cpucore', 'load_careful'], [1, 4, 0.7]),
+                ],
+            )
+        # The stats are not modified by the limits
+        self.assertEqual(fake_stats.stats, reference)
+
+    def test_040_prometheus_metrics(self):
+        """Check the Prometheus metrics."""
+        print('INFO: [TEST_040] Check the Prometheus metrics')
+        import re
+        from glances.outputs.glances_prometheus import GlancesPrometheusRenderer, label_value, sample_value
+        from glances.snapshot import GlancesStatsSnapshot
+
+        self.assertEqual(label_value('a"b\\c\nd'), 'a\\"b\\\\c\\nd')
+        self.assertEqual(sample_value(float('nan')), 'NaN')
+        self.assertEqual(sample_value(float('inf')), '+Inf')
+        self.assertEqual(sample_value(True), '1.0')
+
+        snapshot = GlancesStatsSnapshot(stats)
+        metrics = snapshot.get_serialized(
+            'metrics', lambda: GlancesPrometheusRenderer(labels={'src': 'glances'}).render(snapshot)
+        )
+        self.assertIs(snapshot.get_serialized('metrics', lambda: ''), metrics)
+        lines = metrics.body.decode('utf-8').splitlines()
+        self.assertIn('# TYPE glances_load_min1 gauge', lines)
+        sample = re.compile(r'^[a-z_:][a-z0-9_:]*\{([a-z_]+="([^"\\]|\\.)*",?)*\} (NaN|[+-]Inf|[-0-9.e+]+)$')
+        families = []
+        for line in lines:
+            if line.startswith('# TYPE '):
+                families.append(line.split()[2])
+            else:
+                self.assertTrue(sample.match(line), msg='Bad sample: %s' % line)
+                self.assertTrue(line.startswith(families[-1]), msg='Not grouped: %s' % line)
+                self.assertIn('src="glances"', line)
+        # One TYPE line per metric
+        self.assertEqual(len(families), len(set(families)))
+        for row in stats.get_plugin('network').get_raw():
+            self.assertIn('interface="{}"'.format(row['interface_name']), metrics.body.decode('utf-8'))
+
     def test_094_thresholds(self):
         """Test thresholds classes"""
         print('INFO: [TEST_094] Thresholds')
@@ -353,6 +1368,36 @@ class TestGlances(unittest.TestCase):
         self.assertEqual(a.history_len(), 3)
         self.assertEqual(a.history_value()[1], 4)
         self.assertEqual(a.history_mean(nb=3), 4.5)
+        # History is a ring buffer: the oldest value is overwritten
+        self.assertEqual([v for _, v in a.history], [2, 3, 4])
+        a.value = 5.5
+        self.assertEqual(a.history_value()[1], 5.5)
+        self.assertEqual([v for _, v in a.history_raw(nb=2)], [4, 5.5])
+        a.value = None
+        self.assertEqual(a.history_value()[1], None)
+        self.assertEqual(len(a.history_json()), 3)
+        # The ring can be read while a thread adds points
+        import threading
+        from glances.attribute import GlancesHistoryRing
+        ring = GlancesHistoryRing(100)
+        stop = threading.Event()
+
+        def writer():
+            i = 0
+            while not stop.is_set():
+                i += 1
+                ring.append(i, timestamp=i)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            for _ in range(1000):
+                times, values = ring._copy()
+                self.assertEqual(times, [float(v) for v in values])
+                self.assertEqual(values, list(range(values[0], values[0] + len(values))) if values else [])
+        finally:
+            stop.set()
+            thread.join()
 
     def test_098_history(self):
         """Test GlancesHistory classe"""